@@ -0,0 +1,98 @@
+"""
+Autenticación JWT sin consultar auth_user en las lecturas.
+
+ClaimsJWTAuthentication confía en los claims firmados del token de acceso (user_id y
+username, que añade ClaimsTokenObtainPairSerializer) para los métodos de solo lectura.
+Construye con ellos un User que no sale de la base (settings.SIMPLE_JWT['TOKEN_USER_CLASS']).
+Las escrituras y los tokens antiguos sin 'username' siguen el camino normal de JWTAuthentication.
+
+Para no aceptar indefinidamente a usuarios desactivados o borrados, is_active se consulta
+como mucho una vez cada JWT_USER_STATUS_TTL segundos por usuario y proceso (UserStatusCache).
+Los cambios hechos en este proceso se aplican al momento (accounts/signals.py).
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+USERNAME_CLAIM = 'username'
+
+
+def claims_user(validated_token):
+    """
+    User construido solo con los claims del token. Tiene pk y username, pero no el resto de
+    campos: sirve para filtrar por usuario y mostrar su nombre, nunca para guardarlo.
+    """
+    user = get_user_model()(
+        **{api_settings.USER_ID_FIELD: validated_token[api_settings.USER_ID_CLAIM]},
+        username=validated_token[USERNAME_CLAIM],
+        is_active=True,
+    )
+    user._state.adding = False
+    return user
+
+
+class UserStatusCache:
+    """is_active por usuario, por proceso, con caducidad y tamaño acotado (LRU)."""
+
+    def __init__(self, ttl=60, max_entries=10000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def is_active(self, user_id):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and entry[1] > now:
+                self._entries.move_to_end(user_id)
+                return entry[0]
+
+        # Usuario borrado = no activo
+        active = bool(
+            get_user_model().objects.filter(pk=user_id).values_list('is_active', flat=True).first()
+        )
+        with self._lock:
+            self._entries[user_id] = (active, now + self.ttl)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return active
+
+    def forget(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+user_status = UserStatusCache(ttl=getattr(settings, 'JWT_USER_STATUS_TTL', 60))
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication que, en GET/HEAD/OPTIONS, toma el usuario de los claims del token."""
+
+    def authenticate(self, request):
+        # DRF crea una instancia de autenticador por petición
+        self.stateless = request.method in SAFE_METHODS
+        return super().authenticate(request)
+
+    def get_user(self, validated_token):
+        if not self.stateless or USERNAME_CLAIM not in validated_token:
+            return super().get_user(validated_token)
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken("Token contained no recognizable user identification")
+        if not user_status.is_active(user_id):
+            raise AuthenticationFailed("User is inactive", code="user_inactive")
+        return api_settings.TOKEN_USER_CLASS(validated_token)
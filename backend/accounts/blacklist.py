@@ -0,0 +1,133 @@
+"""
+Comprobación de la lista negra de refresh tokens sin consultar la base en cada refresco.
+
+simplejwt comprueba cada refresco con BlacklistedToken JOIN OutstandingToken por jti.
+RevokedTokenIndex guarda en memoria un filtro de Bloom con los jti en lista negra aún
+no caducados:
+  * si el jti no está en el filtro, seguro que no está en la lista negra: sin consulta,
+  * si está (o es un falso positivo, ~0,1 %), se confirma con la consulta de siempre.
+
+El filtro se carga con el primer refresco del proceso y se pone al día como mucho una vez
+cada JWT_BLACKLIST_SYNC_INTERVAL segundos, leyendo por clave primaria las filas nuevas
+(con un margen de ID_OVERLAP ids por si se confirmaron fuera de orden). Los jti que se
+añaden en este proceso entran al momento (accounts/signals.py); si la fila se creó solo
+con token_id, la siguiente comprobación se pone al día con la base.
+Cada JWT_BLACKLIST_REBUILD_INTERVAL segundos se reconstruye entero, y así salen los caducados.
+"""
+import hashlib
+import math
+import threading
+import time
+
+from django.conf import settings
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.utils import aware_utcnow
+
+# Ids anteriores al último visto que se releen en cada puesta al día: una inserción con id
+# menor puede confirmarse después que otra con id mayor
+ID_OVERLAP = 1000
+
+
+class BloomFilter:
+    """Filtro de Bloom de tamaño fijo: sin falsos negativos, falsos positivos ~`error_rate`."""
+
+    def __init__(self, capacity, error_rate=0.001):
+        self.capacity = max(capacity, 1)
+        self.size = max(int(-self.capacity * math.log(error_rate) / math.log(2) ** 2), 8)
+        self.hashes = max(int(round(self.size / self.capacity * math.log(2))), 1)
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key):
+        # Doble hash (Kirsch-Mitzenmacher) a partir de un único blake2b
+        digest = hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        second = int.from_bytes(digest[8:], 'little') | 1
+        return ((first + i * second) % self.size for i in range(self.hashes))
+
+    def add(self, key):
+        for position in self._positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, key):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+
+class RevokedTokenIndex:
+
+    def __init__(self, sync_interval=5, rebuild_interval=3600, min_capacity=100_000, error_rate=0.001):
+        self.sync_interval = sync_interval
+        self.rebuild_interval = rebuild_interval
+        self.min_capacity = min_capacity
+        self.error_rate = error_rate
+        self._lock = threading.Lock()
+        self._bloom = None
+        self._last_id = 0
+        self._next_sync = 0
+        self._next_rebuild = 0
+
+    def might_be_revoked(self, jti):
+        bloom = self._refresh()
+        # Sin filtro (un reset() a la vez) la respuesta segura es que lo confirme la base
+        return bloom is None or jti in bloom
+
+    def add(self, jti):
+        with self._lock:
+            if self._bloom is not None:
+                self._bloom.add(jti)
+
+    def sync_soon(self):
+        """La próxima comprobación se pone al día con la base sin esperar a JWT_BLACKLIST_SYNC_INTERVAL."""
+        with self._lock:
+            self._next_sync = 0
+
+    def reset(self):
+        with self._lock:
+            self._bloom = None
+
+    def _refresh(self):
+        """Pone el filtro al día si toca y lo devuelve (la referencia local no la cambia un reset())."""
+        now = time.monotonic()
+        bloom = self._bloom
+        if bloom is not None and now < self._next_sync:
+            return bloom
+        with self._lock:
+            if self._bloom is None or now >= self._next_rebuild or self._bloom.count >= self._bloom.capacity:
+                self._rebuild(now)
+            elif now >= self._next_sync:
+                self._load(BlacklistedToken.objects.filter(id__gt=self._last_id - ID_OVERLAP), self._bloom)
+            self._next_sync = now + self.sync_interval
+            return self._bloom
+
+    def _rebuild(self, now):
+        active = BlacklistedToken.objects.filter(token__expires_at__gt=aware_utcnow())
+        # Hueco para lo que se añada hasta la próxima reconstrucción
+        bloom = BloomFilter(max(active.count() * 2, self.min_capacity), self.error_rate)
+        # Las puestas al día parten de la última fila, caducada o no
+        self._last_id = BlacklistedToken.objects.order_by('-id').values_list('id', flat=True).first() or 0
+        self._load(active, bloom)
+        self._bloom = bloom
+        self._next_rebuild = now + self.rebuild_interval
+
+    def _load(self, queryset, bloom):
+        rows = queryset.order_by('id').values_list('id', 'token__jti').iterator(chunk_size=10_000)
+        for row_id, jti in rows:
+            bloom.add(jti)
+            self._last_id = max(self._last_id, row_id)
+
+
+revoked_tokens = RevokedTokenIndex(
+    sync_interval=getattr(settings, 'JWT_BLACKLIST_SYNC_INTERVAL', 5),
+    rebuild_interval=getattr(settings, 'JWT_BLACKLIST_REBUILD_INTERVAL', 3600),
+)
+
+
+class IndexedBlacklistRefreshToken(RefreshToken):
+    """RefreshToken que solo consulta BlacklistedToken si el filtro de Bloom no descarta el jti."""
+
+    def check_blacklist(self):
+        if revoked_tokens.might_be_revoked(self.payload[api_settings.JTI_CLAIM]):
+            super().check_blacklist()
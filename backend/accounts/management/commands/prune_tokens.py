@@ -0,0 +1,51 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.utils import aware_utcnow
+
+
+class Command(BaseCommand):
+    help = (
+        "Borra por lotes los tokens caducados de OutstandingToken y BlacklistedToken. "
+        "Pensado para ejecutarse periódicamente (p. ej. cada hora desde cron)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size', type=int, default=5000,
+            help="Tokens borrados por transacción. Lotes pequeños bloquean la base menos tiempo.",
+        )
+        parser.add_argument(
+            '--pause', type=float, default=0.0,
+            help="Segundos de espera entre lotes para dejar pasar otras escrituras.",
+        )
+        parser.add_argument(
+            '--max-chunks', type=int, default=None,
+            help="Máximo de lotes por ejecución. Por defecto, hasta vaciar los caducados.",
+        )
+
+    def handle(self, *args, **options):
+        # Un token que caduca después de empezar se borrará en la próxima ejecución
+        now = aware_utcnow()
+        chunk_size = options['chunk_size']
+        deleted = chunks = 0
+        while options['max_chunks'] is None or chunks < options['max_chunks']:
+            # Índice de expires_at (accounts/migrations/0001): cada lote es un DELETE acotado por id
+            ids = list(
+                OutstandingToken.objects.filter(expires_at__lte=now)
+                .order_by()
+                .values_list('id', flat=True)[:chunk_size]
+            )
+            if not ids:
+                break
+            with transaction.atomic():
+                # BlacklistedToken primero: así el borrado de OutstandingToken no recorre la cascada fila a fila
+                BlacklistedToken.objects.filter(token_id__in=ids).delete()
+                OutstandingToken.objects.filter(id__in=ids).delete()
+            deleted += len(ids)
+            chunks += 1
+            if options['pause']:
+                time.sleep(options['pause'])
+        self.stdout.write(self.style.SUCCESS(f"Tokens caducados borrados: {deleted} en {chunks} lotes."))
@@ -0,0 +1,19 @@
+from django.db import migrations
+
+# OutstandingToken (simplejwt) no indexa expires_at: sin este índice cada lote de
+# `manage.py prune_tokens` recorre la tabla entera para encontrar los caducados.
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('token_blacklist', '0012_alter_outstandingtoken_user'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            'CREATE INDEX IF NOT EXISTS token_blacklist_outstandingtoken_expires_idx '
+            'ON token_blacklist_outstandingtoken (expires_at)',
+            'DROP INDEX IF EXISTS token_blacklist_outstandingtoken_expires_idx',
+        ),
+    ]
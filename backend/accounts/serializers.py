@@ -2,6 +2,8 @@ from django.contrib.auth.models import User
 from django.contrib.auth.password_validation import validate_password
 from rest_framework import serializers
 from rest_framework.validators import UniqueValidator
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from .blacklist import IndexedBlacklistRefreshToken
 
 class UserRegistrationSerializer(serializers.ModelSerializer):
     email = serializers.EmailField(
@@ -111,3 +113,18 @@ class ChangePasswordSerializer(serializers.Serializer):
         user.set_password(password)
         user.save()
         return user
+
+
+class ClaimsTokenObtainPairSerializer(TokenObtainPairSerializer):
+    """Añade 'username' a los tokens: ClaimsJWTAuthentication lo usa sin consultar auth_user."""
+
+    @classmethod
+    def get_token(cls, user):
+        token = super().get_token(user)
+        token['username'] = user.username
+        return token
+
+
+class IndexedTokenRefreshSerializer(TokenRefreshSerializer):
+    """Refresco que comprueba la lista negra con el índice en memoria (accounts/blacklist.py)."""
+    token_class = IndexedBlacklistRefreshToken
@@ -0,0 +1,29 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+
+from .authentication import user_status
+from .blacklist import revoked_tokens
+
+
+# Desactivar o borrar un usuario se aplica al momento en este proceso;
+# en los demás, como mucho tras JWT_USER_STATUS_TTL segundos.
+@receiver(post_save, sender=get_user_model())
+@receiver(post_delete, sender=get_user_model())
+def forget_user_status(sender, instance, **kwargs):
+    user_status.forget(instance.pk)
+
+
+# Un jti en lista negra desde este proceso se rechaza al momento; los demás procesos
+# lo ven en su próxima puesta al día (JWT_BLACKLIST_SYNC_INTERVAL)
+@receiver(post_save, sender=BlacklistedToken)
+def index_blacklisted_token(sender, instance, created, **kwargs):
+    if not created:
+        return
+    # blacklist() y el admin crean la fila con el OutstandingToken ya cargado. Si solo
+    # viene token_id, leer el jti costaría una consulta: se adelanta la puesta al día
+    if BlacklistedToken.token.is_cached(instance):
+        revoked_tokens.add(instance.token.jti)
+    else:
+        revoked_tokens.sync_soon()
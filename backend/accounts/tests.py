@@ -1,3 +1,241 @@
-from django.test import TestCase
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+from rest_framework_simplejwt.utils import aware_utcnow
+
+from .authentication import user_status
+from .serializers import ClaimsTokenObtainPairSerializer
+from .blacklist import BloomFilter, IndexedBlacklistRefreshToken, RevokedTokenIndex, revoked_tokens
+
+
+@override_settings(QUERY_BUDGET_MODE='raise')
+class AccountsQueryBudgetTests(TransactionTestCase):
+    """
+    Las rutas de accounts con un login JWT real; si una vista supera su @query_budget la
+    petición falla. TransactionTestCase para contar los BEGIN como en el servidor.
+    """
+
+    def setUp(self):
+        user_status.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            'ana@example.com', email='ana@example.com', password='secreta-123', first_name='Ana',
+        )
+
+    def login(self, password='secreta-123'):
+        response = self.client.post(reverse('token_obtain_pair'), {'username': 'ana@example.com', 'password': password}, format='json')
+        self.assertEqual(response.status_code, 200, response.data)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {response.data['access']}")
+        return response.data
+
+    def test_register(self):
+        data = {'email': 'luis@example.com', 'password': 'Clave-larga-9', 'password2': 'Clave-larga-9', 'first_name': 'Luis'}
+        response = self.client.post(reverse('user-register'), data, format='json')
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertNotIn('password', response.data['user'])
+        self.assertTrue(User.objects.get(username='luis@example.com').check_password('Clave-larga-9'))
+
+        response = self.client.post(reverse('user-register'), data, format='json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_token_obtain_and_refresh(self):
+        tokens = self.login()
+        response = self.client.post(reverse('token_refresh'), {'refresh': tokens['refresh']}, format='json')
+        self.assertEqual(response.status_code, 200, response.data)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {response.data['access']}")
+        self.assertEqual(self.client.get(reverse('user-profile')).status_code, 200)
+
+    def test_profile(self):
+        self.login()
+        response = self.client.get(reverse('user-profile'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['email'], 'ana@example.com')
+
+        data = {'email': 'ana.maria@example.com', 'first_name': 'Ana María', 'last_name': 'Pérez'}
+        response = self.client.put(reverse('user-profile'), data, format='json')
+        self.assertEqual(response.status_code, 200, response.data)
+        response = self.client.patch(reverse('user-profile'), {'email': 'ana@example.com', 'last_name': 'Gómez'}, format='json')
+        self.assertEqual(response.status_code, 200, response.data)
+        self.user.refresh_from_db()
+        self.assertEqual((self.user.email, self.user.last_name), ('ana@example.com', 'Gómez'))
+
+    def test_change_password(self):
+        self.login()
+        data = {'old_password': 'secreta-123', 'new_password1': 'Otra-clave-77', 'new_password2': 'Otra-clave-77'}
+        response = self.client.put(reverse('change-password'), data, format='json')
+        self.assertEqual(response.status_code, 200, response.data)
+
+        data = {'old_password': 'Otra-clave-77', 'new_password1': 'Tercera-clave-5', 'new_password2': 'Tercera-clave-5'}
+        response = self.client.patch(reverse('change-password'), data, format='json')
+        self.assertEqual(response.status_code, 200, response.data)
+
+        self.client.credentials()
+        self.login(password='Tercera-clave-5')
+
+
+def auth_user_queries(queries):
+    return [query['sql'] for query in queries if '"auth_user"' in query['sql']]
+
+
+class ClaimsJWTAuthenticationTests(TestCase):
+    """Las lecturas toman el usuario de los claims; is_active se relee como mucho cada TTL."""
+
+    def setUp(self):
+        user_status.clear()
+        self.user = User.objects.create_user('ana@example.com', password='secreta-123')
+        self.client = APIClient()
+        self.url = reverse('income-list-create')
+
+    def use_token(self, token):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def get(self):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(self.url)
+        return response, auth_user_queries(context.captured_queries)
+
+    def test_reads_do_not_load_the_user(self):
+        self.use_token(ClaimsTokenObtainPairSerializer.get_token(self.user).access_token)
+        response, queries = self.get()
+        self.assertEqual(response.status_code, 200)
+        # Solo is_active, y solo la primera vez en el TTL
+        self.assertEqual(len(queries), 1)
+        self.assertIn('"auth_user"."is_active"', queries[0])
+        self.assertNotIn('"auth_user"."password"', queries[0])
+
+        response, queries = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(queries, [])
+
+    def test_deactivated_user_is_rejected(self):
+        self.use_token(ClaimsTokenObtainPairSerializer.get_token(self.user).access_token)
+        self.assertEqual(self.get()[0].status_code, 200)
+        # Desde este proceso (señal post_save) se aplica al momento
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.get()[0].status_code, 401)
+
+    def test_deactivation_elsewhere_applies_after_the_ttl(self):
+        self.use_token(ClaimsTokenObtainPairSerializer.get_token(self.user).access_token)
+        with mock.patch('accounts.authentication.time.monotonic', return_value=1000.0):
+            self.assertEqual(self.get()[0].status_code, 200)
+            # update() no envía señales: es lo que ve un proceso que no hizo el cambio
+            User.objects.filter(pk=self.user.pk).update(is_active=False)
+            self.assertEqual(self.get()[0].status_code, 200)
+        with mock.patch('accounts.authentication.time.monotonic', return_value=1000.0 + user_status.ttl + 1):
+            self.assertEqual(self.get()[0].status_code, 401)
+
+    def test_tokens_without_claims_fall_back_to_the_database(self):
+        # Un token emitido antes de añadir el claim 'username'
+        self.use_token(AccessToken.for_user(self.user))
+        for _ in range(2):
+            response, queries = self.get()
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(queries), 1)
+            self.assertIn('"auth_user"."password"', queries[0])
+
+    def test_writes_load_the_user(self):
+        self.use_token(ClaimsTokenObtainPairSerializer.get_token(self.user).access_token)
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.post(self.url, {'amount': '10.00', 'date': '2024-01-01'}, format='json')
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual(response.data['user'], 'ana@example.com')
+        self.assertTrue(any('"auth_user"."password"' in sql for sql in auth_user_queries(context.captured_queries)))
+
+
+class RevokedTokenIndexTests(TestCase):
+
+    def setUp(self):
+        revoked_tokens.reset()
+        self.user = User.objects.create_user('ana@example.com', password='secreta-123')
+
+    def refresh_token(self):
+        return RefreshToken.for_user(self.user)
+
+    def test_bloom_filter_has_no_false_negatives(self):
+        bloom = BloomFilter(1000)
+        keys = [f'jti-{index}' for index in range(1000)]
+        for key in keys:
+            bloom.add(key)
+        self.assertTrue(all(key in bloom for key in keys))
+        false_positives = sum(f'otro-{index}' in bloom for index in range(10_000))
+        self.assertLess(false_positives, 50)
+
+    def test_known_jti_is_reported_and_unknown_passes(self):
+        revoked = self.refresh_token()
+        revoked.blacklist()
+        index = RevokedTokenIndex(min_capacity=100)
+        self.assertTrue(index.might_be_revoked(revoked['jti']))
+        # Ya cargado: un jti desconocido se descarta sin consultar la base
+        unknown = self.refresh_token()['jti']
+        with self.assertNumQueries(0):
+            self.assertFalse(index.might_be_revoked(unknown))
+
+    def test_other_processes_catch_up_on_sync(self):
+        # `index` hace de otro proceso: no recibe la señal de este, solo lee la base
+        index = RevokedTokenIndex(sync_interval=5, min_capacity=100)
+        token = self.refresh_token()
+        with mock.patch('accounts.blacklist.time.monotonic', return_value=1000.0):
+            self.assertFalse(index.might_be_revoked(token['jti']))
+            token.blacklist()
+            self.assertFalse(index.might_be_revoked(token['jti']))
+        with mock.patch('accounts.blacklist.time.monotonic', return_value=1006.0):
+            self.assertTrue(index.might_be_revoked(token['jti']))
+
+    def test_blacklisting_in_this_process_applies_at_once(self):
+        token = self.refresh_token()
+        IndexedBlacklistRefreshToken(str(token))
+        outstanding = OutstandingToken.objects.get(jti=token['jti'])
+        with self.assertNumQueries(1):
+            BlacklistedToken.objects.create(token=outstanding)
+        with self.assertRaises(TokenError):
+            IndexedBlacklistRefreshToken(str(token))
+
+        # Con solo token_id la señal no lee el jti: se adelanta la puesta al día
+        other = self.refresh_token()
+        IndexedBlacklistRefreshToken(str(other))
+        token_id = OutstandingToken.objects.get(jti=other['jti']).id
+        with self.assertNumQueries(1):
+            BlacklistedToken.objects.create(token_id=token_id)
+        with self.assertRaises(TokenError):
+            IndexedBlacklistRefreshToken(str(other))
+
+    def test_concurrent_reset_does_not_break_checks(self):
+        index = RevokedTokenIndex(min_capacity=100)
+        refresh = index._refresh
+
+        def refresh_then_reset():
+            bloom = refresh()
+            index.reset()
+            return bloom
+
+        with mock.patch.object(index, '_refresh', refresh_then_reset):
+            self.assertFalse(index.might_be_revoked('desconocido'))
+        index.reset()
+        with mock.patch.object(index, '_refresh', lambda: None):
+            # Sin filtro se pide confirmación a la base
+            self.assertTrue(index.might_be_revoked('desconocido'))
+
+    def test_prune_tokens(self):
+        expired, active = self.refresh_token(), self.refresh_token()
+        expired.blacklist()
+        active.blacklist()
+        OutstandingToken.objects.filter(jti__in=[expired['jti'], self.refresh_token()['jti']]).update(
+            expires_at=aware_utcnow() - timedelta(minutes=1),
+        )
+        output = StringIO()
+        call_command('prune_tokens', chunk_size=1, stdout=output)
+        self.assertIn('2 en 2 lotes', output.getvalue())
+        self.assertEqual(list(OutstandingToken.objects.values_list('jti', flat=True)), [active['jti']])
+        self.assertEqual(list(BlacklistedToken.objects.values_list('token__jti', flat=True)), [active['jti']])
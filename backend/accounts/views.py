@@ -4,9 +4,12 @@ from .serializers import UserRegistrationSerializer, UserProfileSerializer, Chan
 from rest_framework import generics, status
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny, IsAuthenticated
+from config.query_budget import query_budget # Máximo de consultas SQL por vista y método
 
 # Create your views here.
 
+# Unicidad del email, alta del usuario y su fila de versión de datos (transactions/signals.py)
+@query_budget(POST=4)
 class UserRegistrationView(generics.CreateAPIView):
     queryset = User.objects.all()
     serializer_class = UserRegistrationSerializer
@@ -26,6 +29,7 @@ class UserRegistrationView(generics.CreateAPIView):
         else:
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+@query_budget(GET=1, PUT=4, PATCH=4)
 class UserProfileView(generics.RetrieveUpdateAPIView):
     serializer_class = UserProfileSerializer
     permission_classes = [IsAuthenticated]
@@ -40,6 +44,7 @@ class UserProfileView(generics.RetrieveUpdateAPIView):
     #     return response
 
 
+@query_budget(PUT=2, PATCH=2)
 class ChangePasswordView(generics.UpdateAPIView):
     serializer_class = ChangePasswordSerializer 
     model = User 
@@ -0,0 +1,204 @@
+"""
+Prueba de carga de las vistas async bajo ASGI frente a las síncronas bajo WSGI.
+
+Siembra una base SQLite temporal, arranca el servidor y lanza --concurrency clientes
+(hilos con conexión keep-alive) durante --duration segundos por nivel:
+  * wsgi: gunicorn config.wsgi con 1 worker y --threads hilos, rutas /api/transactions/...
+  * asgi: uvicorn config.asgi con 1 worker, rutas /api/transactions/async/...
+Mide peticiones por segundo y latencia p50/p99 por endpoint y nivel de concurrencia.
+
+Requiere gunicorn y uvicorn, que no están en requirements.txt:
+    pip install gunicorn uvicorn
+
+Uso (desde backend/):
+    python benchmarks/async_load.py --rows 200000 --concurrency 1,8,32,64
+"""
+import argparse
+import http.client
+import json
+import os
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+ENDPOINTS = {
+    'income_list': 'incomes/',
+    'financial_summary': 'summary/financial/',
+    'expenses_by_category': 'summary/expenses-by-category/',
+}
+
+SERVERS = {
+    'wsgi': lambda port, threads: [
+        'gunicorn', 'config.wsgi:application', '--workers', '1', '--threads', str(threads),
+        '--bind', f'127.0.0.1:{port}', '--log-level', 'warning',
+    ],
+    'asgi': lambda port, threads: [
+        'uvicorn', 'config.asgi:application', '--workers', '1',
+        '--host', '127.0.0.1', '--port', str(port), '--log-level', 'warning',
+    ],
+}
+
+PREFIXES = {'wsgi': '/api/transactions/', 'asgi': '/api/transactions/async/'}
+
+
+def write_settings(tmp, db_path):
+    """Módulo de settings para el servidor: la base temporal y sin medición de presupuestos."""
+    Path(tmp, 'bench_settings.py').write_text(
+        'from config.settings import *\n'
+        f'DATABASES["default"]["NAME"] = {str(db_path)!r}\n'
+        'DEBUG = False\n'
+        'ALLOWED_HOSTS = ["127.0.0.1"]\n'
+        'QUERY_BUDGET_MODE = "off"\n'
+    )
+
+
+def prepare(tmp, rows):
+    """Migra y siembra la base; devuelve un token de acceso del usuario sembrado."""
+    sys.path.insert(0, tmp)
+    os.environ['DJANGO_SETTINGS_MODULE'] = 'bench_settings'
+    import django
+    django.setup()
+    from django.core.management import call_command
+    from rest_framework_simplejwt.tokens import AccessToken
+
+    from benchmarks.indexes import seed
+
+    call_command('migrate', verbosity=0)
+    users = seed(rows, users=1)
+    call_command('rebuild_rollups', verbosity=0)
+    return str(AccessToken.for_user(users[0]))
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def wait_for(port, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f'El servidor no respondió en el puerto {port}')
+
+
+def load(port, path, token, concurrency, duration):
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+    stop_at = time.perf_counter() + duration
+
+    def client():
+        local, failed = [], 0
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+        while time.perf_counter() < stop_at:
+            started = time.perf_counter()
+            try:
+                conn.request('GET', path, headers={'Authorization': f'Bearer {token}'})
+                response = conn.getresponse()
+                response.read()
+                if response.status != 200:
+                    failed += 1
+                    continue
+            except (OSError, http.client.HTTPException):
+                failed += 1
+                conn.close()
+                conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+                continue
+            local.append((time.perf_counter() - started) * 1000)
+        conn.close()
+        with lock:
+            latencies.extend(local)
+            errors.append(failed)
+
+    started = time.perf_counter()
+    pool = [threading.Thread(target=client) for _ in range(concurrency)]
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        'requests': len(latencies),
+        'errors': sum(errors),
+        'requests_per_second': round(len(latencies) / elapsed, 1),
+        'p50_ms': round(statistics.median(latencies), 2) if latencies else None,
+        'p99_ms': round(latencies[max(int(len(latencies) * 0.99) - 1, 0)], 2) if latencies else None,
+    }
+
+
+def run_server(kind, tmp, token, args):
+    port = free_port()
+    env = dict(os.environ, DJANGO_SETTINGS_MODULE='bench_settings', PYTHONPATH=os.pathsep.join([tmp, str(BACKEND_DIR)]))
+    server = subprocess.Popen(SERVERS[kind](port, args.threads), cwd=BACKEND_DIR, env=env)
+    try:
+        wait_for(port)
+        report = {}
+        for name, endpoint in ENDPOINTS.items():
+            path = PREFIXES[kind] + endpoint
+            load(port, path, token, 1, 1)  # Calienta conexiones y caché
+            report[name] = {
+                concurrency: load(port, path, token, concurrency, args.duration)
+                for concurrency in args.concurrency
+            }
+        return report
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=200_000)
+    parser.add_argument('--concurrency', default='1,8,32,64', help='Niveles de clientes simultáneos')
+    parser.add_argument('--duration', type=float, default=10.0, help='Segundos por nivel')
+    parser.add_argument('--threads', type=int, default=8, help='Hilos del worker WSGI')
+    parser.add_argument('--servers', default='wsgi,asgi')
+    parser.add_argument('--output', help='Ruta del JSON con los resultados')
+    args = parser.parse_args()
+    args.concurrency = [int(level) for level in args.concurrency.split(',')]
+
+    servers = args.servers.split(',')
+    for kind in servers:
+        if shutil.which(SERVERS[kind](0, 1)[0]) is None:
+            parser.error(f'No se encontró {SERVERS[kind](0, 1)[0]}: pip install gunicorn uvicorn')
+
+    with tempfile.TemporaryDirectory() as tmp:
+        write_settings(tmp, Path(tmp, 'bench.sqlite3'))
+        started = time.perf_counter()
+        token = prepare(tmp, args.rows)
+        print(f'Sembradas {args.rows} filas en {time.perf_counter() - started:.1f}s')
+        report = {kind: run_server(kind, tmp, token, args) for kind in servers}
+
+    print(f'\n{"endpoint":<22} {"servidor":<8} {"clientes":>8} {"pet/s":>9} {"p50 (ms)":>10} {"p99 (ms)":>10} {"errores":>8}')
+    for name in ENDPOINTS:
+        for kind in servers:
+            for concurrency, result in report[kind][name].items():
+                print(
+                    f'{name:<22} {kind:<8} {concurrency:>8} {result["requests_per_second"]:>9} '
+                    f'{result["p50_ms"]:>10} {result["p99_ms"]:>10} {result["errors"]:>8}'
+                )
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(
+            {'rows': args.rows, 'threads': args.threads, 'results': report}, indent=2
+        ))
+
+
+if __name__ == '__main__':
+    main()
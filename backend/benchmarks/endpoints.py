@@ -0,0 +1,434 @@
+"""
+Latencia, throughput y consultas SQL de todas las rutas de la API.
+
+Siembra una base SQLite con `manage.py seed_finance` (o reutiliza --database si ya existe)
+y recorre cada ruta de transactions/urls.py, accounts/urls.py y los endpoints de tokens
+con el cliente de pruebas de Django: la petición pasa por middleware, autenticación JWT,
+vista y serializer, sin red ni servidor. Por ruta y método mide p50/p95/p99, peticiones
+por segundo (en serie) y consultas por petición. Lo que no se mide (crear las filas que se
+borran, los tokens que se refrescan, ...) se prepara antes de cronometrar.
+
+Con --baseline compara con un JSON anterior y termina con código 1 si algún p95 empeora
+más de --max-regression o alguna ruta hace más consultas que antes.
+
+Uso (desde backend/):
+    python benchmarks/endpoints.py --users 50 --transactions 2000 --output bench.json
+    python benchmarks/endpoints.py --database /tmp/seed.sqlite3 --baseline bench.json
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date
+from decimal import Decimal
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+
+# Rutas que hashean contraseñas (PBKDF2): pocas repeticiones bastan
+SLOW_REPEAT = 10
+STRONG_PASSWORDS = ('Bench-Pass-Alpha-2024!', 'Bench-Pass-Bravo-2024!')
+
+
+def setup_django(db_path):
+    from django.conf import settings
+    settings.DATABASES['default']['NAME'] = db_path
+    settings.DEBUG = False
+    settings.ALLOWED_HOSTS = ['testserver']
+    settings.QUERY_BUDGET_MODE = 'off'
+    import django
+    django.setup()
+
+
+class Scenario:
+    """
+    Una ruta y un método. `build(ctx, i)` devuelve (kwargs de reverse, datos, formato) de la
+    petición i; `prepare(ctx, repeat)` crea antes, sin cronometrar, lo que las peticiones consumen.
+    """
+
+    def __init__(self, route, method, build=None, prepare=None, slow=False, admin=False, anonymous=False, before=None):
+        self.route = route
+        self.method = method
+        self.build = build or (lambda ctx, i: ({}, None, None))
+        self.prepare = prepare
+        self.slow = slow
+        self.admin = admin
+        self.anonymous = anonymous
+        self.before = before
+
+    @property
+    def label(self):
+        return f'{self.route} {self.method}'
+
+
+class Context:
+    """Usuario principal de la prueba, sus ids y las filas preparadas por cada escenario."""
+
+    def __init__(self, user, run_id, password):
+        from transactions.models import Category, Expense, Income
+
+        self.user = user
+        self.run_id = run_id
+        self.password = password
+        self.income_ids = list(Income.objects.filter(user=user).values_list('id', flat=True)[:1000])
+        self.expense_ids = list(Expense.objects.filter(user=user).values_list('id', flat=True)[:1000])
+        self.category_ids = list(Category.objects.filter(user=None).values_list('id', flat=True))
+        # CategoryDetailView solo sirve las categorías propias
+        self.own_category_ids = list(Category.objects.filter(user=user).values_list('id', flat=True)) or [
+            Category.objects.create(user=user, name=f'bench propia {run_id}').id
+        ]
+        self.pools = {}
+
+    def pick(self, ids, i):
+        return ids[i % len(ids)]
+
+
+def create_pool(ctx, kind, count):
+    """Movimientos nuevos del usuario, con sus rollups, para modificarlos o borrarlos."""
+    from transactions.models import Expense, Income, transaction_fingerprint
+    from transactions.rollups import record_bulk_create
+
+    model = Income if kind == 'income' else Expense
+    rows = []
+    for index in range(count):
+        amount = Decimal(10 + index % 90)
+        value_date = date(2024, 1 + index % 12, 1 + index % 28)
+        description = f'bench pool {ctx.run_id} {index}'
+        rows.append(model(
+            user=ctx.user, amount=amount, date=value_date, description=description,
+            category_id=ctx.pick(ctx.category_ids, index),
+            fingerprint=transaction_fingerprint(value_date, amount, description),
+        ))
+    model.objects.bulk_create(rows)
+    record_bulk_create(kind, rows)
+    return [row.id for row in rows]
+
+
+def prepare_pool(kind, key):
+    def prepare(ctx, repeat):
+        ctx.pools[key] = create_pool(ctx, kind, repeat)
+    return prepare
+
+
+def prepare_categories(ctx, repeat):
+    from transactions.models import Category
+
+    categories = Category.objects.bulk_create(
+        [Category(user=ctx.user, name=f'bench borrar {ctx.run_id} {index}') for index in range(repeat)]
+    )
+    ctx.pools['categories'] = [category.id for category in categories]
+
+
+def prepare_refresh_tokens(ctx, repeat):
+    from accounts.serializers import ClaimsTokenObtainPairSerializer
+
+    ctx.pools['refresh'] = [str(ClaimsTokenObtainPairSerializer.get_token(ctx.user)) for _ in range(repeat)]
+
+
+def prepare_batches(ctx, repeat):
+    ctx.pools['batch'] = create_pool(ctx, 'expense', repeat * 50)
+
+
+def import_file(ctx, i):
+    from django.core.files.uploadedfile import SimpleUploadedFile
+
+    lines = ['date,amount,description,category_name']
+    lines += [f'2024-03-{1 + row % 28:02d},{10 + row}.50,bench import {ctx.run_id} {i} {row},Supermercado' for row in range(50)]
+    return SimpleUploadedFile('bench.csv', '\n'.join(lines).encode(), content_type='text/csv')
+
+
+def batch_operations(ctx, i):
+    ids = ctx.pools['batch'][i * 50:(i + 1) * 50]
+    operations = [{'op': 'update', 'model': 'expense', 'id': pk, 'data': {'amount': '12.34'}} for pk in ids[:25]]
+    operations += [{'op': 'delete', 'model': 'expense', 'id': pk} for pk in ids[25:]]
+    operations += [
+        {'op': 'create', 'model': 'expense', 'data': {
+            'description': f'bench batch {i}', 'amount': '5.00', 'date': '2024-04-01',
+            'category_id': ctx.pick(ctx.category_ids, row),
+        }}
+        for row in range(50)
+    ]
+    return operations
+
+
+def change_password(ctx, i):
+    old = ctx.password
+    ctx.password = STRONG_PASSWORDS[(STRONG_PASSWORDS.index(old) + 1) % len(STRONG_PASSWORDS)]
+    return {}, {'old_password': old, 'new_password1': ctx.password, 'new_password2': ctx.password}, 'json'
+
+
+def bump_version(ctx, i):
+    from transactions.cache import bump_data_version
+
+    bump_data_version(ctx.user.pk)
+
+
+SUMMARY_ROUTES = [
+    ('financial-summary', {}),
+    ('dashboard-summary', {}),
+    ('expense-category-summary', {}),
+    ('income-category-summary', {}),
+    ('timeseries-summary', {'granularity': 'month'}),
+    ('async-financial-summary', {}),
+    ('async-expense-category-summary', {}),
+    ('async-income-category-summary', {}),
+]
+
+
+def scenarios(cold):
+    """Lecturas primero y borrados al final, para que las escrituras no cambien lo que se lee."""
+    query = lambda params: lambda ctx, i: ({}, params, None)
+    reads = [
+        Scenario('category-list-create', 'GET'),
+        Scenario('category-detail', 'GET', lambda ctx, i: ({'pk': ctx.pick(ctx.own_category_ids, i)}, None, None)),
+        Scenario('income-list-create', 'GET'),
+        Scenario('income-list-create', 'GET', query({'date_from': '2023-01-01', 'amount_min': '100'})),
+        Scenario('income-detail', 'GET', lambda ctx, i: ({'pk': ctx.pick(ctx.income_ids, i)}, None, None)),
+        Scenario('expense-list-create', 'GET'),
+        Scenario('expense-list-create', 'GET', query({'year': 2024, 'month': 3})),
+        Scenario('expense-detail', 'GET', lambda ctx, i: ({'pk': ctx.pick(ctx.expense_ids, i)}, None, None)),
+        Scenario('async-income-list', 'GET'),
+        Scenario('async-expense-list', 'GET'),
+        Scenario('income-export', 'GET', query({'file_format': 'csv'})),
+        Scenario('expense-export', 'GET', query({'file_format': 'ndjson'})),
+        Scenario('summary-cache-stats', 'GET', admin=True),
+        Scenario('user-profile', 'GET'),
+    ]
+    # Con --cold cada resumen se recalcula: la versión de datos sube antes de cada petición
+    reads += [
+        Scenario(route, 'GET', query(params), before=bump_version if cold else None)
+        for route, params in SUMMARY_ROUTES
+    ]
+    writes = [
+        Scenario('category-list-create', 'POST', lambda ctx, i: ({}, {'name': f'bench {ctx.run_id} {i}'}, 'json')),
+        Scenario('category-detail', 'PATCH', lambda ctx, i: (
+            {'pk': ctx.pools['categories'][i]}, {'name': f'bench renombrada {ctx.run_id} {i}'}, 'json'
+        ), prepare=prepare_categories),
+        Scenario('income-list-create', 'POST', lambda ctx, i: ({}, {
+            'amount': '1500.00', 'date': '2024-05-01', 'description': f'bench {i}',
+            'category': ctx.pick(ctx.category_ids, i),
+        }, 'json')),
+        Scenario('income-detail', 'PATCH', lambda ctx, i: (
+            {'pk': ctx.pools['income-patch'][i]}, {'amount': '99.99'}, 'json'
+        ), prepare=prepare_pool('income', 'income-patch')),
+        Scenario('expense-list-create', 'POST', lambda ctx, i: ({}, {
+            'amount': '23.45', 'date': '2024-05-02', 'description': f'bench {i}',
+            'category_id': ctx.pick(ctx.category_ids, i),
+        }, 'json')),
+        Scenario('expense-detail', 'PUT', lambda ctx, i: ({'pk': ctx.pools['expense-put'][i]}, {
+            'amount': '42.00', 'date': '2024-06-01', 'description': f'bench put {i}',
+            'category_id': ctx.pick(ctx.category_ids, i),
+        }, 'json'), prepare=prepare_pool('expense', 'expense-put')),
+        Scenario('income-import', 'POST', lambda ctx, i: ({}, {'file': import_file(ctx, i)}, 'multipart')),
+        Scenario('expense-import', 'POST', lambda ctx, i: ({}, {'file': import_file(ctx, i)}, 'multipart')),
+        Scenario('transaction-batch', 'POST', lambda ctx, i: (
+            {}, {'operations': batch_operations(ctx, i)}, 'json'
+        ), prepare=prepare_batches),
+        Scenario('user-profile', 'PATCH', lambda ctx, i: ({}, {'first_name': f'Bench {i}'}, 'json')),
+        Scenario('token_refresh', 'POST', lambda ctx, i: ({}, {'refresh': ctx.pools['refresh'][i]}, 'json'),
+                 prepare=prepare_refresh_tokens, anonymous=True),
+        Scenario('token_obtain_pair', 'POST', lambda ctx, i: (
+            {}, {'username': ctx.user.username, 'password': ctx.password}, 'json'
+        ), slow=True, anonymous=True),
+        Scenario('user-register', 'POST', lambda ctx, i: ({}, {
+            'email': f'bench-register-{ctx.run_id}-{i}@example.com', 'first_name': 'Bench',
+            'password': STRONG_PASSWORDS[0], 'password2': STRONG_PASSWORDS[0],
+        }, 'json'), slow=True, anonymous=True),
+    ]
+    deletes = [
+        Scenario('income-detail', 'DELETE', lambda ctx, i: ({'pk': ctx.pools['income-delete'][i]}, None, None),
+                 prepare=prepare_pool('income', 'income-delete')),
+        Scenario('expense-detail', 'DELETE', lambda ctx, i: ({'pk': ctx.pools['expense-delete'][i]}, None, None),
+                 prepare=prepare_pool('expense', 'expense-delete')),
+        Scenario('category-detail', 'DELETE', lambda ctx, i: ({'pk': ctx.pools['categories'][i]}, None, None),
+                 prepare=prepare_categories),
+        # La última: cambia la contraseña que usa token_obtain_pair
+        Scenario('change-password', 'PUT', change_password, slow=True),
+    ]
+    return reads + writes + deletes
+
+
+def api_routes():
+    """Nombres de todas las rutas bajo /api/ (para avisar de las que no tienen escenario)."""
+    from django.urls import URLPattern, URLResolver, get_resolver
+
+    names = set()
+
+    def walk(patterns, prefix):
+        for pattern in patterns:
+            route = prefix + str(pattern.pattern)
+            if isinstance(pattern, URLResolver):
+                walk(pattern.url_patterns, route)
+            elif isinstance(pattern, URLPattern) and route.startswith('api/') and pattern.name:
+                names.add(pattern.name)
+
+    walk(get_resolver().url_patterns, '')
+    return names
+
+
+def client_for(user):
+    from rest_framework.test import APIClient
+
+    from accounts.serializers import ClaimsTokenObtainPairSerializer
+
+    client = APIClient()
+    if user is not None:
+        token = ClaimsTokenObtainPairSerializer.get_token(user).access_token
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+    return client
+
+
+def percentile(ordered, fraction):
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+
+def run(scenario, ctx, clients, repeat):
+    from django.db import connection
+    from django.urls import reverse
+
+    repeat = min(repeat, SLOW_REPEAT) if scenario.slow else repeat
+    if scenario.prepare:
+        scenario.prepare(ctx, repeat)
+    client = clients['anonymous' if scenario.anonymous else 'admin' if scenario.admin else 'user']
+    call = getattr(client, scenario.method.lower())
+
+    timings = []
+    statuses = {}
+    queries = 0
+
+    def count_queries(execute, sql, params, many, context):
+        nonlocal queries
+        queries += 1
+        return execute(sql, params, many, context)
+
+    for i in range(repeat):
+        if scenario.before:
+            scenario.before(ctx, i)
+        kwargs, data, data_format = scenario.build(ctx, i)
+        path = reverse(scenario.route, kwargs=kwargs)
+        with connection.execute_wrapper(count_queries):
+            started = time.perf_counter()
+            response = call(path, data, format=data_format) if data_format else call(path, data)
+            if response.streaming:
+                b''.join(response.streaming_content)
+            timings.append((time.perf_counter() - started) * 1000)
+        statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+    timings.sort()
+    return {
+        'requests': repeat,
+        'statuses': {str(code): count for code, count in sorted(statuses.items())},
+        'p50_ms': round(statistics.median(timings), 3),
+        'p95_ms': round(percentile(timings, 0.95), 3),
+        'p99_ms': round(percentile(timings, 0.99), 3),
+        'requests_per_second': round(repeat / (sum(timings) / 1000), 1),
+        'queries_per_request': round(queries / repeat, 2),
+    }
+
+
+def compare(report, baseline, max_regression):
+    """Filas de la comparación y si hay regresiones."""
+    rows = []
+    regressed = False
+    for label, result in report['routes'].items():
+        previous = baseline['routes'].get(label)
+        if previous is None:
+            rows.append((label, None, None, 'nueva'))
+            continue
+        change = (result['p95_ms'] - previous['p95_ms']) / previous['p95_ms'] if previous['p95_ms'] else 0
+        query_change = result['queries_per_request'] - previous['queries_per_request']
+        flags = []
+        if change > max_regression:
+            flags.append('p95')
+        if query_change > 0:
+            flags.append('consultas')
+        regressed = regressed or bool(flags)
+        rows.append((label, change, query_change, ' '.join(flags)))
+    return rows, regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=20, help='Usuarios que siembra seed_finance')
+    parser.add_argument('--transactions', type=int, default=2000, help='Movimientos por usuario que siembra seed_finance')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--database', help='Base SQLite a reutilizar (se siembra si no existe)')
+    parser.add_argument('--repeat', type=int, default=100, help='Peticiones por ruta y método')
+    parser.add_argument('--cold', action='store_true', help='Invalida la caché de resúmenes antes de cada petición')
+    parser.add_argument('--only', action='append', help='Solo las rutas con este nombre (se puede repetir)')
+    parser.add_argument('--output', help='Ruta del JSON con los resultados')
+    parser.add_argument('--baseline', help='JSON de una ejecución anterior con el que comparar')
+    parser.add_argument('--max-regression', type=float, default=0.2, help='Empeoramiento de p95 tolerado (0.2 = 20 %%)')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = args.database or os.path.join(tmp, 'bench.sqlite3')
+        seeded = os.path.exists(db_path)
+        setup_django(db_path)
+        from django.contrib.auth.models import User
+        from django.core.management import call_command
+
+        call_command('migrate', verbosity=0)
+        if not seeded:
+            started = time.perf_counter()
+            call_command(
+                'seed_finance', users=args.users, transactions=args.transactions, seed=args.seed,
+                prefix='bench', password=STRONG_PASSWORDS[0], verbosity=0,
+            )
+            print(f'Sembrada la base en {time.perf_counter() - started:.1f}s')
+
+        run_id = int(time.time())
+        user = User.objects.filter(username__startswith='bench', username__endswith='@example.com').order_by('id').first()
+        admin = User.objects.create_user(f'bench-admin-{run_id}@example.com', is_staff=True)
+        # Una base reutilizada puede haber quedado con la otra contraseña de change-password
+        user.set_password(STRONG_PASSWORDS[0])
+        user.save(update_fields=['password'])
+        ctx = Context(user, run_id, STRONG_PASSWORDS[0])
+        clients = {'user': client_for(user), 'admin': client_for(admin), 'anonymous': client_for(None)}
+
+        report = {
+            'date': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'users': User.objects.filter(username__startswith='bench').count(),
+            'repeat': args.repeat,
+            'cold': args.cold,
+            'routes': {},
+        }
+        planned = [scenario for scenario in scenarios(args.cold) if not args.only or scenario.route in args.only]
+        print(f'\n{"ruta":<42} {"p50 ms":>9} {"p95 ms":>9} {"p99 ms":>9} {"pet/s":>9} {"consultas":>9}')
+        seen_labels = {}
+        for scenario in planned:
+            label = scenario.label
+            seen_labels[label] = seen_labels.get(label, 0) + 1
+            if seen_labels[label] > 1:
+                label = f'{label} #{seen_labels[label]}'
+            report['routes'][label] = run(scenario, ctx, clients, args.repeat)
+            result = report['routes'][label]
+            print(f'{label:<42} {result["p50_ms"]:>9} {result["p95_ms"]:>9} {result["p99_ms"]:>9} '
+                  f'{result["requests_per_second"]:>9} {result["queries_per_request"]:>9} {result["statuses"]}')
+
+        missing = api_routes() - {scenario.route for scenario in scenarios(args.cold)}
+        if missing:
+            print(f'\nRutas sin escenario: {", ".join(sorted(missing))}')
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2))
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text())
+        rows, regressed = compare(report, baseline, args.max_regression)
+        print(f'\n{"ruta":<42} {"Δ p95":>8} {"Δ consultas":>12}')
+        for label, change, query_change, flags in rows:
+            if change is None:
+                print(f'{label:<42} {"-":>8} {"-":>12}  {flags}')
+            else:
+                print(f'{label:<42} {change:>+8.1%} {query_change:>+12.2f}  {flags}')
+        if regressed:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
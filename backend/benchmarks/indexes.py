@@ -0,0 +1,182 @@
+"""
+Benchmark de los índices compuestos por usuario (migración 0004_user_composite_indexes).
+
+Crea una base SQLite temporal con todas las migraciones, quita los índices que
+añade 0004, siembra N filas y mide plan de consulta y latencia de las consultas
+calientes de transactions/views.py, utils.py y filters.py. Después vuelve a crear
+los índices y repite las medidas. Los planes "después" de los filtros deben usar
+SEARCH ... USING INDEX, no SCAN.
+
+Uso (desde backend/):
+    python benchmarks/indexes.py --rows 1000000 --users 200
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+
+
+def setup_django(db_path):
+    from django.conf import settings
+    settings.DATABASES['default']['NAME'] = db_path
+    import django
+    django.setup()
+
+
+def seed(rows, users, seed_value=42):
+    from django.contrib.auth.models import User
+    from transactions.models import Category, Expense, Income
+
+    rnd = random.Random(seed_value)
+    user_objs = User.objects.bulk_create(
+        [User(username=f'bench{i}@example.com') for i in range(users)], batch_size=1000
+    )
+    categories = Category.objects.bulk_create(
+        [Category(user=None, name=f'Global {i}') for i in range(10)]
+        + [Category(user=u, name=f'Propia {i}') for u in user_objs for i in range(5)],
+        batch_size=1000,
+    )
+    start = date(2015, 1, 1)
+    half = rows // 2
+    batch = 5000
+
+    def make(model, count, **extra):
+        buffer = []
+        for _ in range(count):
+            buffer.append(model(
+                user=rnd.choice(user_objs),
+                category=rnd.choice(categories),
+                amount=Decimal(rnd.randint(100, 500000)) / 100,
+                date=start + timedelta(days=rnd.randint(0, 3650)),
+                **extra,
+            ))
+            if len(buffer) >= batch:
+                model.objects.bulk_create(buffer)
+                buffer = []
+        if buffer:
+            model.objects.bulk_create(buffer)
+
+    make(Income, half, source='Benchmark')
+    make(Expense, rows - half, description='Benchmark')
+    return user_objs
+
+
+def composite_indexes():
+    """(modelo, índice) de cada AddIndex de la migración 0004."""
+    from importlib import import_module
+    from django.apps import apps
+
+    migration = import_module('transactions.migrations.0004_user_composite_indexes').Migration
+    return [(apps.get_model('transactions', op.model_name), op.index) for op in migration.operations]
+
+
+def set_composite_indexes(enabled):
+    from django.db import connection
+
+    with connection.schema_editor() as editor:
+        for model, index in composite_indexes():
+            if enabled:
+                editor.add_index(model, index)
+            else:
+                editor.remove_index(model, index)
+
+
+def workloads(user):
+    from django.db.models import Q, Sum, Value
+    from django.db.models.functions import Lower
+    from transactions.filters import ExpenseFilter, IncomeFilter
+    from transactions.models import Category, Expense, Income
+
+    return {
+        'income_list_page': lambda: Income.objects.filter(user=user)[:50],
+        'expense_list_page': lambda: Expense.objects.filter(user=user)[:50],
+        'income_total': lambda: Income.objects.filter(user=user).values('user').annotate(total=Sum('amount')),
+        'expense_by_category': lambda: (
+            Expense.objects.filter(user=user).values('category__name')
+            .annotate(total_amount=Sum('amount')).order_by('-total_amount')
+        ),
+        'category_name_lookup': lambda: (
+            Category.objects.annotate(name_lower=Lower('name'))
+            .filter(user=user, name_lower=Lower(Value('PROPIA 3')))[:1]
+        ),
+        'user_categories': lambda: Category.objects.filter(Q(user=user) | Q(user__isnull=True)),
+        'expense_month_filter': lambda: ExpenseFilter(
+            {'year': 2020, 'month': 3}, queryset=Expense.objects.filter(user=user)
+        ).qs[:50],
+        'income_range_filter': lambda: IncomeFilter(
+            {'date_from': '2019-01-01', 'date_to': '2019-06-30', 'amount_min': '100'},
+            queryset=Income.objects.filter(user=user),
+        ).qs[:50],
+    }
+
+
+def measure(user, repeat):
+    report = {}
+    for name, build in workloads(user).items():
+        plan = build().explain()
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            list(build())
+            timings.append((time.perf_counter() - started) * 1000)
+        report[name] = {
+            'plan': plan,
+            'median_ms': round(statistics.median(timings), 3),
+            'max_ms': round(max(timings), 3),
+        }
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--output', help='Ruta del JSON con los resultados')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        setup_django(os.path.join(tmp, 'bench.sqlite3'))
+        from django.core.management import call_command
+        from django.db import connection
+
+        call_command('migrate', verbosity=0)
+        set_composite_indexes(False)
+        started = time.perf_counter()
+        users = seed(args.rows, args.users)
+        print(f'Sembradas {args.rows} filas en {time.perf_counter() - started:.1f}s')
+        user = users[0]
+
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        before = measure(user, args.repeat)
+
+        set_composite_indexes(True)
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        after = measure(user, args.repeat)
+
+    print(f'\n{"consulta":<22} {"antes (ms)":>12} {"después (ms)":>14}')
+    for name in before:
+        print(f'{name:<22} {before[name]["median_ms"]:>12} {after[name]["median_ms"]:>14}')
+    for name in before:
+        print(f'\n== {name}\n-- antes:\n{before[name]["plan"]}\n-- después:\n{after[name]["plan"]}')
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(
+            {'rows': args.rows, 'users': args.users, 'before': before, 'after': after}, indent=2
+        ))
+
+
+if __name__ == '__main__':
+    main()
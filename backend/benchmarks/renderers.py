@@ -0,0 +1,155 @@
+"""
+Benchmark de renderers y parsers (config/renderers.py) frente a los de DRF.
+
+Genera cargas con la forma de las respuestas de la API, sin base de datos:
+  * listas de movimientos como las de IncomeSerializer (--sizes filas),
+  * el resumen del dashboard con --categories categorías (totales Decimal),
+  * una serie temporal diaria de --days días (Decimal por bucket).
+Para cada carga mide codificación y decodificación (operaciones/s y MB/s) con
+JSONRenderer/JSONParser de DRF, ORJSONRenderer/ORJSONParser y MessagePack. Antes
+comprueba que ORJSON produce los mismos bytes que DRF y que MessagePack devuelve
+exactamente los mismos Decimal y fechas.
+
+Uso (desde backend/):
+    python benchmarks/renderers.py --sizes 1000 10000 100000
+"""
+import argparse
+import io
+import json
+import os
+import random
+import sys
+import time
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+
+
+def transaction_list(rows, rnd):
+    start = date(2020, 1, 1)
+    created = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    return {
+        'next': 'http://testserver/api/transactions/incomes/?cursor=eyJ2IjogWyIyMDI0LTAxLTA0Il19',
+        'previous': None,
+        'results': [
+            {
+                'id': index,
+                'user': 'bench@example.com',
+                'amount': str(Decimal(rnd.randint(100, 500000)) / 100),
+                'date': (start + timedelta(days=rnd.randint(0, 1500))).isoformat(),
+                'category': rnd.randint(1, 20),
+                'category_name': rnd.choice(['Sueldo', 'Freelance', 'Inversiones', 'Educación']),
+                'source': 'Benchmark',
+                'recurrence': 'none',
+                'description': f'Movimiento {index}',
+                'created_at': (created + timedelta(seconds=index, microseconds=rnd.randint(0, 999999))).isoformat().replace('+00:00', 'Z'),
+                'updated_at': (created + timedelta(seconds=index)).isoformat().replace('+00:00', 'Z'),
+            }
+            for index in range(rows)
+        ],
+    }
+
+
+def dashboard_summary(categories, rnd):
+    def totals():
+        return [
+            {'category_name': f'Categoría {index}', 'total_amount': Decimal(rnd.randint(100, 99999999)) / 100}
+            for index in range(categories)
+        ]
+    incomes, expenses = totals(), totals()
+    income = sum(item['total_amount'] for item in incomes)
+    expense = sum(item['total_amount'] for item in expenses)
+    return {
+        'incomes': income, 'expenses': expense, 'balance': income - expense,
+        'incomes_by_category': incomes, 'expenses_by_category': expenses,
+    }
+
+
+def timeseries(days, rnd):
+    start = date(2020, 1, 1)
+    results = []
+    for index in range(days):
+        income, expense = Decimal(rnd.randint(0, 500000)) / 100, Decimal(rnd.randint(0, 300000)) / 100
+        results.append({'period': start + timedelta(days=index), 'income': income, 'expense': expense, 'net': income - expense})
+    return {'granularity': 'day', 'date_from': start, 'date_to': start + timedelta(days=days - 1), 'results': results}
+
+
+def best(run, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        run()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def measure(payload, repeat):
+    from rest_framework.parsers import JSONParser
+    from rest_framework.renderers import JSONRenderer
+    from config.renderers import DecimalStringJSONEncoder, MessagePackParser, MessagePackRenderer, ORJSONParser, ORJSONRenderer
+
+    # Con el encoder de ORJSONRenderer: los Decimal salen como texto en los dos
+    drf_renderer = JSONRenderer()
+    drf_renderer.encoder_class = DecimalStringJSONEncoder
+    stacks = {
+        'drf-json': (drf_renderer, JSONParser()),
+        'orjson': (ORJSONRenderer(), ORJSONParser()),
+        'msgpack': (MessagePackRenderer(), MessagePackParser()),
+    }
+    encoded = {name: renderer.render(payload) for name, (renderer, _) in stacks.items()}
+    if encoded['orjson'] != encoded['drf-json']:
+        raise SystemExit('ORJSONRenderer no produce los mismos bytes que JSONRenderer')
+    if stacks['msgpack'][1].parse(io.BytesIO(encoded['msgpack'])) != payload:
+        raise SystemExit('MessagePack no devuelve los mismos valores')
+
+    report = {}
+    for name, (renderer, parser) in stacks.items():
+        body = encoded[name]
+        encode = best(lambda: renderer.render(payload), repeat)
+        decode = best(lambda: parser.parse(io.BytesIO(body), parser.media_type, {}), repeat)
+        report[name] = {
+            'bytes': len(body),
+            'encode_ops_s': round(1 / encode, 1),
+            'encode_mb_s': round(len(body) / encode / 1e6, 1),
+            'decode_ops_s': round(1 / decode, 1),
+            'decode_mb_s': round(len(body) / decode / 1e6, 1),
+        }
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--categories', type=int, default=50)
+    parser.add_argument('--days', type=int, default=3650)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help='Ruta del JSON con los resultados')
+    args = parser.parse_args()
+
+    import django
+    django.setup()
+
+    rnd = random.Random(args.seed)
+    payloads = {f'list-{size}': transaction_list(size, rnd) for size in args.sizes}
+    payloads['dashboard'] = dashboard_summary(args.categories, rnd)
+    payloads['timeseries'] = timeseries(args.days, rnd)
+
+    report = {}
+    for name, payload in payloads.items():
+        report[name] = measure(payload, args.repeat)
+
+    print(f'{"carga":<14} {"formato":<9} {"bytes":>10} {"enc ops/s":>10} {"enc MB/s":>9} {"dec ops/s":>10} {"dec MB/s":>9}')
+    for name, stacks in report.items():
+        for stack, result in stacks.items():
+            print(f'{name:<14} {stack:<9} {result["bytes"]:>10} {result["encode_ops_s"]:>10} {result["encode_mb_s"]:>9} '
+                  f'{result["decode_ops_s"]:>10} {result["decode_mb_s"]:>9}')
+    if args.output:
+        Path(args.output).write_text(json.dumps({'results': report}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,155 @@
+"""
+Benchmark de la serialización de listados (transactions/fastlist.py frente a los serializers).
+
+Crea una base SQLite temporal, siembra --rows ingresos y gastos de un usuario y, para cada
+tamaño de --sizes, mide filas por segundo de:
+  * serialize: solo la conversión a diccionarios (IncomeSerializer/ExpenseSerializer con
+    many=True sobre instancias ya cargadas, frente a RowPlan.serialize sobre filas de .values()),
+  * total: lectura de la base + conversión + JSONRenderer, como en un GET de listado.
+Antes de medir comprueba que el JSON de los dos caminos es idéntico byte a byte.
+
+Uso (desde backend/):
+    python benchmarks/serialization.py --sizes 1000 10000 100000
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+
+
+def setup_django(db_path):
+    from django.conf import settings
+    settings.DATABASES['default']['NAME'] = db_path
+    import django
+    django.setup()
+
+
+def seed(rows, seed_value=42):
+    from django.contrib.auth.models import User
+    from transactions.models import Category, Expense, Income
+
+    rnd = random.Random(seed_value)
+    user = User.objects.create(username='bench@example.com')
+    categories = Category.objects.bulk_create(
+        [Category(user=None, name=f'Global {i}') for i in range(10)]
+        + [Category(user=user, name=f'Propia {i}') for i in range(5)]
+    )
+    start = date(2015, 1, 1)
+    for model, extra in ((Income, {'source': 'Benchmark'}), (Expense, {'payment_method': 'tarjeta'})):
+        model.objects.bulk_create([
+            model(
+                user=user,
+                # Un 5 % sin categoría: category_name sale null
+                category=rnd.choice(categories) if rnd.random() > 0.05 else None,
+                amount=Decimal(rnd.randint(100, 500000)) / 100,
+                date=start + timedelta(days=rnd.randint(0, 3650)),
+                description=f'Movimiento {index}',
+                **extra,
+            )
+            for index in range(rows)
+        ], batch_size=5000)
+    return user
+
+
+def make_request(user):
+    from rest_framework.request import Request
+    from rest_framework.test import APIRequestFactory
+
+    request = Request(APIRequestFactory().get('/'))
+    request.user = user
+    return request
+
+
+def best_rate(rows, run, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        run()
+        timings.append(time.perf_counter() - started)
+    return {
+        'rows_per_s': round(rows / min(timings)),
+        'median_ms': round(statistics.median(timings) * 1000, 2),
+    }
+
+
+def measure(user, serializer_class, model, size, repeat):
+    from rest_framework.renderers import JSONRenderer
+    from transactions.fastlist import RowPlan
+
+    request = make_request(user)
+    context = {'request': request}
+    queryset = model.objects.filter(user=user).select_related('category').order_by('-date', '-created_at', '-id')
+    plan = RowPlan.for_serializer(serializer_class(context=context))
+    renderer = JSONRenderer()
+
+    def drf_fetch():
+        return list(queryset[:size])
+
+    def fast_fetch():
+        return list(plan.values(queryset)[:size])
+
+    instances, rows = drf_fetch(), fast_fetch()
+    expected = renderer.render(serializer_class(instances, many=True, context=context).data)
+    if renderer.render(plan.serialize(rows)) != expected:
+        raise SystemExit(f'{model.__name__} ({size} filas): el JSON de fastlist no coincide con el del serializer')
+
+    return {
+        'serialize': {
+            'drf': best_rate(size, lambda: serializer_class(instances, many=True, context=context).data, repeat),
+            'fast': best_rate(size, lambda: plan.serialize(rows), repeat),
+        },
+        'total': {
+            'drf': best_rate(size, lambda: renderer.render(
+                serializer_class(drf_fetch(), many=True, context=context).data), repeat),
+            'fast': best_rate(size, lambda: renderer.render(plan.serialize(fast_fetch())), repeat),
+        },
+        'bytes': len(expected),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--output', help='Ruta del JSON con los resultados')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        setup_django(os.path.join(tmp, 'bench.sqlite3'))
+        from django.core.management import call_command
+        from transactions.models import Expense, Income
+        from transactions.serializers import ExpenseSerializer, IncomeSerializer
+
+        call_command('migrate', verbosity=0)
+        started = time.perf_counter()
+        user = seed(max(args.sizes))
+        print(f'Sembradas {max(args.sizes)} filas por modelo en {time.perf_counter() - started:.1f}s')
+
+        report = {}
+        for serializer_class, model in ((IncomeSerializer, Income), (ExpenseSerializer, Expense)):
+            for size in args.sizes:
+                # Con 100k filas una repetición ya tarda segundos
+                repeat = max(1, min(args.repeat, args.repeat * 10000 // size))
+                report[f'{model.__name__.lower()}-{size}'] = measure(user, serializer_class, model, size, repeat)
+
+    print(f'\n{"lista":<16} {"fase":<10} {"drf filas/s":>12} {"fast filas/s":>13} {"x":>6}')
+    for name, result in report.items():
+        for phase in ('serialize', 'total'):
+            drf, fast = result[phase]['drf']['rows_per_s'], result[phase]['fast']['rows_per_s']
+            print(f'{name:<16} {phase:<10} {drf:>12} {fast:>13} {fast / drf:>6.1f}')
+    if args.output:
+        Path(args.output).write_text(json.dumps({'sizes': args.sizes, 'results': report}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,160 @@
+"""
+Benchmark de escrituras concurrentes en SQLite (perfil SQLITE_PRODUCTION y WRITE_COALESCING).
+
+Lanza --processes procesos (como workers de gunicorn) con --threads hilos cada uno; cada
+hilo crea --inserts ingresos con el mismo camino que la API (save() con rollups y versión
+de datos). Se repite con una base nueva para cada perfil:
+  * default: configuración por defecto de Django (journal DELETE, BEGIN diferido),
+  * production: SQLITE_PRODUCTION=1 (WAL, busy_timeout, synchronous=NORMAL, BEGIN IMMEDIATE),
+  * coalescing: production + WRITE_COALESCING=1.
+Mide altas por segundo, latencia p50/p99 por alta y errores "database is locked".
+
+Uso (desde backend/):
+    python benchmarks/sqlite_writes.py --processes 4 --threads 4 --inserts 200
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+PROFILES = {
+    'default': {},
+    'production': {'SQLITE_PRODUCTION': '1'},
+    'coalescing': {'SQLITE_PRODUCTION': '1', 'WRITE_COALESCING': '1'},
+}
+
+
+def setup_django(db_path, env):
+    sys.path.insert(0, str(BACKEND_DIR))
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+    os.environ.update(env)
+    from django.conf import settings
+    settings.DATABASES['default']['NAME'] = db_path
+    import django
+    django.setup()
+
+
+def prepare(db_path, env, users):
+    setup_django(db_path, env)
+    from django.contrib.auth.models import User
+    from django.core.management import call_command
+
+    call_command('migrate', verbosity=0)
+    User.objects.bulk_create([User(username=f'writer{i}@example.com') for i in range(users)])
+
+
+def worker(db_path, env, process_index, threads, inserts, start_event, results):
+    setup_django(db_path, env)
+    from django.contrib.auth.models import User
+    from django.db import OperationalError, connection
+    from transactions.coalescing import save_coalesced
+    from transactions.models import Income
+
+    users = list(User.objects.order_by('id'))
+    connection.close()
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+
+    def run(thread_index):
+        user = users[(process_index * threads + thread_index) % len(users)]
+        local_latencies, local_errors = [], 0
+        for i in range(inserts):
+            income = Income(
+                user=user,
+                amount=Decimal(100 + i) / 100,
+                date=date(2024, 1, 1) + timedelta(days=i % 365),
+                source='Benchmark',
+            )
+            started = time.perf_counter()
+            try:
+                save_coalesced(income)
+            except OperationalError:
+                local_errors += 1
+                continue
+            local_latencies.append((time.perf_counter() - started) * 1000)
+        with lock:
+            latencies.extend(local_latencies)
+            errors.append(local_errors)
+
+    start_event.wait()
+    pool = [threading.Thread(target=run, args=(index,)) for index in range(threads)]
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    results.put((latencies, sum(errors)))
+
+
+def run_profile(name, args):
+    env = PROFILES[name]
+    ctx = multiprocessing.get_context('spawn')
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'bench.sqlite3')
+        setup = ctx.Process(target=prepare, args=(db_path, env, args.processes * args.threads))
+        setup.start()
+        setup.join()
+
+        start_event = ctx.Event()
+        results = ctx.Queue()
+        processes = [
+            ctx.Process(target=worker, args=(db_path, env, index, args.threads, args.inserts, start_event, results))
+            for index in range(args.processes)
+        ]
+        for process in processes:
+            process.start()
+        # Los procesos cargan Django antes de empezar a medir
+        time.sleep(args.warmup)
+        started = time.perf_counter()
+        start_event.set()
+        collected = [results.get() for _ in processes]
+        elapsed = time.perf_counter() - started
+        for process in processes:
+            process.join()
+
+    latencies = sorted(latency for batch, _ in collected for latency in batch)
+    errors = sum(count for _, count in collected)
+    return {
+        'inserts': len(latencies),
+        'errors': errors,
+        'seconds': round(elapsed, 3),
+        'inserts_per_second': round(len(latencies) / elapsed, 1),
+        'p50_ms': round(statistics.median(latencies), 3) if latencies else None,
+        'p99_ms': round(latencies[int(len(latencies) * 0.99) - 1], 3) if latencies else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--processes', type=int, default=4)
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--inserts', type=int, default=200, help='Altas por hilo')
+    parser.add_argument('--warmup', type=float, default=3.0, help='Segundos para que arranquen los procesos')
+    parser.add_argument('--profiles', default=','.join(PROFILES))
+    parser.add_argument('--output', help='Ruta del JSON con los resultados')
+    args = parser.parse_args()
+
+    report = {name: run_profile(name, args) for name in args.profiles.split(',')}
+
+    print(f'\n{"perfil":<12} {"altas/s":>10} {"p50 (ms)":>10} {"p99 (ms)":>10} {"errores":>9}')
+    for name, result in report.items():
+        print(f'{name:<12} {result["inserts_per_second"]:>10} {result["p50_ms"]:>10} {result["p99_ms"]:>10} {result["errors"]:>9}')
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(
+            {'processes': args.processes, 'threads': args.threads, 'inserts': args.inserts, 'profiles': report}, indent=2
+        ))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,158 @@
+"""
+Benchmark del refresco de tokens JWT con la lista negra llena.
+
+Crea una base SQLite temporal con --tokens filas en OutstandingToken: una parte caducadas
+(--expired) y otra en lista negra (--blacklisted). Después refresca --repeat veces tokens
+válidos con:
+  * simplejwt: TokenRefreshSerializer, una consulta a la lista negra por refresco,
+  * indexed: IndexedTokenRefreshSerializer, con el filtro de Bloom de accounts/blacklist.py.
+Comprueba que los dos rechazan un token en lista negra y mide la carga del filtro y
+`manage.py prune_tokens` sobre los caducados.
+
+Uso (desde backend/):
+    python benchmarks/token_refresh.py --tokens 1000000
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+from datetime import timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+
+
+def setup_django(db_path):
+    from django.conf import settings
+    settings.DATABASES['default']['NAME'] = db_path
+    import django
+    django.setup()
+
+
+def seed(tokens, expired, blacklisted, batch=20_000):
+    from django.contrib.auth.models import User
+    from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+    from rest_framework_simplejwt.utils import aware_utcnow
+
+    user = User.objects.create_user('bench-refresh@example.com')
+    now = aware_utcnow()
+    expired_count = int(tokens * expired)
+    every = int(1 / blacklisted) if blacklisted else 0
+    created = 0
+    while created < tokens:
+        rows = []
+        for index in range(created, min(created + batch, tokens)):
+            expires_at = now - timedelta(days=1) if index < expired_count else now + timedelta(days=1)
+            rows.append(OutstandingToken(user=user, jti=uuid.uuid4().hex, token='-', created_at=now, expires_at=expires_at))
+        rows = OutstandingToken.objects.bulk_create(rows)
+        if every:
+            BlacklistedToken.objects.bulk_create(
+                [BlacklistedToken(token=row) for position, row in enumerate(rows, start=created) if position % every == 0]
+            )
+        created += len(rows)
+    return user
+
+
+def measure(serializer_class, tokens, repeat):
+    from django.db import connection
+
+    timings = []
+    queries = 0
+
+    def count_queries(execute, sql, params, many, context):
+        nonlocal queries
+        queries += 1
+        return execute(sql, params, many, context)
+
+    with connection.execute_wrapper(count_queries):
+        for index in range(repeat):
+            started = time.perf_counter()
+            serializer = serializer_class(data={'refresh': tokens[index % len(tokens)]})
+            serializer.is_valid(raise_exception=True)
+            timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+    return {
+        'refreshes_per_second': round(repeat / (sum(timings) / 1000), 1),
+        'p50_ms': round(statistics.median(timings), 3),
+        'p99_ms': round(timings[int(len(timings) * 0.99) - 1], 3),
+        'queries_per_refresh': round(queries / repeat, 3),
+    }
+
+
+def rejects(serializer_class, token):
+    from rest_framework_simplejwt.exceptions import TokenError
+
+    # El serializer deja pasar el TokenError; TokenRefreshView lo convierte en 401
+    try:
+        serializer_class(data={'refresh': token}).is_valid(raise_exception=True)
+    except TokenError:
+        return True
+    return False
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--tokens', type=int, default=1_000_000)
+    parser.add_argument('--expired', type=float, default=0.5, help='Fracción de tokens caducados')
+    parser.add_argument('--blacklisted', type=float, default=0.1, help='Fracción de tokens en lista negra')
+    parser.add_argument('--repeat', type=int, default=5000)
+    parser.add_argument('--output', help='Ruta del JSON con los resultados')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        setup_django(os.path.join(tmp, 'bench.sqlite3'))
+        from django.core.management import call_command
+        from rest_framework_simplejwt.serializers import TokenRefreshSerializer
+        from rest_framework_simplejwt.tokens import RefreshToken
+
+        from accounts.blacklist import revoked_tokens
+        from accounts.serializers import IndexedTokenRefreshSerializer
+
+        call_command('migrate', verbosity=0)
+        started = time.perf_counter()
+        user = seed(args.tokens, args.expired, args.blacklisted)
+        print(f'Sembrados {args.tokens} tokens en {time.perf_counter() - started:.1f}s')
+
+        valid = [str(RefreshToken.for_user(user)) for _ in range(200)]
+        revoked = RefreshToken.for_user(user)
+        revoked.blacklist()
+
+        started = time.perf_counter()
+        revoked_tokens.reset()
+        revoked_tokens.might_be_revoked('warmup')
+        bloom_load_s = time.perf_counter() - started
+
+        report = {
+            'bloom_load_s': round(bloom_load_s, 2),
+            'bloom_bytes': len(revoked_tokens._bloom.bits),
+            'simplejwt': measure(TokenRefreshSerializer, valid, args.repeat),
+            'indexed': measure(IndexedTokenRefreshSerializer, valid, args.repeat),
+            'rejects_blacklisted': {
+                'simplejwt': rejects(TokenRefreshSerializer, str(revoked)),
+                'indexed': rejects(IndexedTokenRefreshSerializer, str(revoked)),
+            },
+        }
+
+        started = time.perf_counter()
+        call_command('prune_tokens', chunk_size=5000)
+        report['prune_s'] = round(time.perf_counter() - started, 2)
+
+    print(f'\n{"modo":<10} {"refrescos/s":>12} {"p50 (ms)":>10} {"p99 (ms)":>10} {"consultas":>10}')
+    for mode in ('simplejwt', 'indexed'):
+        result = report[mode]
+        print(f'{mode:<10} {result["refreshes_per_second"]:>12} {result["p50_ms"]:>10} {result["p99_ms"]:>10} {result["queries_per_refresh"]:>10}')
+    print(f'\nCarga del filtro: {report["bloom_load_s"]}s, {report["bloom_bytes"]} bytes')
+    print(f'Rechazan un token en lista negra: {report["rejects_blacklisted"]}')
+    print(f'prune_tokens: {report["prune_s"]}s')
+
+    if args.output:
+        Path(args.output).write_text(json.dumps({'tokens': args.tokens, **report}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
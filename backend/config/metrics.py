@@ -0,0 +1,328 @@
+"""
+Métricas en proceso (contadores e histogramas de buckets fijos) en formato Prometheus.
+
+    requests = Counter('http_requests_total', "Peticiones atendidas.", ['view', 'method', 'status'])
+    requests.inc(view='income-list-create', method='GET', status='200')
+
+    GET /metrics/  ->  http_requests_total{view="income-list-create",method="GET",status="200"} 1.0
+
+Cada proceso acumula sus valores en su propio almacén y solo ese proceso escribe en él,
+así que registrar una observación es sumar bajo un lock local, sin compartir nada:
+  * sin METRICS_DIR: un diccionario en memoria (un solo proceso, runserver, tests),
+  * con METRICS_DIR: un fichero mmap por proceso (<pid>.metrics) en ese directorio. Al
+    leer /metrics se suman los ficheros de todos los workers de gunicorn. Los de workers
+    ya muertos se siguen sumando (los contadores no bajan al reciclar workers), así que
+    el directorio debe vaciarse al arrancar el servicio, no al reiniciar un worker.
+
+Formato del fichero: 8 bytes con los bytes usados y después entradas
+[longitud de la clave (uint32), clave JSON, relleno hasta múltiplo de 8, valor (float64)].
+Las entradas se escriben enteras antes de actualizar los bytes usados, así que un lector
+sin lock ve siempre un prefijo válido.
+
+MetricsMiddleware registra latencia, estado y filas devueltas de cada vista;
+transactions/cache.py y las conexiones a la base añaden sus contadores. El middleware es
+síncrono y asíncrono: bajo ASGI no obliga a Django a adaptar la cadena con sync_to_async.
+
+Acceso a /metrics/: con METRICS_TOKEN configurado se exige la cabecera
+'Authorization: Bearer <token>' desde cualquier IP. Sin token solo se admiten las IP de
+METRICS_ALLOWED_IPS; detrás de un proxy REMOTE_ADDR es la del proxy, así que en ese caso
+/metrics/ no debe publicarse a través de él (o debe configurarse el token).
+"""
+import bisect
+import hmac
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+from pathlib import Path
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.http import HttpResponse, HttpResponseForbidden
+
+INITIAL_FILE_SIZE = 64 * 1024
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+ROW_BUCKETS = (0, 1, 10, 50, 100, 500, 1000, 5000)
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+class MemoryStore:
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def inc(self, key, amount):
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def items(self):
+        with self._lock:
+            return list(self._values.items())
+
+
+class MmapStore:
+    """Valores de este proceso en <directorio>/<pid>.metrics."""
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        self._lock = threading.Lock()
+        self._pid = None
+
+    def _open(self):
+        # Tras un fork (gunicorn --preload) el hijo empieza su propio fichero
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._pid = os.getpid()
+        self._file = open(self.directory / f'{self._pid}.metrics', 'w+b')
+        self._file.truncate(INITIAL_FILE_SIZE)
+        self._map = mmap.mmap(self._file.fileno(), INITIAL_FILE_SIZE)
+        self._used = 8
+        struct.pack_into('Q', self._map, 0, self._used)
+        self._offsets = {}
+
+    def _add_entry(self, key):
+        encoded = json.dumps(key).encode('utf-8')
+        padded = 4 + len(encoded) + (-(4 + len(encoded)) % 8)
+        size = padded + 8
+        while self._used + size > len(self._map):
+            capacity = len(self._map) * 2
+            self._file.truncate(capacity)
+            self._map.close()
+            self._map = mmap.mmap(self._file.fileno(), capacity)
+        struct.pack_into(f'I{len(encoded)}s', self._map, self._used, len(encoded), encoded)
+        offset = self._used + padded
+        struct.pack_into('d', self._map, offset, 0.0)
+        self._used += size
+        struct.pack_into('Q', self._map, 0, self._used)
+        self._offsets[key] = offset
+        return offset
+
+    def inc(self, key, amount):
+        with self._lock:
+            if self._pid != os.getpid():
+                self._open()
+            offset = self._offsets.get(key)
+            if offset is None:
+                offset = self._add_entry(key)
+            value, = struct.unpack_from('d', self._map, offset)
+            struct.pack_into('d', self._map, offset, value + amount)
+
+    def items(self):
+        """Suma de los ficheros de todos los procesos del directorio."""
+        totals = {}
+        for path in self.directory.glob('*.metrics'):
+            for key, value in read_metrics_file(path):
+                totals[key] = totals.get(key, 0.0) + value
+        return list(totals.items())
+
+
+def read_metrics_file(path):
+    data = Path(path).read_bytes()
+    if len(data) < 8:
+        return
+    used, = struct.unpack_from('Q', data, 0)
+    position = 8
+    while position < min(used, len(data)):
+        length, = struct.unpack_from('I', data, position)
+        key = json.loads(data[position + 4:position + 4 + length])
+        position += 4 + length + (-(4 + length) % 8)
+        value, = struct.unpack_from('d', data, position)
+        position += 8
+        # JSON devuelve listas: la clave vuelve a ser (nombre, ((etiqueta, valor), ...))
+        yield (key[0], tuple(tuple(pair) for pair in key[1])), value
+
+
+class Registry:
+
+    def __init__(self):
+        self.metrics = {}
+        self._store = None
+
+    @property
+    def store(self):
+        if self._store is None:
+            directory = getattr(settings, 'METRICS_DIR', '')
+            self._store = MmapStore(directory) if directory else MemoryStore()
+        return self._store
+
+    def register(self, metric):
+        self.metrics[metric.name] = metric
+        return metric
+
+    def exposition(self):
+        """Texto para Prometheus con los valores de todos los procesos."""
+        samples = {}
+        for (name, labels), value in self.store.items():
+            samples.setdefault(name, []).append((labels, value))
+        lines = []
+        for metric in self.metrics.values():
+            lines.append(f'# HELP {metric.name} {metric.help}')
+            lines.append(f'# TYPE {metric.name} {metric.type}')
+            lines.extend(metric.render(samples))
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    escaped = (
+        (name, str(value).replace('\\', r'\\').replace('\n', r'\n').replace('"', r'\"'))
+        for name, value in labels
+    )
+    return '{' + ','.join(f'{name}="{value}"' for name, value in escaped) + '}'
+
+
+class Counter:
+    type = 'counter'
+
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        registry.register(self)
+
+    def inc(self, amount=1, **labels):
+        registry.store.inc((self.name, tuple((name, labels[name]) for name in self.labelnames)), amount)
+
+    def render(self, samples):
+        for labels, value in sorted(samples.get(self.name, ())):
+            yield f'{self.name}{_format_labels(labels)} {value}'
+
+
+class Histogram:
+    """Buckets fijos. Se guarda el recuento de cada bucket; al exponerlos se acumulan (le=...)."""
+    type = 'histogram'
+
+    def __init__(self, name, help, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self.bounds = [str(float(bound)) for bound in self.buckets] + ['+Inf']
+        registry.register(self)
+
+    def observe(self, value, **labels):
+        base = tuple((name, labels[name]) for name in self.labelnames)
+        store = registry.store
+        bound = self.bounds[bisect.bisect_left(self.buckets, value)]
+        store.inc((f'{self.name}_bucket', base + (('le', bound),)), 1)
+        store.inc((f'{self.name}_sum', base), value)
+        store.inc((f'{self.name}_count', base), 1)
+
+    def render(self, samples):
+        counts = {}
+        for labels, value in samples.get(f'{self.name}_bucket', ()):
+            *base, (_, bound) = labels
+            counts.setdefault(tuple(base), {})[bound] = value
+        sums = dict(samples.get(f'{self.name}_sum', ()))
+        totals = dict(samples.get(f'{self.name}_count', ()))
+        for base in sorted(counts):
+            cumulative = 0.0
+            for bound in self.bounds:
+                cumulative += counts[base].get(bound, 0.0)
+                yield f'{self.name}_bucket{_format_labels(base + (("le", bound),))} {cumulative}'
+            yield f'{self.name}_sum{_format_labels(base)} {sums.get(base, 0.0)}'
+            yield f'{self.name}_count{_format_labels(base)} {totals.get(base, 0.0)}'
+
+
+request_duration = Histogram(
+    'http_request_duration_seconds', "Duración de las peticiones por vista y método.", ['view', 'method'],
+)
+requests_total = Counter(
+    'http_requests_total', "Peticiones atendidas por vista, método y estado.", ['view', 'method', 'status'],
+)
+response_rows = Histogram(
+    'http_response_rows', "Filas devueltas por las vistas que devuelven listas.", ['view'], buckets=ROW_BUCKETS,
+)
+db_queries = Counter('db_queries_total', "Consultas SQL ejecutadas.", ['database'])
+db_query_seconds = Counter('db_query_seconds_total', "Tiempo total en consultas SQL.", ['database'])
+cache_events = Counter('cache_events_total', "Aciertos, fallos y expulsiones de las cachés de proceso.", ['cache', 'event'])
+
+
+def _record_query(execute, sql, params, many, context):
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        alias = context['connection'].alias
+        db_queries.inc(database=alias)
+        db_query_seconds.inc(time.perf_counter() - started, database=alias)
+
+
+def _instrument_connection(connection, **kwargs):
+    if _record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_record_query)
+
+
+def response_row_count(response):
+    """Filas de una respuesta DRF: la lista, o 'results' si está paginada. None si no es una lista."""
+    data = getattr(response, 'data', None)
+    if isinstance(data, dict):
+        data = data.get('results')
+    return len(data) if isinstance(data, list) else None
+
+
+class MetricsMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        from django.core.exceptions import MiddlewareNotUsed
+        from django.db import connections
+
+        if not getattr(settings, 'METRICS_ENABLED', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        # Como MiddlewareMixin: el modo lo decide el resto de la cadena
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+        connection_created.connect(_instrument_connection, dispatch_uid='metrics')
+        for connection in connections.all(initialized_only=True):
+            _instrument_connection(connection)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        started = time.perf_counter()
+        response = self.get_response(request)
+        return self.record(request, response, time.perf_counter() - started)
+
+    async def __acall__(self, request):
+        started = time.perf_counter()
+        response = await self.get_response(request)
+        return self.record(request, response, time.perf_counter() - started)
+
+    def record(self, request, response, elapsed):
+        match = getattr(request, 'resolver_match', None)
+        view = match.view_name if match and match.view_name else 'unmatched'
+        if view == 'metrics':
+            return response
+        request_duration.observe(elapsed, view=view, method=request.method)
+        requests_total.inc(view=view, method=request.method, status=str(response.status_code))
+        rows = response_row_count(response)
+        if rows is not None:
+            response_rows.observe(rows, view=view)
+        return response
+
+
+def metrics_allowed(request):
+    token = getattr(settings, 'METRICS_TOKEN', '')
+    if token:
+        supplied = request.META.get('HTTP_AUTHORIZATION', '')
+        scheme, _, value = supplied.partition(' ')
+        return scheme.lower() == 'bearer' and hmac.compare_digest(value.strip().encode(), token.encode())
+    return request.META.get('REMOTE_ADDR') in getattr(settings, 'METRICS_ALLOWED_IPS', ('127.0.0.1', '::1'))
+
+
+def metrics_view(request):
+    """Exposición para Prometheus: con METRICS_TOKEN como Bearer o, sin token, desde METRICS_ALLOWED_IPS."""
+    if not metrics_allowed(request):
+        return HttpResponseForbidden()
+    return HttpResponse(registry.exposition(), content_type=CONTENT_TYPE)
@@ -0,0 +1,174 @@
+"""
+Presupuestos de consultas SQL por vista.
+
+    @query_budget(GET=3, POST=6)
+    class IncomeListCreateView(generics.ListCreateAPIView): ...
+
+    with assert_max_queries(3):
+        client.get('/api/transactions/incomes/')
+
+El decorador declara cuántas consultas puede hacer cada método HTTP de la vista,
+independientemente del tamaño del resultado. Según QUERY_BUDGET_MODE:
+  * 'off'   (producción): no se mide nada,
+  * 'warn'  (DEBUG): se registra un aviso con las consultas si se excede,
+  * 'raise' (tests): se lanza AssertionError y el test falla.
+
+En las vistas async el ORM corre con sync_to_async en otro hilo, con otra conexión, y
+CaptureQueriesContext (que mira la conexión del hilo actual) no lo vería. Para ellas las
+consultas se cuentan con un execute_wrapper en cada conexión y una lista en un ContextVar:
+sync_to_async copia el contexto al hilo síncrono, así que suman las de cualquier hilo.
+"""
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.backends.signals import connection_created
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLPattern, URLResolver, get_resolver
+
+logger = logging.getLogger(__name__)
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+def _report(label, limit, queries):
+    lines = [f"{label}: {len(queries)} consultas, presupuesto {limit}."]
+    lines += [f"  {number}. {query['sql']}" for number, query in enumerate(queries, start=1)]
+    return '\n'.join(lines)
+
+
+@contextmanager
+def assert_max_queries(limit, using=DEFAULT_DB_ALIAS, label='Bloque'):
+    """Falla con la lista de consultas si el bloque ejecuta más de `limit`."""
+    with CaptureQueriesContext(connections[using]) as context:
+        yield context
+    if len(context) > limit:
+        raise QueryBudgetExceeded(_report(label, limit, context.captured_queries))
+
+
+def get_mode():
+    return getattr(settings, 'QUERY_BUDGET_MODE', 'warn' if settings.DEBUG else 'off')
+
+
+# Consultas de la petición async en curso (None si no se está midiendo)
+_async_queries = ContextVar('query_budget_queries', default=None)
+
+
+def _capture_query(execute, sql, params, many, context):
+    queries = _async_queries.get()
+    if queries is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        queries.append({'sql': sql, 'params': params, 'time': '%.3f' % (time.perf_counter() - started)})
+
+
+def _instrument_connection(connection, **kwargs):
+    if _capture_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_capture_query)
+
+
+def _install_async_capture():
+    """Instrumenta las conexiones que se abran (en cualquier hilo) y las ya abiertas de este."""
+    connection_created.connect(_instrument_connection, dispatch_uid='query_budget')
+    for connection in connections.all(initialized_only=True):
+        _instrument_connection(connection)
+
+
+def _check(label, budget, queries, mode):
+    if len(queries) > budget:
+        report = _report(label, budget, queries)
+        if mode == 'raise':
+            raise QueryBudgetExceeded(report)
+        logger.warning(report)
+
+
+def query_budget(limit=None, **per_method):
+    """
+    Decorador de clase para vistas DRF/Django. `limit` aplica a todos los métodos;
+    GET=..., POST=... fijan el de cada uno. Las vistas sin presupuesto para un método no se miden.
+    """
+    budgets = {method.upper(): value for method, value in per_method.items()}
+
+    def decorator(view_class):
+        view_class.query_budgets = budgets
+        view_class.query_budget_default = limit
+        # Una subclase de una vista ya decorada solo cambia los presupuestos
+        if getattr(view_class.dispatch, 'budgeted', False):
+            return view_class
+        dispatch = view_class.dispatch
+
+        def budget_for(view, request):
+            mode = get_mode()
+            budget = type(view).query_budgets.get(request.method, type(view).query_budget_default)
+            label = f"{type(view).__name__} {request.method} {request.path}"
+            return (None, None, None) if mode == 'off' else (mode, budget, label)
+
+        if iscoroutinefunction(dispatch):
+            _install_async_capture()
+
+            @wraps(dispatch)
+            async def budgeted_dispatch(self, request, *args, **kwargs):
+                mode, budget, label = budget_for(self, request)
+                if budget is None:
+                    return await dispatch(self, request, *args, **kwargs)
+                queries = []
+                token = _async_queries.set(queries)
+                try:
+                    response = await dispatch(self, request, *args, **kwargs)
+                finally:
+                    _async_queries.reset(token)
+                _check(label, budget, queries, mode)
+                return response
+        else:
+            @wraps(dispatch)
+            def budgeted_dispatch(self, request, *args, **kwargs):
+                mode, budget, label = budget_for(self, request)
+                if budget is None:
+                    return dispatch(self, request, *args, **kwargs)
+                with CaptureQueriesContext(connections[DEFAULT_DB_ALIAS]) as context:
+                    response = dispatch(self, request, *args, **kwargs)
+                _check(label, budget, context.captured_queries, mode)
+                return response
+
+        budgeted_dispatch.budgeted = True
+        view_class.dispatch = budgeted_dispatch
+        return view_class
+    return decorator
+
+
+def iter_endpoints(urlconf=None, prefix=''):
+    """(ruta, clase de la vista, presupuestos por método, presupuesto general) de todas las vistas basadas en clase del urlconf."""
+    resolver = get_resolver(urlconf)
+    yield from _walk(resolver.url_patterns, prefix)
+
+
+def _walk(patterns, prefix):
+    for pattern in patterns:
+        route = prefix + str(pattern.pattern)
+        if isinstance(pattern, URLResolver):
+            yield from _walk(pattern.url_patterns, route)
+        elif isinstance(pattern, URLPattern):
+            view_class = getattr(pattern.callback, 'view_class', None) or getattr(pattern.callback, 'cls', None)
+            if view_class is None:
+                continue
+            yield route, view_class, dict(getattr(view_class, 'query_budgets', {})), getattr(view_class, 'query_budget_default', None)
+
+
+def endpoints_without_budget(urlconfs=('transactions.urls', 'accounts.urls')):
+    """Rutas de los urlconfs indicados que no declaran ningún presupuesto."""
+    missing = []
+    for urlconf in urlconfs:
+        for route, view_class, budgets, default in iter_endpoints(urlconf):
+            if not budgets and default is None:
+                missing.append(f"{urlconf}:{route} ({view_class.__name__})")
+    return missing
@@ -0,0 +1,163 @@
+"""
+Renderers y parsers rápidos para la API, elegidos por Accept / Content-Type.
+
+  * application/json: ORJSONRenderer / ORJSONParser. Mismos bytes que el JSONRenderer de
+    DRF (separadores compactos, UTF-8 sin escapar, fechas ISO con 'Z', \\u2028 escapado),
+    codificados con orjson. Los tipos que orjson no conoce pasan por DecimalStringJSONEncoder:
+    el JSONEncoder de DRF, salvo que un Decimal (los totales de los resúmenes) sale como
+    texto exacto si COERCE_DECIMAL_TO_STRING, como en los DecimalField, y no como float.
+    Las peticiones con '; indent=N' y lo que orjson no pueda codificar (enteros de más
+    de 64 bits) se delegan en el renderer de DRF.
+  * application/msgpack: MessagePackRenderer / MessagePackParser. Formato binario para
+    clientes que lo pidan. Decimal, date, datetime y time van como tipos extensión con su
+    texto exacto (escala y zona incluidas) y el parser los devuelve como los mismos objetos,
+    así que un importe sale y entra sin pasar por float.
+
+orjson y msgpack están en requirements.txt; si alguno no está instalado, settings solo
+registra los renderers disponibles (y application/json vuelve al de DRF).
+Comparativa de rendimiento en benchmarks/renderers.py.
+"""
+import datetime
+import decimal
+
+from django.conf import settings
+from rest_framework.utils.encoders import JSONEncoder
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser, JSONParser
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.settings import api_settings
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+MSGPACK_MEDIA_TYPE = 'application/msgpack'
+
+# Códigos de tipo extensión de MessagePack (0-127 son de la aplicación)
+EXT_DECIMAL = 1
+EXT_DATE = 2
+EXT_DATETIME = 3
+EXT_TIME = 4
+
+_drf_default = JSONEncoder().default
+
+
+class DecimalStringJSONEncoder(JSONEncoder):
+    """JSONEncoder de DRF que no pasa los Decimal a float (pierde céntimos en importes grandes)."""
+
+    def default(self, obj):
+        if isinstance(obj, decimal.Decimal) and api_settings.COERCE_DECIMAL_TO_STRING:
+            # Sin exponente, como DecimalField: Decimal('1E+2') sale '100'
+            return format(obj, 'f')
+        return super().default(obj)
+
+
+_json_default = DecimalStringJSONEncoder().default
+
+
+class ORJSONRenderer(JSONRenderer):
+    """JSONRenderer de DRF con orjson: misma salida, varias veces más rápido."""
+    # También para los casos que se delegan en JSONRenderer.render
+    encoder_class = DecimalStringJSONEncoder
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        # Solo con la configuración de DRF por defecto (UNICODE_JSON, COMPACT_JSON, STRICT_JSON)
+        if orjson is None or self.ensure_ascii or not self.compact or not self.strict:
+            return super().render(data, accepted_media_type, renderer_context)
+        if self.get_indent(accepted_media_type, renderer_context or {}) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            ret = orjson.dumps(data, default=_json_default, option=orjson.OPT_UTC_Z)
+        except orjson.JSONEncodeError:
+            # Claves que no son str (json las convierte a texto) o tipos que orjson no admite
+            try:
+                ret = orjson.dumps(data, default=_json_default, option=orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS)
+            except orjson.JSONEncodeError:
+                return super().render(data, accepted_media_type, renderer_context)
+        # Como DRF: JSON que también es un subconjunto estricto de JavaScript. U+2028 y U+2029
+        # empiezan por \xe2; buscar ese byte suelto (memchr) es mucho más barato que las secuencias
+        if b'\xe2' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return ret
+
+
+class ORJSONParser(JSONParser):
+    renderer_class = ORJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        encoding = (parser_context or {}).get('encoding', settings.DEFAULT_CHARSET)
+        if orjson is None or encoding.lower().replace('_', '-') not in ('utf-8', 'utf8'):
+            return super().parse(stream, media_type, parser_context)
+        try:
+            # orjson rechaza NaN e Infinity, como STRICT_JSON
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError('JSON parse error - %s' % str(exc))
+
+
+def _msgpack_default(obj):
+    if isinstance(obj, decimal.Decimal):
+        return msgpack.ExtType(EXT_DECIMAL, str(obj).encode('ascii'))
+    # datetime antes que date: datetime es subclase de date
+    if isinstance(obj, datetime.datetime):
+        return msgpack.ExtType(EXT_DATETIME, obj.isoformat().encode('ascii'))
+    if isinstance(obj, datetime.date):
+        return msgpack.ExtType(EXT_DATE, obj.isoformat().encode('ascii'))
+    if isinstance(obj, datetime.time):
+        return msgpack.ExtType(EXT_TIME, obj.isoformat().encode('ascii'))
+    return _drf_default(obj)
+
+
+_EXT_DECODERS = {
+    EXT_DECIMAL: decimal.Decimal,
+    EXT_DATE: datetime.date.fromisoformat,
+    EXT_DATETIME: datetime.datetime.fromisoformat,
+    EXT_TIME: datetime.time.fromisoformat,
+}
+
+
+def _msgpack_ext_hook(code, payload):
+    decoder = _EXT_DECODERS.get(code)
+    if decoder is None:
+        return msgpack.ExtType(code, payload)
+    return decoder(payload.decode('ascii'))
+
+
+def msgpack_dumps(data):
+    return msgpack.packb(data, default=_msgpack_default, use_bin_type=True, datetime=False)
+
+
+def msgpack_loads(payload):
+    return msgpack.unpackb(payload, ext_hook=_msgpack_ext_hook, raw=False)
+
+
+class MessagePackRenderer(BaseRenderer):
+    media_type = MSGPACK_MEDIA_TYPE
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return msgpack_dumps(data)
+
+
+class MessagePackParser(BaseParser):
+    media_type = MSGPACK_MEDIA_TYPE
+    renderer_class = MessagePackRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            return msgpack_loads(stream.read())
+        # Los errores de formato de msgpack son ValueError; un Decimal mal formado, InvalidOperation
+        except (ValueError, TypeError, decimal.InvalidOperation) as exc:
+            raise ParseError('MessagePack parse error - %s' % (str(exc) or type(exc).__name__))
@@ -0,0 +1,207 @@
+"""
+Tiempos por petición en la cabecera Server-Timing, registro de peticiones lentas y
+perfil bajo demanda.
+
+    Server-Timing: sql;dur=12.4;desc="7 consultas", serializer;dur=3.1, view;dur=21.9
+
+Se activa con SERVER_TIMING = True (variable de entorno SERVER_TIMING=1). Desactivado,
+el middleware lanza MiddlewareNotUsed al arrancar y Django lo quita de la cadena: no
+cuesta nada. Activado:
+  * sql: consultas y tiempo en la base, con un execute_wrapper en cada conexión que se abre.
+    El contador va en un ContextVar, así que también cuenta las consultas que las vistas
+    async hacen con sync_to_async desde otro hilo,
+  * serializer: tiempo dentro de Serializer.data / ListSerializer.data (el de más fuera),
+  * view: de la entrada a la salida del resto de middlewares y la vista, render incluido.
+    En las respuestas en streaming el cuerpo se genera después y no entra.
+Las peticiones que pasan de SERVER_TIMING_SLOW_MS se registran en el logger
+'config.server_timing' como una línea JSON.
+
+Con la cabecera X-Profile igual a SERVER_TIMING_PROFILE_TOKEN la petición se ejecuta bajo
+cProfile y el resultado (.prof, para pstats o snakeviz) queda en SERVER_TIMING_PROFILE_DIR;
+su nombre va en la cabecera X-Profile-File. Sin token configurado no se puede perfilar.
+
+El middleware es síncrono y asíncrono, como MetricsMiddleware: bajo ASGI no obliga a
+adaptar la cadena. En modo async el perfil solo ve el hilo del bucle de eventos; lo que
+las vistas ejecutan con sync_to_async en otro hilo no aparece en el .prof.
+"""
+import cProfile
+import hmac
+import json
+import logging
+import re
+import time
+from contextvars import ContextVar
+from pathlib import Path
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = 'HTTP_X_PROFILE'
+
+_current = ContextVar('server_timing', default=None)
+
+
+class RequestTimings:
+    __slots__ = ('queries', 'sql', 'serializer', 'serializer_depth')
+
+    def __init__(self):
+        self.queries = 0
+        self.sql = 0.0
+        self.serializer = 0.0
+        self.serializer_depth = 0
+
+
+def current_timings():
+    """Tiempos de la petición en curso, o None si no se están midiendo."""
+    return _current.get()
+
+
+def _record_query(execute, sql, params, many, context):
+    timings = _current.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timings.sql += time.perf_counter() - started
+        timings.queries += 1
+
+
+def _instrument_connection(connection, **kwargs):
+    if _record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_record_query)
+
+
+def _timed_data(data_property):
+    def data(self):
+        timings = _current.get()
+        if timings is None:
+            return data_property.fget(self)
+        # Un serializer dentro de otro no suma dos veces
+        timings.serializer_depth += 1
+        started = time.perf_counter()
+        try:
+            return data_property.fget(self)
+        finally:
+            timings.serializer_depth -= 1
+            if not timings.serializer_depth:
+                timings.serializer += time.perf_counter() - started
+    data.timed = True
+    return property(data)
+
+
+def install():
+    """Instrumenta conexiones y serializers. Idempotente; solo se llama con SERVER_TIMING activo."""
+    from rest_framework import serializers
+
+    connection_created.connect(_instrument_connection, dispatch_uid='server_timing')
+    for connection in connections.all(initialized_only=True):
+        _instrument_connection(connection)
+    for serializer_class in (serializers.Serializer, serializers.ListSerializer):
+        prop = serializer_class.__dict__['data']
+        if not getattr(prop.fget, 'timed', False):
+            serializer_class.data = _timed_data(prop)
+
+
+def format_header(timings, view_seconds):
+    return ', '.join([
+        f'sql;dur={timings.sql * 1000:.1f};desc="{timings.queries} consultas"',
+        f'serializer;dur={timings.serializer * 1000:.1f}',
+        f'view;dur={view_seconds * 1000:.1f}',
+    ])
+
+
+def _profile_allowed(request):
+    token = getattr(settings, 'SERVER_TIMING_PROFILE_TOKEN', '')
+    supplied = request.META.get(PROFILE_HEADER)
+    return bool(token and supplied) and hmac.compare_digest(supplied.encode(), token.encode())
+
+
+def _profile_path(request):
+    directory = Path(getattr(settings, 'SERVER_TIMING_PROFILE_DIR', 'profiles'))
+    directory.mkdir(parents=True, exist_ok=True)
+    slug = re.sub(r'[^A-Za-z0-9]+', '-', request.path).strip('-') or 'root'
+    return directory / f'{time.strftime("%Y%m%d-%H%M%S")}-{int(time.time() * 1000) % 1000:03d}-{request.method}-{slug}.prof'
+
+
+class ServerTimingMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'SERVER_TIMING', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+        self.slow_ms = getattr(settings, 'SERVER_TIMING_SLOW_MS', 500)
+        install()
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        timings = RequestTimings()
+        token = _current.set(timings)
+        profiler = cProfile.Profile() if _profile_allowed(request) else None
+        started = time.perf_counter()
+        try:
+            if profiler is None:
+                response = self.get_response(request)
+            else:
+                response = profiler.runcall(self.get_response, request)
+        finally:
+            elapsed = time.perf_counter() - started
+            _current.reset(token)
+        return self.finish(request, response, timings, elapsed, profiler)
+
+    async def __acall__(self, request):
+        timings = RequestTimings()
+        # sync_to_async copia el contexto: las consultas del hilo síncrono suman en `timings`
+        token = _current.set(timings)
+        profiler = cProfile.Profile() if _profile_allowed(request) else None
+        started = time.perf_counter()
+        try:
+            if profiler is None:
+                response = await self.get_response(request)
+            else:
+                profiler.enable()
+                try:
+                    response = await self.get_response(request)
+                finally:
+                    profiler.disable()
+        finally:
+            elapsed = time.perf_counter() - started
+            _current.reset(token)
+        return self.finish(request, response, timings, elapsed, profiler)
+
+    def finish(self, request, response, timings, elapsed, profiler):
+        response['Server-Timing'] = format_header(timings, elapsed)
+        if profiler is not None:
+            path = _profile_path(request)
+            profiler.dump_stats(path)
+            response['X-Profile-File'] = path.name
+        if elapsed * 1000 >= self.slow_ms:
+            self.log_slow(request, response, timings, elapsed)
+        return response
+
+    def log_slow(self, request, response, timings, elapsed):
+        match = getattr(request, 'resolver_match', None)
+        logger.warning(json.dumps({
+            'event': 'slow_request',
+            'method': request.method,
+            'path': request.path,
+            'route': match.route if match else None,
+            'status': response.status_code,
+            'user_id': getattr(getattr(request, 'user', None), 'pk', None),
+            'view_ms': round(elapsed * 1000, 1),
+            'sql_ms': round(timings.sql * 1000, 1),
+            'queries': timings.queries,
+            'serializer_ms': round(timings.serializer * 1000, 1),
+        }))
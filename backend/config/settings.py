@@ -10,6 +10,8 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/4.2/ref/settings/
 """
 
+import os
+from importlib.util import find_spec
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -27,6 +29,27 @@ DEBUG = True
 
 ALLOWED_HOSTS = []
 
+# Presupuestos de consultas por vista (config/query_budget.py): 'off', 'warn' o 'raise'.
+# Los tests usan override_settings(QUERY_BUDGET_MODE='raise') para fallar si se exceden.
+QUERY_BUDGET_MODE = 'warn' if DEBUG else 'off'
+
+# Cabecera Server-Timing, registro de peticiones lentas y perfiles (config/server_timing.py).
+# Desactivado no añade ningún coste: el middleware se quita de la cadena al arrancar.
+SERVER_TIMING = os.environ.get('SERVER_TIMING') == '1'
+SERVER_TIMING_SLOW_MS = 500
+# Valor de la cabecera X-Profile que pide un perfil cProfile de la petición; vacío = desactivado
+SERVER_TIMING_PROFILE_TOKEN = os.environ.get('SERVER_TIMING_PROFILE_TOKEN', '')
+SERVER_TIMING_PROFILE_DIR = BASE_DIR / 'profiles'
+
+# Métricas para Prometheus en /metrics/ (config/metrics.py). Con varios workers de gunicorn,
+# METRICS_DIR debe apuntar a un directorio común que se vacía al arrancar el servicio.
+METRICS_ENABLED = os.environ.get('METRICS_ENABLED', '1') == '1'
+METRICS_DIR = os.environ.get('METRICS_DIR', '')
+# Con token, /metrics/ pide 'Authorization: Bearer <token>' desde cualquier IP. Sin token solo
+# se sirve a METRICS_ALLOWED_IPS, que detrás de un proxy no sirve: no publicar /metrics/ por él
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+METRICS_ALLOWED_IPS = ('127.0.0.1', '::1')
+
 
 # Application definition
 
@@ -47,6 +70,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'config.metrics.MetricsMiddleware', # Latencia, estado y filas por vista para /metrics/
+    'config.server_timing.ServerTimingMiddleware', # Solo con SERVER_TIMING; el primero para medir toda la cadena
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware', # Añadido para CORS
@@ -88,6 +113,68 @@ DATABASES = {
     }
 }
 
+# Perfil SQLite de producción (SQLITE_PRODUCTION=1), pensado para varios workers de gunicorn
+# escribiendo a la vez. config/sqlite aplica los PRAGMAs en cada conexión y abre las
+# transacciones con BEGIN IMMEDIATE. Ver benchmarks/sqlite_writes.py.
+SQLITE_PRODUCTION = os.environ.get('SQLITE_PRODUCTION') == '1'
+
+if SQLITE_PRODUCTION:
+    DATABASES['default']['ENGINE'] = 'config.sqlite'
+    DATABASES['default']['OPTIONS'] = {
+        'timeout': 5, # Espera del módulo sqlite3 (segundos) antes de "database is locked"
+        'transaction_mode': 'IMMEDIATE',
+        'pragmas': {
+            'journal_mode': 'WAL', # Los lectores no bloquean al escritor ni al revés
+            'busy_timeout': 5000, # ms
+            'synchronous': 'NORMAL', # Con WAL no pierde integridad, solo fsync por checkpoint
+            'mmap_size': 256 * 1024 * 1024,
+            'cache_size': -64 * 1024, # Negativo = KiB: 64 MiB de caché de páginas por conexión
+            'temp_store': 'MEMORY',
+        },
+    }
+
+# Agrupa en una sola transacción las altas simultáneas de ingresos y gastos de este
+# proceso (transactions/coalescing.py). Solo ayuda con workers de varios hilos (gthread, ASGI).
+WRITE_COALESCING = os.environ.get('WRITE_COALESCING') == '1'
+WRITE_COALESCING_MAX_BATCH = 64
+WRITE_COALESCING_MAX_WAIT = 0.002 # Segundos que se espera a más altas antes de confirmar
+
+# Los GET de listados de ingresos y gastos se serializan desde .values() con un plan
+# precompilado (transactions/fastlist.py) en lugar de con los campos de DRF. Mismo JSON.
+FAST_LIST_SERIALIZATION = os.environ.get('FAST_LIST_SERIALIZATION', '1') == '1'
+
+
+# Cache
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+# 'summaries' guarda los resúmenes por usuario (ver transactions/cache.py). Es LRU y está
+# acotada por MAX_ENTRIES; las claves incluyen la versión de datos del usuario, así que
+# una escritura nunca deja servir un resultado obsoleto aunque cada worker tenga su copia.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'summaries': {
+        'BACKEND': 'transactions.cache.InstrumentedLocMemCache',
+        'LOCATION': 'sysfinanzas-summaries',
+        'TIMEOUT': 60 * 60,
+        'OPTIONS': {
+            'MAX_ENTRIES': 10000,
+            'CULL_FREQUENCY': 10, # Al llenarse se expulsa el 10% menos usado
+        },
+    },
+    # Resolvers de categorías: una entrada por usuario y versión de datos
+    'categories': {
+        'BACKEND': 'transactions.cache.InstrumentedLocMemCache',
+        'LOCATION': 'sysfinanzas-categories',
+        'TIMEOUT': 60 * 60,
+        'OPTIONS': {
+            'MAX_ENTRIES': 5000,
+            'CULL_FREQUENCY': 10,
+        },
+    },
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -155,7 +242,10 @@ SIMPLE_JWT = {
 
     'AUTH_TOKEN_CLASSES': ('rest_framework_simplejwt.tokens.AccessToken',),
     'TOKEN_TYPE_CLAIM': 'token_type',
-    'TOKEN_USER_CLASS': 'rest_framework_simplejwt.models.TokenUser',
+    # Usuario construido desde los claims (sin consulta) por accounts.authentication.ClaimsJWTAuthentication
+    'TOKEN_USER_CLASS': 'accounts.authentication.claims_user',
+    'TOKEN_OBTAIN_SERIALIZER': 'accounts.serializers.ClaimsTokenObtainPairSerializer', # Añade el claim 'username'
+    'TOKEN_REFRESH_SERIALIZER': 'accounts.serializers.IndexedTokenRefreshSerializer', # Lista negra con filtro de Bloom
 
     'JTI_CLAIM': 'jti',
 
@@ -164,6 +254,16 @@ SIMPLE_JWT = {
     'SLIDING_TOKEN_REFRESH_LIFETIME': timedelta(days=1),
 }
 
+# Segundos que un proceso puede seguir aceptando tokens de un usuario desactivado o borrado
+# en las lecturas autenticadas solo con claims (accounts/authentication.py)
+JWT_USER_STATUS_TTL = 60
+
+# Lista negra de refresh tokens en memoria (accounts/blacklist.py): cada cuántos segundos se leen
+# las altas de otros procesos y cada cuántos se reconstruye el filtro (descarta los caducados).
+# Las tablas se purgan con `python manage.py prune_tokens` (p. ej. cada hora desde cron).
+JWT_BLACKLIST_SYNC_INTERVAL = 5
+JWT_BLACKLIST_REBUILD_INTERVAL = 60 * 60
+
 # CORS Configuration
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:5173", # Puerto del frontend Vite (anterior)
@@ -234,4 +334,16 @@ REST_FRAMEWORK = {
     ),
     # 'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     # 'PAGE_SIZE': 10,
+    # JSON con orjson y MessagePack según Accept / Content-Type (config/renderers.py)
+    'DEFAULT_RENDERER_CLASSES': [
+        'config.renderers.ORJSONRenderer',
+        *(['config.renderers.MessagePackRenderer'] if find_spec('msgpack') else []),
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'config.renderers.ORJSONParser',
+        *(['config.renderers.MessagePackParser'] if find_spec('msgpack') else []),
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
 }
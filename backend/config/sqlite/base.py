@@ -0,0 +1,38 @@
+"""
+Backend SQLite para producción (ENGINE = 'config.sqlite').
+
+Es el backend de Django con dos cambios, configurables desde DATABASES['default']['OPTIONS']:
+  * 'pragmas': PRAGMAs que se ejecutan en cada conexión nueva (WAL, busy_timeout, ...).
+  * 'transaction_mode': cómo abre atomic() la transacción. Con 'IMMEDIATE' el bloqueo de
+    escritura se toma al empezar, donde busy_timeout espera; con el BEGIN por defecto dos
+    escritores que ya leyeron fallan con "database is locked" al intentar escribir.
+"""
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.sqlite3 import base
+
+TRANSACTION_MODES = ('DEFERRED', 'IMMEDIATE', 'EXCLUSIVE')
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        self.pragmas = params.pop('pragmas', {})
+        self.transaction_mode = params.pop('transaction_mode', None)
+        if self.transaction_mode is not None and self.transaction_mode.upper() not in TRANSACTION_MODES:
+            raise ImproperlyConfigured(
+                f"transaction_mode debe ser uno de {', '.join(TRANSACTION_MODES)}."
+            )
+        return params
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        for name, value in self.pragmas.items():
+            conn.execute(f'PRAGMA {name} = {value}')
+        return conn
+
+    def _start_transaction_under_autocommit(self):
+        if self.transaction_mode is None:
+            super()._start_transaction_under_autocommit()
+        else:
+            self.cursor().execute(f'BEGIN {self.transaction_mode.upper()}')
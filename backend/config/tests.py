@@ -0,0 +1,245 @@
+import logging
+import os
+import re
+import sqlite3
+import tempfile
+from datetime import date, datetime, time, timedelta, timezone
+from decimal import Decimal
+from io import BytesIO
+from unittest import skipIf
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.contrib.auth.models import User
+from django.core.exceptions import ImproperlyConfigured
+from django.core.handlers.base import BaseHandler
+from django.db.utils import ConnectionHandler
+from django.test import AsyncClient, SimpleTestCase, TestCase, override_settings
+from rest_framework.exceptions import ParseError
+from rest_framework.renderers import JSONRenderer
+
+from accounts.serializers import ClaimsTokenObtainPairSerializer
+from config.metrics import MetricsMiddleware, registry
+from config.renderers import DecimalStringJSONEncoder, MessagePackParser, MessagePackRenderer, ORJSONParser, ORJSONRenderer, msgpack
+from config.server_timing import ServerTimingMiddleware
+from transactions.models import Income
+
+
+def serializer_ms(response):
+    return float(re.search(r'serializer;dur=([0-9.]+)', response['Server-Timing']).group(1))
+
+
+def requests_total(view, status):
+    key = ('http_requests_total', (('view', view), ('method', 'GET'), ('status', status)))
+    return dict(registry.store.items()).get(key, 0.0)
+
+
+class CollectingHandler(logging.Handler):
+
+    def __init__(self):
+        super().__init__(logging.DEBUG)
+        self.messages = []
+
+    def emit(self, record):
+        self.messages.append(record.getMessage())
+
+
+# Django solo registra las adaptaciones con DEBUG
+@override_settings(METRICS_ENABLED=True, SERVER_TIMING=True, DEBUG=True)
+class MiddlewareModeTests(SimpleTestCase):
+    """Los middlewares propios no deben obligar a Django a adaptar la cadena (sync_to_async)."""
+
+    def load_chain(self, is_async):
+        collector = CollectingHandler()
+        logger = logging.getLogger('django.request')
+        previous_level = logger.level
+        logger.addHandler(collector)
+        logger.setLevel(logging.DEBUG)
+        try:
+            handler = BaseHandler()
+            handler.load_middleware(is_async=is_async)
+        finally:
+            logger.removeHandler(collector)
+            logger.setLevel(previous_level)
+        return handler, [message for message in collector.messages if 'adapted' in message]
+
+    def test_async_chain_is_not_adapted(self):
+        handler, adapted = self.load_chain(is_async=True)
+        self.assertEqual(adapted, [])
+        self.assertTrue(iscoroutinefunction(handler._middleware_chain))
+
+    def test_sync_chain_is_not_adapted(self):
+        handler, adapted = self.load_chain(is_async=False)
+        self.assertEqual(adapted, [])
+        self.assertFalse(iscoroutinefunction(handler._middleware_chain))
+
+    def test_middleware_follows_get_response_mode(self):
+        async def async_view(request):
+            return None
+
+        for middleware_class in (MetricsMiddleware, ServerTimingMiddleware):
+            with self.subTest(middleware=middleware_class.__name__):
+                self.assertTrue(iscoroutinefunction(middleware_class(async_view)))
+                self.assertFalse(iscoroutinefunction(middleware_class(lambda request: None)))
+
+
+@override_settings(METRICS_ENABLED=True)
+class MetricsTests(TestCase):
+
+    async def test_async_requests_are_recorded(self):
+        before = requests_total('financial-summary', '401')
+        response = await AsyncClient().get('/api/transactions/summary/financial/')
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(requests_total('financial-summary', '401'), before + 1)
+
+    def test_metrics_only_from_allowed_ips_without_token(self):
+        self.assertEqual(self.client.get('/metrics/').status_code, 200)
+        self.assertEqual(self.client.get('/metrics/', REMOTE_ADDR='203.0.113.7').status_code, 403)
+
+    @override_settings(METRICS_TOKEN='s3creto')
+    def test_metrics_token_is_required_when_configured(self):
+        self.assertEqual(self.client.get('/metrics/').status_code, 403)
+        self.assertEqual(self.client.get('/metrics/', HTTP_AUTHORIZATION='Bearer otro').status_code, 403)
+        response = self.client.get('/metrics/', HTTP_AUTHORIZATION='Bearer s3creto', REMOTE_ADDR='203.0.113.7')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'http_requests_total', response.content)
+
+
+@override_settings(SERVER_TIMING=True)
+class ServerTimingTests(TestCase):
+
+    async def test_async_requests_get_server_timing(self):
+        response = await AsyncClient().get('/api/transactions/async/summary/financial/')
+        self.assertEqual(response.status_code, 401)
+        self.assertIn('sql;dur=', response['Server-Timing'])
+
+    def test_sync_requests_get_server_timing(self):
+        response = self.client.get('/api/transactions/summary/financial/')
+        self.assertEqual(response.status_code, 401)
+        self.assertIn('view;dur=', response['Server-Timing'])
+
+    def make_list(self):
+        user = User.objects.create_user('timing@example.com', password='secreta-123')
+        Income.objects.bulk_create([
+            Income(user=user, amount=Decimal(index) + Decimal('0.25'), date=date(2024, 1, 1) + timedelta(days=index), description=f'Fila {index}')
+            for index in range(500)
+        ])
+        return f'Bearer {ClaimsTokenObtainPairSerializer.get_token(user).access_token}'
+
+    def test_fast_list_reports_serializer_time(self):
+        # Los listados serializan con RowPlan, sin pasar por Serializer.data
+        response = self.client.get('/api/transactions/incomes/', {'page_size': 500}, HTTP_AUTHORIZATION=self.make_list())
+        self.assertEqual(len(response.json()['results']), 500)
+        self.assertGreater(serializer_ms(response), 0)
+
+    async def test_async_fast_list_reports_serializer_time(self):
+        authorization = await sync_to_async(self.make_list)()
+        response = await AsyncClient().get('/api/transactions/async/incomes/', {'page_size': 500}, headers={'Authorization': authorization})
+        self.assertEqual(response.status_code, 200)
+        self.assertGreater(serializer_ms(response), 0)
+
+
+class RendererTests(SimpleTestCase):
+    """Decimal, date y datetime a través de ORJSON y MessagePack, ida y vuelta."""
+
+    payload = {
+        'amount': Decimal('12345678901234567.89'),
+        'scaled': Decimal('0.10'),
+        'day': date(2024, 2, 29),
+        'moment': datetime(2024, 1, 1, 10, 30, 0, 123456, tzinfo=timezone.utc),
+        'rows': [{'total_amount': Decimal('1E+2')}],
+    }
+
+    def json_roundtrip(self, accepted_media_type=None):
+        body = ORJSONRenderer().render(self.payload, accepted_media_type)
+        return body, ORJSONParser().parse(BytesIO(body))
+
+    def test_orjson_keeps_decimals_as_strings(self):
+        for accepted_media_type in (None, 'application/json; indent=2'):
+            with self.subTest(accepted_media_type=accepted_media_type):
+                # Con indent se delega en JSONRenderer: debe salir lo mismo
+                _, data = self.json_roundtrip(accepted_media_type)
+                self.assertEqual(data['amount'], '12345678901234567.89')
+                self.assertEqual(data['scaled'], '0.10')
+                self.assertEqual(data['rows'], [{'total_amount': '100'}])
+                self.assertEqual(date.fromisoformat(data['day']), self.payload['day'])
+                self.assertEqual(data['moment'], '2024-01-01T10:30:00.123456Z')
+                self.assertEqual(datetime.fromisoformat(data['moment']), self.payload['moment'])
+
+    def test_orjson_matches_drf_renderer(self):
+        drf_renderer = JSONRenderer()
+        drf_renderer.encoder_class = DecimalStringJSONEncoder
+        self.assertEqual(self.json_roundtrip()[0], drf_renderer.render(self.payload))
+
+    def test_decimals_as_numbers_without_coercion(self):
+        with override_settings(REST_FRAMEWORK={'COERCE_DECIMAL_TO_STRING': False}):
+            _, data = self.json_roundtrip()
+        self.assertEqual(data['scaled'], 0.1)
+
+    @skipIf(msgpack is None, 'msgpack no está instalado')
+    def test_msgpack_roundtrip_is_exact(self):
+        payload = {
+            **self.payload,
+            'naive': datetime(2024, 3, 1, 8, 0),
+            'offset': datetime(2024, 3, 1, 8, 0, tzinfo=timezone(timedelta(hours=-3))),
+            'time': time(23, 59, 59, 999),
+        }
+        data = MessagePackParser().parse(BytesIO(MessagePackRenderer().render(payload)))
+        self.assertEqual(data, payload)
+        self.assertEqual({key: type(value) for key, value in data.items()}, {key: type(value) for key, value in payload.items()})
+        # La escala y la zona se conservan, no solo el valor
+        self.assertEqual(str(data['scaled']), '0.10')
+        self.assertEqual(data['offset'].utcoffset(), timedelta(hours=-3))
+
+    @skipIf(msgpack is None, 'msgpack no está instalado')
+    def test_msgpack_parse_errors(self):
+        for body in (b'\xc1', msgpack.packb(msgpack.ExtType(1, b'no-es-decimal'))):
+            with self.subTest(body=body), self.assertRaises(ParseError):
+                MessagePackParser().parse(BytesIO(body))
+
+
+class SQLiteBackendTests(SimpleTestCase):
+    """config.sqlite con un fichero temporal, fuera de la base de los tests."""
+
+    def connect(self, **options):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, 'db.sqlite3')
+        # Un ConnectionHandler propio: no toca django.db.connections
+        handler = ConnectionHandler({'default': {'ENGINE': 'config.sqlite', 'NAME': path, 'OPTIONS': options}})
+        wrapper = handler['default']
+        self.addCleanup(wrapper.close)
+        return wrapper, path
+
+    def pragma(self, wrapper, name):
+        with wrapper.cursor() as cursor:
+            cursor.execute(f'PRAGMA {name}')
+            return cursor.fetchone()[0]
+
+    def test_pragmas_on_every_connection(self):
+        wrapper, _ = self.connect(pragmas={'journal_mode': 'WAL', 'busy_timeout': 1234, 'synchronous': 'NORMAL'})
+        for _ in range(2):
+            self.assertEqual(self.pragma(wrapper, 'journal_mode'), 'wal')
+            self.assertEqual(self.pragma(wrapper, 'busy_timeout'), 1234)
+            self.assertEqual(self.pragma(wrapper, 'synchronous'), 1) # NORMAL
+            # La siguiente conexión también los recibe
+            wrapper.close()
+
+    def test_immediate_transactions_take_the_write_lock(self):
+        wrapper, path = self.connect(transaction_mode='immediate')
+        other = sqlite3.connect(path, timeout=0)
+        self.addCleanup(other.close)
+        # Lo que hace atomic() al entrar
+        wrapper.set_autocommit(False, force_begin_transaction_with_broken_autocommit=True)
+        try:
+            with self.assertRaisesMessage(sqlite3.OperationalError, 'database is locked'):
+                other.execute('BEGIN IMMEDIATE')
+        finally:
+            wrapper.rollback()
+            wrapper.set_autocommit(True)
+        other.execute('BEGIN IMMEDIATE')
+        other.rollback()
+
+    def test_unknown_transaction_mode(self):
+        wrapper, _ = self.connect(transaction_mode='LAZY')
+        with self.assertRaises(ImproperlyConfigured):
+            wrapper.ensure_connection()
@@ -16,6 +16,7 @@ Including another URLconf
 """
 from django.contrib import admin
 from django.urls import path, include
+from config.metrics import metrics_view
 from rest_framework_simplejwt.views import (
     TokenObtainPairView,
     TokenRefreshView,
@@ -27,4 +28,5 @@ urlpatterns = [
     path('api/token/', TokenObtainPairView.as_view(), name='token_obtain_pair'), # Para obtener token (login)
     path('api/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'), # Para refrescar token
     path('api/transactions/', include('transactions.urls')), # Añadido
+    path('metrics/', metrics_view, name='metrics'), # Métricas para Prometheus: METRICS_TOKEN o solo desde local
 ]
@@ -6,6 +6,7 @@ class CategoryAdmin(admin.ModelAdmin):
     list_display = ('name', 'user') # Campos que se mostrarán en la lista
     list_filter = ('user',) # Filtros que aparecerán en el panel lateral
     search_fields = ('name', 'user__username') # Campos por los que se podrá buscar
+    list_select_related = ('user',)
 
 @admin.register(Income)
 class IncomeAdmin(admin.ModelAdmin):
@@ -13,6 +14,7 @@ class IncomeAdmin(admin.ModelAdmin):
     list_filter = ('user', 'category', 'date', 'recurrence')
     search_fields = ('description', 'user__username', 'category__name')
     date_hierarchy = 'date' # Para navegar por fechas
+    list_select_related = ('category', 'user') # Evita una consulta por fila al mostrar categoría y usuario
 
 # O una forma más simple si no necesitas personalización:
 # admin.site.register(Category)
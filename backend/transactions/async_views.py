@@ -0,0 +1,154 @@
+"""
+Versiones async de los resúmenes y listados, para servir con config/asgi.py.
+
+DRF 3.14 no admite handlers async: AsyncAPIView reimplementa dispatch() como corrutina.
+La autenticación, permisos y filtros (código síncrono que puede consultar la base) corren
+con sync_to_async, igual que el resumen financiero (la misma consulta agrupada que la vista
+síncrona); los listados y los desgloses por categoría leen con el ORM async (async for).
+En Django 4.2 el ORM async también pasa por sync_to_async(thread_sensitive=True): las
+consultas no van en paralelo, pero una agregación lenta no ocupa un hilo del servidor
+mientras espera.
+
+Las respuestas son las mismas que las de las vistas síncronas y comparten la caché de
+resúmenes. Comparativa de concurrencia en benchmarks/async_load.py.
+"""
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django_filters.rest_framework import DjangoFilterBackend
+from rest_framework import filters, generics, permissions, views
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+from accounts.authentication import ClaimsJWTAuthentication
+from config.query_budget import query_budget
+from .cache import aget_or_compute
+from .conditional import conditional_get
+from .fastlist import FastListMixin
+from .fieldsets import SparseFieldsetViewMixin
+from .filters import ExpenseFilter, IncomeFilter
+from .models import Expense, Income
+from .pagination import KeysetPagination
+from .renderers import ColumnarJSONRenderer
+from .serializers import ExpenseSerializer, IncomeSerializer
+from .utils import aget_category_summary, aget_financial_summary
+from .views import get_recurring_until, recurring_vary
+
+
+class AsyncAPIView(views.APIView):
+    """APIView cuyos handlers (get, post, ...) son corrutinas."""
+
+    async def dispatch(self, request, *args, **kwargs):
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            # initial() autentica (JWT consulta el usuario) y comprueba permisos
+            await sync_to_async(self.initial)(request, *args, **kwargs)
+            if request.method.lower() in self.http_method_names:
+                handler = getattr(self, request.method.lower(), self.http_method_not_allowed)
+            else:
+                handler = self.http_method_not_allowed
+            response = handler(request, *args, **kwargs)
+            # options() de DRF es síncrono
+            if asyncio.iscoroutine(response):
+                response = await response
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
+
+
+class AsyncGenericAPIView(AsyncAPIView, generics.GenericAPIView):
+    pass
+
+
+# Estado del usuario (una vez por TTL), versión de datos, rollups agrupados y, con
+# ?include_recurring=true, dos lecturas de recurrentes
+@query_budget(GET=5)
+class AsyncFinancialSummaryView(AsyncAPIView):
+    permission_classes = [permissions.IsAuthenticated]
+    authentication_classes = [ClaimsJWTAuthentication] # Lecturas sin consultar auth_user
+
+    @conditional_get('financial', vary=recurring_vary)
+    async def get(self, request, *args, **kwargs):
+        until = get_recurring_until(request)
+        summary = await aget_or_compute(request, 'financial', lambda: aget_financial_summary(request.user, until), until)
+        return Response(summary)
+
+
+# Estado del usuario, versión de datos, rollups por categoría y, con ?include_recurring=true,
+# dos lecturas de recurrentes
+@query_budget(GET=5)
+class AsyncExpenseCategorySummaryView(AsyncAPIView):
+    permission_classes = [permissions.IsAuthenticated]
+    authentication_classes = [ClaimsJWTAuthentication] # Lecturas sin consultar auth_user
+
+    @conditional_get('expenses-by-category', vary=recurring_vary)
+    async def get(self, request, *args, **kwargs):
+        until = get_recurring_until(request)
+        return Response(await aget_or_compute(request, 'expenses-by-category', lambda: aget_category_summary(request.user, 'expense', until), until))
+
+
+@query_budget(GET=5)
+class AsyncIncomeCategorySummaryView(AsyncAPIView):
+    permission_classes = [permissions.IsAuthenticated]
+    authentication_classes = [ClaimsJWTAuthentication] # Lecturas sin consultar auth_user
+
+    @conditional_get('incomes-by-category', vary=recurring_vary)
+    async def get(self, request, *args, **kwargs):
+        until = get_recurring_until(request)
+        return Response(await aget_or_compute(request, 'incomes-by-category', lambda: aget_category_summary(request.user, 'income', until), until))
+
+
+class AsyncTransactionListView(SparseFieldsetViewMixin, FastListMixin, AsyncGenericAPIView):
+    """Listado paginado por cursor, con los mismos filtros y ordenación que las vistas síncronas."""
+    permission_classes = [permissions.IsAuthenticated]
+    authentication_classes = [ClaimsJWTAuthentication] # Lecturas sin consultar auth_user
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
+    ordering_fields = ['date', 'amount']
+    pagination_class = KeysetPagination
+    renderer_classes = api_settings.DEFAULT_RENDERER_CLASSES + [ColumnarJSONRenderer]
+    model = None
+
+    def get_queryset(self):
+        # select_related: el serializer lee category.name de cada fila (el username sale de request.user)
+        return self.model.objects.filter(user=self.request.user).select_related('category')
+
+    async def get(self, request, *args, **kwargs):
+        # Validar los filtros puede consultar categorías (resolver): se hace en el hilo síncrono
+        queryset = await sync_to_async(self.filter_queryset)(self.get_queryset())
+        plan = self.fast_plan()
+        if plan is not None:
+            page = await self.paginator.apaginate_queryset(plan.values(queryset, *self.cursor_columns(queryset)), request, view=self)
+            return self.get_paginated_response(self.fast_serialize(plan, page))
+        page = await self.paginator.apaginate_queryset(queryset, request, view=self)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+
+# Estado del usuario, versión de datos, categorías del filtro y la página (como las síncronas)
+@query_budget(GET=4)
+class AsyncIncomeListView(AsyncTransactionListView):
+    serializer_class = IncomeSerializer
+    filterset_class = IncomeFilter
+    model = Income
+
+    @conditional_get('incomes')
+    async def get(self, request, *args, **kwargs):
+        return await super().get(request, *args, **kwargs)
+
+
+@query_budget(GET=4)
+class AsyncExpenseListView(AsyncTransactionListView):
+    serializer_class = ExpenseSerializer
+    filterset_class = ExpenseFilter
+    model = Expense
+
+    @conditional_get('expenses')
+    async def get(self, request, *args, **kwargs):
+        return await super().get(request, *args, **kwargs)
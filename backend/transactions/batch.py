@@ -0,0 +1,242 @@
+"""
+Altas, modificaciones y borrados de ingresos, gastos y categorías en una sola petición.
+
+    POST /api/transactions/batch/
+    {"operations": [
+        {"op": "create", "model": "expense", "data": {"description": "Pan", "amount": "2.50", "date": "2024-05-02"}},
+        {"op": "update", "model": "income", "id": 7, "data": {"amount": "1200.00"}},
+        {"op": "delete", "model": "category", "id": 3}
+    ]}
+
+Las modificaciones son parciales (como PATCH). Todo se valida antes de escribir; si alguna
+operación falla no se aplica ninguna y la respuesta (400) trae el error de cada una. Si
+todas son válidas se aplican en una transacción, y el número de consultas depende de los
+modelos tocados, no del número de operaciones:
+  * los objetos a modificar o borrar se leen con una consulta por modelo,
+  * las categorías se resuelven con el resolver de la petición (transactions/categories.py),
+  * se escriben con bulk_create, bulk_update y QuerySet.delete(), con los rollups por bucket
+    (record_bulk_changes) y un solo incremento de la versión de datos.
+"""
+from django.db import transaction
+from django.utils import timezone
+from rest_framework import serializers
+
+from .cache import bump_data_version
+from .models import Category, Expense, Income
+from .rollups import record_bulk_changes
+from .serializers import CategorySerializer, ExpenseSerializer, IncomeSerializer
+from .signals import deletes_handled_by_caller
+
+MAX_OPERATIONS = 500
+OPERATIONS = ('create', 'update', 'delete')
+BATCH_MODELS = {
+    'category': (Category, CategorySerializer),
+    'income': (Income, IncomeSerializer),
+    'expense': (Expense, ExpenseSerializer),
+}
+# Orden de aplicación: las categorías nuevas o renombradas antes que los movimientos y
+# las categorías borradas al final, cuando sus movimientos ya tienen los rollups al día
+APPLY_ORDER = ('category', 'income', 'expense')
+
+
+class BatchOperationSerializer(serializers.Serializer):
+    op = serializers.ChoiceField(choices=OPERATIONS)
+    model = serializers.ChoiceField(choices=list(BATCH_MODELS))
+    id = serializers.IntegerField(required=False, min_value=1)
+    data = serializers.DictField(required=False, default=dict)
+
+    def validate(self, attrs):
+        if attrs['op'] != 'create' and attrs.get('id') is None:
+            raise serializers.ValidationError({'id': ["Obligatorio para update y delete."]})
+        return attrs
+
+
+class BatchRequestSerializer(serializers.Serializer):
+    operations = serializers.ListField(
+        child=serializers.DictField(), allow_empty=False, max_length=MAX_OPERATIONS,
+    )
+
+
+class BatchMutation:
+
+    def __init__(self, request, operations):
+        self.request = request
+        self.user = request.user
+        self.context = {'request': request}
+        self.operations = operations
+        self.results = [None] * len(operations)
+        self.errors = {}
+        # Categorías creadas o renombradas en el lote, para que las respuestas de los
+        # movimientos muestren el nombre nuevo
+        self.written_categories = {}
+
+    def run(self):
+        """Devuelve (True, resultados) si se aplicó todo o (False, resultados con errores)."""
+        parsed = self._parse()
+        instances = self._prefetch(parsed)
+        validated = self._validate(parsed, instances)
+        if self.errors:
+            return False, self._error_results()
+
+        with transaction.atomic():
+            for model_name in APPLY_ORDER:
+                self._apply_writes(model_name, validated)
+            for model_name in reversed(APPLY_ORDER):
+                self._apply_deletes(model_name, validated)
+            # Las altas y cambios de categorías van con bulk_create/bulk_update, sin señales
+            bump_data_version(self.user.pk, categories=any(validated['category'].values()))
+
+        # Lo leído al principio de la petición ya no vale
+        for attribute in ('_version_rows', '_data_versions', '_category_resolver'):
+            if hasattr(self.request, attribute):
+                delattr(self.request, attribute)
+        return True, self.results
+
+    def _parse(self):
+        parsed = []
+        seen = set()
+        for index, raw in enumerate(self.operations):
+            serializer = BatchOperationSerializer(data=raw)
+            if not serializer.is_valid():
+                self.errors[index] = serializer.errors
+                continue
+            operation = serializer.validated_data
+            if operation['op'] != 'create':
+                key = (operation['model'], operation['id'])
+                if key in seen:
+                    self.errors[index] = {'id': ["El objeto ya aparece en otra operación del lote."]}
+                    continue
+                seen.add(key)
+            parsed.append((index, operation))
+        return parsed
+
+    def _prefetch(self, parsed):
+        """{modelo: {id: instancia}} de todo lo que se modifica o borra: una consulta por modelo."""
+        ids = {}
+        for _, operation in parsed:
+            if operation['op'] != 'create':
+                ids.setdefault(operation['model'], set()).add(operation['id'])
+        instances = {}
+        for model_name, model_ids in ids.items():
+            model = BATCH_MODELS[model_name][0]
+            # Las categorías globales no se pueden modificar ni borrar desde la API
+            queryset = model.objects.filter(user=self.user, id__in=model_ids)
+            if model is not Category:
+                queryset = queryset.select_related('category')
+            instances[model_name] = {instance.id: instance for instance in queryset}
+        return instances
+
+    def _validate(self, parsed, instances):
+        validated = {model_name: {'create': [], 'update': [], 'delete': []} for model_name in BATCH_MODELS}
+        category_names = {}
+        for index, operation in parsed:
+            model_name, op = operation['model'], operation['op']
+            serializer_class = BATCH_MODELS[model_name][1]
+            instance = None
+            if op != 'create':
+                instance = instances.get(model_name, {}).get(operation['id'])
+                if instance is None:
+                    self.errors[index] = {'id': ["No encontrado."]}
+                    continue
+            if op == 'delete':
+                validated[model_name]['delete'].append((index, instance))
+                continue
+
+            serializer = serializer_class(
+                instance, data=operation['data'], partial=op == 'update', context=self.context,
+            )
+            if not serializer.is_valid():
+                self.errors[index] = serializer.errors
+                continue
+            if model_name == 'category' and 'name' in serializer.validated_data:
+                # validate_name no ve las demás operaciones del lote
+                name = serializer.validated_data['name'].lower()
+                if name in category_names:
+                    self.errors[index] = {'name': ["Otra operación del lote usa este nombre."]}
+                    continue
+                category_names[name] = index
+            validated[model_name][op].append((index, instance, serializer.validated_data))
+        return validated
+
+    def _apply_writes(self, model_name, validated):
+        model, serializer_class = BATCH_MODELS[model_name]
+        tracked = model is not Category
+        now = timezone.now()
+
+        created = []
+        for index, _, data in validated[model_name]['create']:
+            instance = model(user=self.user, **data)
+            if tracked:
+                instance.refresh_fingerprint()
+            created.append((index, instance))
+        if created:
+            model.objects.bulk_create([instance for _, instance in created])
+
+        updated = []
+        fields = set()
+        for index, instance, data in validated[model_name]['update']:
+            previous = None
+            if tracked:
+                previous = {
+                    'user_id': instance.user_id, 'date': instance.date,
+                    'category_id': instance.category_id, 'amount': instance.amount,
+                }
+            for field, value in data.items():
+                setattr(instance, field, value)
+            fields.update(data)
+            if tracked:
+                instance.updated_at = now
+                instance.refresh_fingerprint()
+            updated.append((index, previous, instance))
+        if updated and fields:
+            if tracked:
+                fields |= {'updated_at', 'fingerprint'}
+            model.objects.bulk_update([instance for _, _, instance in updated], sorted(fields))
+
+        if not tracked:
+            for _, instance in created + [(index, instance) for index, _, instance in updated]:
+                self.written_categories[instance.id] = instance
+
+        if tracked:
+            for _, instance in created + [(index, instance) for index, _, instance in updated]:
+                if instance.category_id in self.written_categories:
+                    instance.category = self.written_categories[instance.category_id]
+            record_bulk_changes(
+                model.rollup_kind,
+                created=[instance for _, instance in created],
+                updated=[(previous, instance) for _, previous, instance in updated],
+            )
+
+        for status_code, entries in ((201, created), (200, [(index, instance) for index, _, instance in updated])):
+            for index, instance in entries:
+                self.results[index] = {
+                    'index': index,
+                    'status': status_code,
+                    'id': instance.id,
+                    'data': serializer_class(instance, context=self.context).data,
+                }
+
+    def _apply_deletes(self, model_name, validated):
+        model = BATCH_MODELS[model_name][0]
+        deleted = [instance for _, instance in validated[model_name]['delete']]
+        if not deleted:
+            return
+        ids = [instance.id for instance in deleted]
+        if model is Category:
+            # Las señales pasan sus rollups a "sin categoría" (merge_into_uncategorized)
+            model.objects.filter(user=self.user, id__in=ids).delete()
+        else:
+            # Las señales por fila se saltan: los rollups se ajustan por bucket aquí y la
+            # versión de datos sube una vez al final del lote
+            with deletes_handled_by_caller(model):
+                model.objects.filter(user=self.user, id__in=ids).delete()
+            record_bulk_changes(model.rollup_kind, deleted=deleted)
+        for index, instance in validated[model_name]['delete']:
+            self.results[index] = {'index': index, 'status': 204, 'id': instance.id}
+
+    def _error_results(self):
+        return [
+            {'index': index, 'status': 400, 'errors': self.errors[index]}
+            if index in self.errors else {'index': index, 'status': 424}
+            for index in range(len(self.operations))
+        ]
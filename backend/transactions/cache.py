@@ -0,0 +1,211 @@
+import threading
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q
+
+from config.metrics import cache_events
+from .models import DataVersion
+
+SUMMARY_CACHE_ALIAS = 'summaries'
+# Resolvers de categorías (transactions/categories.py): caché y contadores aparte para que
+# sus consultas, mucho más frecuentes, no se mezclen con el hit ratio de los resúmenes
+CATEGORY_CACHE_ALIAS = 'categories'
+
+_MISSING = object()
+
+
+class CacheStats:
+    """Contadores de aciertos, fallos y expulsiones de una caché de proceso."""
+
+    def __init__(self, alias=SUMMARY_CACHE_ALIAS):
+        self.alias = alias
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+    def record(self, hits=0, misses=0, evictions=0):
+        with self._lock:
+            self.hits += hits
+            self.misses += misses
+            self.evictions += evictions
+        # Los mismos contadores, sumados entre workers, en /metrics/
+        for event, amount in (('hit', hits), ('miss', misses), ('eviction', evictions)):
+            if amount:
+                cache_events.inc(amount, cache=self.alias, event=event)
+
+    def snapshot(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_ratio': round(self.hits / lookups, 4) if lookups else None,
+            }
+
+
+_stats = {}
+_stats_lock = threading.Lock()
+
+
+def stats_for(alias):
+    """Contadores de la caché `alias`, compartidos por todos los hilos del proceso."""
+    with _stats_lock:
+        if alias not in _stats:
+            _stats[alias] = CacheStats(alias)
+        return _stats[alias]
+
+
+stats = stats_for(SUMMARY_CACHE_ALIAS)
+
+
+class InstrumentedLocMemCache(LocMemCache):
+    """
+    LocMemCache ya es LRU (get() mueve la clave al frente y _cull() descarta por el final);
+    esta subclase solo cuenta las entradas expulsadas al llegar a MAX_ENTRIES.
+    """
+
+    def __init__(self, name, params):
+        super().__init__(name, params)
+        # Django no pasa el alias al backend: se busca por LOCATION, que es lo que comparte LocMemCache
+        alias = next(
+            (alias for alias, config in settings.CACHES.items() if config.get('LOCATION') == name), name,
+        )
+        self.stats = stats_for(alias)
+
+    def _cull(self):
+        before = len(self._cache)
+        super()._cull()
+        self.stats.record(evictions=before - len(self._cache))
+
+
+def bump_data_version(user_id, categories=False):
+    """
+    Invalida todo lo cacheado para `user_id` (None = datos globales) incrementando su versión.
+    Con `categories` también la de categorías, que es la única que invalida los resolvers.
+    Se llama dentro de la transacción de la escritura.
+    """
+    changes = {'version': F('version') + 1}
+    if categories:
+        changes['category_version'] = F('category_version') + 1
+    versions = DataVersion.objects.filter(user_id=user_id)
+    if versions.update(**changes):
+        return
+    try:
+        with transaction.atomic():
+            DataVersion.objects.create(user_id=user_id, version=1, category_version=int(categories))
+    except IntegrityError:
+        versions.update(**changes)
+
+
+def _version_rows(user, request):
+    # {user_id: (version, category_version)} del usuario y de la fila global, una vez por petición
+    if request is not None and hasattr(request, '_version_rows'):
+        return request._version_rows
+    rows = {
+        user_id: (version, category_version)
+        for user_id, version, category_version in DataVersion.objects.filter(
+            Q(user=user) | Q(user__isnull=True)
+        ).values_list('user_id', 'version', 'category_version')
+    }
+    if request is not None:
+        request._version_rows = rows
+    return rows
+
+
+def get_data_versions(user, request=None):
+    """
+    Devuelve (versión del usuario, versión global) en una sola consulta.
+    Si se pasa `request`, el resultado se reutiliza durante esa petición (ETag + caché).
+    """
+    if request is not None and hasattr(request, '_data_versions'):
+        return request._data_versions
+    rows = _version_rows(user, request)
+    versions = (rows.get(user.pk, (0, 0))[0], rows.get(None, (0, 0))[0])
+    if request is not None:
+        request._data_versions = versions
+    return versions
+
+
+def get_category_versions(user, request=None):
+    """(versión de categorías del usuario, la global): la misma consulta que get_data_versions()."""
+    rows = _version_rows(user, request)
+    return rows.get(user.pk, (0, 0))[1], rows.get(None, (0, 0))[1]
+
+
+def get_or_compute(request, name, compute, *key_parts, timeout=None):
+    """
+    Devuelve compute() cacheado por usuario y versión de datos. Como la versión forma parte
+    de la clave, cualquier escritura deja inaccesibles las entradas anteriores, que acaban
+    saliendo por LRU: nunca se sirve un resultado obsoleto.
+    """
+    return get_or_compute_for_user(request.user, name, compute, *key_parts, request=request, timeout=timeout)
+
+
+def get_or_compute_for_user(user, name, compute, *key_parts, request=None, timeout=None, alias=SUMMARY_CACHE_ALIAS,
+                            versions=get_data_versions):
+    """
+    Como get_or_compute() para código sin petición (importaciones, comandos) o con otra caché.
+    `versions(user, request)` da el par de versiones de la clave (get_category_versions para
+    lo que solo depende de las categorías).
+    """
+    user_version, global_version = versions(user, request)
+    key = ':'.join(str(part) for part in (name, user.pk, user_version, global_version, *key_parts))
+    cache = caches[alias]
+    cache_stats = stats_for(alias)
+
+    value = cache.get(key, _MISSING)
+    if value is not _MISSING:
+        cache_stats.record(hits=1)
+        return value
+
+    cache_stats.record(misses=1)
+    value = compute()
+    if timeout is None:
+        cache.set(key, value)
+    else:
+        cache.set(key, value, timeout)
+    return value
+
+
+async def aget_or_compute(request, name, acompute, *key_parts, timeout=None):
+    """Versión async de get_or_compute() para las vistas async; `acompute` es una corrutina."""
+    user = request.user
+    # conditional_get ya suele haberlas leído: así se ahorra un salto al hilo síncrono
+    versions = getattr(request, '_data_versions', None)
+    if versions is None:
+        versions = await sync_to_async(get_data_versions)(user, request)
+    user_version, global_version = versions
+    key = ':'.join(str(part) for part in (name, user.pk, user_version, global_version, *key_parts))
+    cache = caches[SUMMARY_CACHE_ALIAS]
+
+    value = await cache.aget(key, _MISSING)
+    if value is not _MISSING:
+        stats.record(hits=1)
+        return value
+
+    stats.record(misses=1)
+    value = await acompute()
+    if timeout is None:
+        await cache.aset(key, value)
+    else:
+        await cache.aset(key, value, timeout)
+    return value
+
+
+def cache_info(alias=SUMMARY_CACHE_ALIAS):
+    info = stats_for(alias).snapshot()
+    cache = caches[alias]
+    if isinstance(cache, LocMemCache):
+        info['entries'] = len(cache._cache)
+        info['max_entries'] = cache._max_entries
+    return info
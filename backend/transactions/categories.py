@@ -0,0 +1,87 @@
+"""
+Resolución de categorías visibles para un usuario (las suyas y las globales).
+
+Serializers, filtros e importaciones preguntan por categorías muchas veces en una
+misma petición. CategoryResolver las carga todas de una vez y:
+  * se reutiliza durante la petición (request._category_resolver),
+  * se guarda en su propia caché de proceso (CATEGORY_CACHE_ALIAS, con contadores
+    aparte de los de resúmenes), con la versión de categorías en la clave, así que
+    cualquier escritura de categorías (signals -> bump_data_version(categories=True)) la
+    invalida en todos los procesos, y las de ingresos y gastos no. La caché es LRU y
+    acotada por MAX_ENTRIES.
+"""
+from django.db.models import Q
+
+from .cache import CATEGORY_CACHE_ALIAS, get_category_versions, get_or_compute_for_user
+from .models import Category
+
+
+class CategoryResolver:
+
+    def __init__(self, user, categories):
+        self.user = user
+        self.by_id = {category.id: category for category in categories}
+        self._own_names = {}
+        self._global_names = {}
+        for category in categories:
+            names = self._global_names if category.user_id is None else self._own_names
+            names[category.name.lower()] = category
+
+    def get(self, category_id):
+        """Categoría visible con ese id, o None (no existe o es de otro usuario)."""
+        try:
+            return self.by_id.get(int(category_id))
+        except (TypeError, ValueError):
+            return None
+
+    def own_named(self, name):
+        return self._own_names.get(name.lower())
+
+    def global_named(self, name):
+        return self._global_names.get(name.lower())
+
+    def named(self, name):
+        """Por nombre sin distinguir mayúsculas; si hay una propia y una global, gana la propia."""
+        return self.own_named(name) or self.global_named(name)
+
+    def __iter__(self):
+        return iter(self.by_id.values())
+
+
+def load_categories(user):
+    if user is None or not user.is_authenticated:
+        return list(Category.objects.filter(user__isnull=True))
+    return list(Category.objects.filter(Q(user=user) | Q(user__isnull=True)))
+
+
+def get_category_resolver(user, request=None):
+    """
+    Resolver del usuario: como mucho una consulta de categorías por petición y
+    ninguna mientras la caché de proceso siga vigente.
+    """
+    if request is not None:
+        resolver = getattr(request, '_category_resolver', None)
+        if resolver is not None and resolver.user == user:
+            return resolver
+
+    if user is None or not user.is_authenticated:
+        # Solo las globales; sin usuario no hay versión de categorías con la que cachear
+        resolver = CategoryResolver(user, load_categories(None))
+    else:
+        categories = get_or_compute_for_user(
+            user, 'category-resolver', lambda: load_categories(user), request=request, alias=CATEGORY_CACHE_ALIAS,
+            versions=get_category_versions,
+        )
+        resolver = CategoryResolver(user, categories)
+
+    if request is not None:
+        request._category_resolver = resolver
+    return resolver
+
+
+def resolver_from_context(context):
+    """Resolver a partir del contexto de un serializer, o None si no hay petición."""
+    request = context.get('request')
+    if request is None or not hasattr(request, 'user'):
+        return None
+    return get_category_resolver(request.user, request)
@@ -0,0 +1,135 @@
+"""
+Agrupación de altas concurrentes en una sola transacción (settings.WRITE_COALESCING).
+
+Con SQLite cada transacción de escritura toma el único bloqueo de escritura y hace su
+commit (fsync del WAL). Cuando varios hilos del proceso crean ingresos o gastos a la vez,
+WriteCoalescer los pasa a un hilo escritor que los guarda juntos:
+  * cada alta va en su propio savepoint, así que un error solo afecta a esa alta,
+  * el hilo que la pidió espera al commit y recibe la instancia guardada o la excepción,
+  * save() sigue ejecutándose entero (huella, rollups, señales de versión de datos).
+shutdown() (también al salir del proceso) escribe lo que ya está en cola y para el hilo.
+"""
+import atexit
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+
+# Marca de fin en la cola del hilo escritor
+_STOP = object()
+
+
+class WriteCoalescer:
+
+    def __init__(self, max_batch=64, max_wait=0.002):
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self._queue = None
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def save(self, instance):
+        """Guarda `instance` en el próximo lote y la devuelve cuando el lote se confirma."""
+        future = Future()
+        # Con el lock: un shutdown() a la vez no deja el alta detrás de la marca de fin
+        with self._lock:
+            self._ensure_started()
+            self._queue.put((instance, future))
+        return future.result()
+
+    def shutdown(self, timeout=None):
+        """Escribe las altas pendientes y para el hilo escritor. Un save() posterior lo vuelve a arrancar."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+            if thread is None:
+                return
+            self._queue.put(_STOP)
+        thread.join(timeout)
+
+    def _ensure_started(self):
+        if self._thread is None or not self._thread.is_alive():
+            # Cada hilo con su cola: uno nuevo no puede llevarse la marca de fin del anterior
+            self._queue = queue.Queue()
+            self._thread = threading.Thread(target=self._run, args=(self._queue,), name='write-coalescer', daemon=True)
+            self._thread.start()
+
+    def _next_batch(self, pending):
+        """(lote, si hay que parar después de escribirlo)."""
+        first = pending.get()
+        if first is _STOP:
+            return [], True
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = pending.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is _STOP:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _run(self, pending):
+        stop = False
+        while not stop:
+            batch, stop = self._next_batch(pending)
+            if batch:
+                close_old_connections()
+                self._write(batch)
+        connection.close()
+
+    def _write(self, batch):
+        saved = []
+        try:
+            with transaction.atomic():
+                for instance, future in batch:
+                    try:
+                        with transaction.atomic():
+                            instance.save()
+                    except Exception as exc:
+                        future.set_exception(exc)
+                    else:
+                        saved.append((instance, future))
+        except Exception as exc:
+            # Falló la transacción del lote (BEGIN o commit): no quedó guardada ninguna alta
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+        for instance, future in saved:
+            future.set_result(instance)
+
+
+_coalescer = None
+_coalescer_lock = threading.Lock()
+
+
+def get_write_coalescer():
+    global _coalescer
+    with _coalescer_lock:
+        if _coalescer is None:
+            _coalescer = WriteCoalescer(
+                max_batch=settings.WRITE_COALESCING_MAX_BATCH,
+                max_wait=settings.WRITE_COALESCING_MAX_WAIT,
+            )
+            # El hilo es daemon: sin esto, las altas en cola al salir se perderían
+            atexit.register(_coalescer.shutdown)
+        return _coalescer
+
+
+def save_coalesced(instance):
+    """
+    Guarda una alta de Income o Expense, agrupada con otras si WRITE_COALESCING está activo.
+    Dentro de un atomic() se guarda directamente: el hilo escritor no vería esa transacción.
+    """
+    if not settings.WRITE_COALESCING or transaction.get_connection().in_atomic_block:
+        instance.save()
+        return instance
+    return get_write_coalescer().save(instance)
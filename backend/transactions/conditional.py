@@ -0,0 +1,71 @@
+import hashlib
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.http import parse_etags, quote_etag
+from rest_framework import status
+from rest_framework.response import Response
+
+from .cache import get_data_versions
+
+
+def compute_etag(scope, request, extra=''):
+    """
+    ETag fuerte a partir del contador de cambios del usuario (DataVersion), sin tocar
+    las tablas de movimientos ni serializar nada. La ruta completa (filtros, cursor,
+    ordenación) y el Accept forman parte de la huella porque cambian el cuerpo.
+    `extra` recoge lo que también cambia el cuerpo sin estar en la URL (p. ej. la fecha de hoy).
+    """
+    user_version, global_version = get_data_versions(request.user, request)
+    variant = hashlib.sha1(
+        f"{request.get_full_path()}|{request.META.get('HTTP_ACCEPT', '')}|{extra}".encode('utf-8')
+    ).hexdigest()[:16]
+    return quote_etag(f"{scope}-{request.user.pk}-{user_version}-{global_version}-{variant}")
+
+
+def conditional_get(scope, vary=None):
+    """
+    Decorador para list()/retrieve()/get() de las vistas: si If-None-Match coincide con
+    el ETag actual responde 304 sin ejecutar la vista (ni consultas ni serializers).
+    `vary(request)` devuelve un texto extra para la huella del ETag.
+    También acepta métodos async (transactions/async_views.py).
+    """
+    def etag_for(request):
+        return compute_etag(scope, request, vary(request) if vary else '')
+
+    def not_modified(request, etag):
+        if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+        return bool(if_none_match) and (etag in parse_etags(if_none_match) or if_none_match.strip() == '*')
+
+    def finish(response, etag):
+        response['ETag'] = etag
+        # El navegador guarda la respuesta pero revalida siempre con If-None-Match
+        patch_cache_control(response, private=True, no_cache=True)
+        patch_vary_headers(response, ('Authorization', 'Accept'))
+        return response
+
+    def decorator(method):
+        if iscoroutinefunction(method):
+            @wraps(method)
+            async def async_wrapper(self, request, *args, **kwargs):
+                etag = await sync_to_async(etag_for)(request)
+                if not_modified(request, etag):
+                    return finish(Response(status=status.HTTP_304_NOT_MODIFIED), etag)
+                response = await method(self, request, *args, **kwargs)
+                if response.status_code != status.HTTP_200_OK:
+                    return response
+                return finish(response, etag)
+            return async_wrapper
+
+        @wraps(method)
+        def wrapper(self, request, *args, **kwargs):
+            etag = etag_for(request)
+            if not_modified(request, etag):
+                return finish(Response(status=status.HTTP_304_NOT_MODIFIED), etag)
+            response = method(self, request, *args, **kwargs)
+            if response.status_code != status.HTTP_200_OK:
+                return response
+            return finish(response, etag)
+        return wrapper
+    return decorator
@@ -0,0 +1,212 @@
+"""
+Lectura rápida de los listados de ingresos y gastos.
+
+En un GET de listado casi todo el tiempo de CPU se va en la maquinaria de campos de DRF:
+get_attribute y to_representation por campo y fila, el recorrido de source='category.name',
+y el formateo de Decimal y fechas (con un contexto decimal nuevo por importe). Aquí se
+compila, una vez por petición, un plan a partir del serializer de la vista (ya recortado
+por ?fields=): la columna de .values() de cada campo y una función de conversión con todo
+lo que no depende de la fila precalculado. Las filas se leen como diccionarios y se
+convierten con ese plan, sin instancias de modelo.
+
+El JSON resultante es idéntico byte a byte al del serializer (benchmarks/serialization.py
+y transactions/tests.py lo comprueban). Si el serializer tiene algún campo que el plan no
+sabe reproducir (SerializerMethodField, un source='*', un to_representation propio...) la
+vista usa el serializer normal. Se desactiva con FAST_LIST_SERIALIZATION = False.
+
+Como no pasa por Serializer.data, el tiempo de RowPlan.serialize se suma a mano al de
+serializer de Server-Timing (config/server_timing.py).
+"""
+import decimal
+import time
+
+from django.conf import settings
+from rest_framework import fields, relations
+from rest_framework.settings import ISO_8601, api_settings
+
+from config.server_timing import current_timings
+from .serializers import OwnerUsernameField
+
+
+def _decimal_converter(field):
+    coerce_to_string = getattr(field, 'coerce_to_string', api_settings.COERCE_DECIMAL_TO_STRING)
+    if field.localize or field.decimal_places is None:
+        return field.to_representation
+    quantum = decimal.Decimal('.1') ** field.decimal_places
+    context = decimal.getcontext().copy()
+    if field.max_digits is not None:
+        context.prec = field.max_digits
+    rounding = field.rounding
+
+    def convert(value):
+        if not isinstance(value, decimal.Decimal):
+            value = decimal.Decimal(str(value).strip())
+        quantized = value.quantize(quantum, rounding=rounding, context=context)
+        return '{:f}'.format(quantized) if coerce_to_string else quantized
+    return convert
+
+
+def _date_converter(field):
+    output_format = getattr(field, 'format', api_settings.DATE_FORMAT)
+    if output_format is None:
+        return None
+    if output_format.lower() == ISO_8601:
+        return lambda value: value.isoformat() if value else None
+    return field.to_representation
+
+
+def _datetime_converter(field):
+    output_format = getattr(field, 'format', api_settings.DATETIME_FORMAT)
+    if output_format is None:
+        return None
+    if output_format.lower() != ISO_8601 or not settings.USE_TZ:
+        return field.to_representation
+    # Lo que hace enforce_timezone() con un datetime aware, con la zona resuelta una vez
+    field_timezone = field.timezone if hasattr(field, 'timezone') else field.default_timezone()
+
+    def convert(value):
+        if not value:
+            return None
+        value = value.astimezone(field_timezone).isoformat()
+        return value[:-6] + 'Z' if value.endswith('+00:00') else value
+    return convert
+
+
+def _choice_converter(field):
+    choices = field.choice_strings_to_values
+    return lambda value: value if value == '' else choices.get(str(value), value)
+
+
+def _owner_converter(field, context):
+    # Los listados son siempre del usuario de la petición: su username sale de request.user
+    request = context.get('request')
+    user = getattr(request, 'user', None)
+    usernames = {user.pk: user.username} if user is not None and user.is_authenticated else {}
+
+    def convert(user_id):
+        if user_id not in usernames:
+            from django.contrib.auth.models import User
+            usernames[user_id] = User.objects.values_list('username', flat=True).get(pk=user_id)
+        return usernames[user_id]
+    return convert
+
+
+def _overrides(field, base, *names):
+    return any(getattr(type(field), name) is not getattr(base, name) for name in names)
+
+
+def compile_field(field, context):
+    """(columna de .values(), conversión o None si el valor sale tal cual), o None si no se sabe."""
+    if field.source == '*':
+        return None
+    lookup = '__'.join(field.source_attrs)
+
+    if isinstance(field, OwnerUsernameField):
+        return 'user_id', _owner_converter(field, context)
+    if isinstance(field, relations.PrimaryKeyRelatedField):
+        # values('category') devuelve category_id, lo mismo que PKOnlyObject.pk
+        if field.pk_field is not None or _overrides(field, relations.PrimaryKeyRelatedField, 'get_attribute', 'to_representation', 'use_pk_only_optimization'):
+            return None
+        return lookup, None
+
+    for base, factory in CONVERTERS:
+        if isinstance(field, base):
+            if _overrides(field, base, 'get_attribute', 'to_representation'):
+                return None
+            return lookup, factory(field)
+    return None
+
+
+# Se usa la primera base que coincida: una subclase nueva debe ir antes que su base
+CONVERTERS = [
+    (fields.IntegerField, lambda field: None), # int(valor): la base ya devuelve int
+    (fields.CharField, lambda field: None), # str(valor): la base ya devuelve str
+    (fields.DecimalField, _decimal_converter),
+    (fields.DateTimeField, _datetime_converter),
+    (fields.DateField, _date_converter),
+    (fields.ChoiceField, _choice_converter),
+    (fields.BooleanField, lambda field: None),
+    (fields.ReadOnlyField, lambda field: None),
+]
+
+
+class RowPlan:
+    """Campos de salida, columnas de .values() y conversiones de un serializer."""
+
+    def __init__(self, names, lookups, converters):
+        self.names = names
+        self.lookups = lookups
+        self.converters = converters
+        self.steps = list(zip(names, lookups, converters))
+
+    @classmethod
+    def for_serializer(cls, serializer):
+        """Plan del serializer (una instancia, con su contexto), o None si no es compilable."""
+        names, lookups, converters = [], [], []
+        for name, field in serializer.fields.items():
+            if field.write_only:
+                continue
+            compiled = compile_field(field, serializer.context)
+            if compiled is None:
+                return None
+            names.append(name)
+            lookups.append(compiled[0])
+            converters.append(compiled[1])
+        return cls(names, lookups, converters)
+
+    def values(self, queryset, *extra):
+        """Queryset de diccionarios con las columnas del plan y las que se pidan además (cursor)."""
+        return queryset.values(*dict.fromkeys(self.lookups + list(extra)))
+
+    def serialize(self, rows):
+        steps = self.steps
+        data = []
+        append = data.append
+        for row in rows:
+            item = {}
+            for name, lookup, convert in steps:
+                value = row[lookup]
+                # Como Serializer.to_representation: un None sale como None sin pasar por el campo
+                item[name] = value if value is None or convert is None else convert(value)
+            append(item)
+        return data
+
+
+def fast_lists_enabled():
+    return getattr(settings, 'FAST_LIST_SERIALIZATION', True)
+
+
+class FastListMixin:
+    """
+    Listado paginado por cursor que, si el serializer es compilable, lee .values() y
+    serializa con RowPlan. Con la misma respuesta que ListModelMixin.list().
+    """
+
+    def fast_plan(self):
+        if not fast_lists_enabled():
+            return None
+        return RowPlan.for_serializer(self.get_serializer())
+
+    def fast_serialize(self, plan, page):
+        # Server-Timing mide Serializer.data, por donde este camino no pasa
+        timings = current_timings()
+        if timings is None:
+            return plan.serialize(page)
+        started = time.perf_counter()
+        try:
+            return plan.serialize(page)
+        finally:
+            timings.serializer += time.perf_counter() - started
+
+    def cursor_columns(self, queryset):
+        # Columnas que KeysetPagination lee de la última fila para construir el cursor
+        return [field.lstrip('-') for field in self.paginator.get_ordering(self.request, queryset, self)]
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        plan = self.fast_plan()
+        if plan is None:
+            page = self.paginate_queryset(queryset)
+            return self.get_paginated_response(self.get_serializer(page, many=True).data)
+        page = self.paginate_queryset(plan.values(queryset, *self.cursor_columns(queryset)))
+        return self.get_paginated_response(self.fast_serialize(plan, page))
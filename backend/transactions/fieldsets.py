@@ -0,0 +1,82 @@
+"""
+Campos a medida en las lecturas de ingresos y gastos: ?fields=id,date,amount,category_name
+
+Recorta a la vez el SELECT y la respuesta:
+  * SparseFieldsetMixin (serializers) quita de la salida los campos no pedidos,
+  * SparseFieldsetViewMixin (vistas) añade .only() con las columnas de esos campos y solo
+    hace el JOIN con la categoría si se pide category_name. Las columnas de la paginación
+    por cursor se leen siempre; si no, cada fila las cargaría con otra consulta.
+Solo se aplica a GET/HEAD: las escrituras responden siempre con todos los campos.
+Un campo desconocido devuelve 400 con la lista de los válidos.
+"""
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import SAFE_METHODS
+
+FIELDS_PARAM = 'fields'
+
+_readable_fields = {}
+
+
+def readable_fields(serializer_class):
+    """Nombres de los campos de salida del serializer, en orden (se calcula una vez por clase)."""
+    names = _readable_fields.get(serializer_class)
+    if names is None:
+        names = tuple(name for name, field in serializer_class().fields.items() if not field.write_only)
+        _readable_fields[serializer_class] = names
+    return names
+
+
+def requested_fields(request, serializer_class):
+    """Campos de ?fields= en el orden del serializer, o None si no se piden (o no es una lectura)."""
+    if request is None or request.method not in SAFE_METHODS:
+        return None
+    raw = request.query_params.get(FIELDS_PARAM)
+    if not raw:
+        return None
+    wanted = {name.strip() for name in raw.split(',') if name.strip()}
+    available = readable_fields(serializer_class)
+    unknown = wanted.difference(available)
+    if unknown:
+        raise ValidationError({FIELDS_PARAM: [
+            f"Campos desconocidos: {', '.join(sorted(unknown))}. Disponibles: {', '.join(available)}."
+        ]})
+    return [name for name in available if name in wanted]
+
+
+class SparseFieldsetMixin:
+    """Serializer que, en lecturas con ?fields=, solo tiene los campos pedidos."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        fields = requested_fields(self.context.get('request'), type(self))
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+
+class SparseFieldsetViewMixin:
+    """Vista que lee de la base solo las columnas de los campos pedidos en ?fields=."""
+    # Columnas que se leen siempre: claves de KeysetPagination y de ?ordering=
+    sparse_always = ('id', 'date', 'created_at', 'amount')
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        fields = requested_fields(self.request, self.get_serializer_class())
+        if fields is None:
+            return queryset
+
+        serializer_fields = self.get_serializer_class()().fields
+        columns = set(self.sparse_always)
+        related = set()
+        for name in fields:
+            source_attrs = serializer_fields[name].source.split('.')
+            # category_name -> category__name (JOIN); category -> category_id (sin JOIN)
+            columns.add('__'.join(source_attrs))
+            if len(source_attrs) > 1:
+                related.add('__'.join(source_attrs[:-1]))
+        # Un select_related de una relación diferida es un error: se rehace con lo que haga falta
+        # (select_related() sin argumentos uniría todas las relaciones)
+        queryset = queryset.select_related(None)
+        if related:
+            queryset = queryset.select_related(*related)
+        return queryset.only(*columns)
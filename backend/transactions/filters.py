@@ -1,16 +1,59 @@
+import calendar
+from datetime import date
+
 import django_filters
-from .models import Income, Category
+from django import forms
+from .categories import get_category_resolver
+from .models import Income, Expense, Category
+from .search import search_queryset
 from django.db.models import Q
 
-class IncomeFilter(django_filters.FilterSet):
-    # Filtro para el mes (número del 1 al 12)
-    month = django_filters.NumberFilter(field_name='date', lookup_expr='month')
+
+class CategoryChoiceField(forms.ModelChoiceField):
+    """
+    Valida la categoría contra el resolver de la petición (sin consulta propia). El queryset
+    solo se usa para mostrar las opciones en el formulario del API navegable.
+    """
+
+    def __init__(self, *args, resolver=None, **kwargs):
+        self.resolver = resolver
+        super().__init__(*args, **kwargs)
+
+    def to_python(self, value):
+        if self.resolver is None or value in self.empty_values:
+            return super().to_python(value)
+        category = self.resolver().get(value)
+        if category is None:
+            raise forms.ValidationError(self.error_messages['invalid_choice'], code='invalid_choice')
+        return category
+
+
+class CategoryChoiceFilter(django_filters.ModelChoiceFilter):
+    field_class = CategoryChoiceField
+
+
+class TransactionFilter(django_filters.FilterSet):
+    """
+    Filtros comunes de ingresos y gastos. Todos se traducen en comparaciones directas
+    sobre las columnas (date BETWEEN ..., amount >= ...), así que pueden usar el índice
+    (user, -date, -created_at, -id) en vez de evaluar una función por fila.
+    """
+    # Filtro para el mes (número del 1 al 12). Junto con year se convierte en un rango de fechas
+    month = django_filters.NumberFilter(method='filter_period', min_value=1, max_value=12)
     # Filtro para el año (número de 4 dígitos)
-    year = django_filters.NumberFilter(field_name='date', lookup_expr='year')
+    year = django_filters.NumberFilter(method='filter_period', min_value=1, max_value=9999)
+    # Rango de fechas (ambos extremos incluidos)
+    date_from = django_filters.DateFilter(field_name='date', lookup_expr='gte')
+    date_to = django_filters.DateFilter(field_name='date', lookup_expr='lte')
+    # Rango de montos (ambos extremos incluidos)
+    amount_min = django_filters.NumberFilter(field_name='amount', lookup_expr='gte')
+    amount_max = django_filters.NumberFilter(field_name='amount', lookup_expr='lte')
+    # Búsqueda de texto (FTS5 en SQLite), ordenada por relevancia si no se pide otro orden
+    search = django_filters.CharFilter(method='filter_search')
     # Filtro para categoría (ID de la categoría)
-    category = django_filters.ModelChoiceFilter(
+    category = CategoryChoiceFilter(
         queryset=Category.objects.none(), # Queryset inicial, se actualiza en __init__
-        label="Categoría" 
+        label="Categoría"
     )
     # Campo para ordenación
     ordering = django_filters.OrderingFilter(
@@ -21,10 +64,6 @@ class IncomeFilter(django_filters.FilterSet):
         label="Ordenar por"
     )
 
-    class Meta:
-        model = Income
-        fields = ['category', 'month', 'year'] # Campos base sobre los que se puede filtrar
-
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         # Modificar el queryset del filtro de categoría para que solo muestre
@@ -34,6 +73,50 @@ class IncomeFilter(django_filters.FilterSet):
             self.filters['category'].queryset = Category.objects.filter(
                 Q(user=request.user) | Q(user__isnull=True)
             )
+            # Se resuelve solo si llega ?category=, y reutiliza el resolver de la petición
+            self.filters['category'].extra['resolver'] = lambda: get_category_resolver(request.user, request)
         elif not request: # Para permitir usar el filtro en otros contextos, como tests sin request
             self.filters['category'].queryset = Category.objects.all()
 
+    def filter_search(self, queryset, name, value):
+        user = getattr(self.request, 'user', None)
+        return search_queryset(queryset, self.search_kind, value, user if user and user.is_authenticated else None)
+
+    def filter_period(self, queryset, name, value):
+        # month y year se aplican juntos en filter_queryset()
+        return queryset
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        month = self.form.cleaned_data.get('month')
+        year = self.form.cleaned_data.get('year')
+        if year is not None:
+            year = int(year)
+            if month is not None:
+                month = int(month)
+                last_day = calendar.monthrange(year, month)[1]
+                return queryset.filter(date__range=(date(year, month, 1), date(year, month, last_day)))
+            return queryset.filter(date__range=(date(year, 1, 1), date(year, 12, 31)))
+        if month is not None:
+            # Un mes de cualquier año no es un rango continuo: se mantiene el lookup por mes
+            return queryset.filter(date__month=int(month))
+        return queryset
+
+
+class IncomeFilter(TransactionFilter):
+    search_kind = 'income'
+    # Income no tiene método de pago; su equivalente es la fuente del ingreso
+    source = django_filters.CharFilter(field_name='source', lookup_expr='iexact')
+
+    class Meta:
+        model = Income
+        fields = ['category', 'month', 'year', 'date_from', 'date_to', 'amount_min', 'amount_max', 'source', 'search']
+
+
+class ExpenseFilter(TransactionFilter):
+    search_kind = 'expense'
+    payment_method = django_filters.CharFilter(field_name='payment_method', lookup_expr='iexact')
+
+    class Meta:
+        model = Expense
+        fields = ['category', 'month', 'year', 'date_from', 'date_to', 'amount_min', 'amount_max', 'payment_method', 'search']
@@ -0,0 +1,268 @@
+import csv
+import io
+import json
+from collections import Counter
+from itertools import islice
+
+from django.db import transaction
+from django.db.models import Count
+from rest_framework import serializers
+
+from .cache import bump_data_version
+from .categories import get_category_resolver
+from .models import Expense, Income, transaction_fingerprint
+from .rollups import record_bulk_create
+
+IMPORT_FORMATS = ('csv', 'ndjson', 'json')
+MAX_REPORTED_ERRORS = 500
+
+
+# Validación por fila sin consultas: la categoría se resuelve después, una vez por lote.
+
+class IncomeImportRowSerializer(serializers.Serializer):
+    amount = serializers.DecimalField(max_digits=10, decimal_places=2)
+    date = serializers.DateField()
+    category = serializers.IntegerField(required=False, allow_null=True)
+    category_name = serializers.CharField(max_length=100, required=False, allow_null=True)
+    source = serializers.CharField(max_length=100, required=False, allow_blank=True, default='')
+    recurrence = serializers.ChoiceField(choices=Income.RECURRENCE_CHOICES, required=False, default='none')
+    description = serializers.CharField(required=False, allow_blank=True, default='')
+
+    def validate_amount(self, value):
+        if value <= 0:
+            raise serializers.ValidationError("El monto del ingreso debe ser positivo.")
+        return value
+
+
+class ExpenseImportRowSerializer(serializers.Serializer):
+    description = serializers.CharField(max_length=255)
+    amount = serializers.DecimalField(max_digits=10, decimal_places=2)
+    date = serializers.DateField()
+    category = serializers.IntegerField(required=False, allow_null=True)
+    category_name = serializers.CharField(max_length=100, required=False, allow_null=True)
+    payment_method = serializers.CharField(max_length=50, required=False, allow_null=True)
+    recurrence = serializers.CharField(max_length=50, required=False, allow_null=True)
+
+
+IMPORT_KINDS = {
+    'income': (Income, IncomeImportRowSerializer),
+    'expense': (Expense, ExpenseImportRowSerializer),
+}
+
+
+def detect_format(filename='', explicit=None):
+    if explicit:
+        if explicit not in IMPORT_FORMATS:
+            raise ValueError(f"Formato no soportado: {explicit}. Use uno de {', '.join(IMPORT_FORMATS)}.")
+        return explicit
+    lowered = (filename or '').lower()
+    if lowered.endswith(('.ndjson', '.jsonl')):
+        return 'ndjson'
+    if lowered.endswith('.json'):
+        return 'json'
+    return 'csv'
+
+
+def iter_rows(binary_file, file_format):
+    """Itera las filas del fichero sin cargarlo entero en memoria."""
+    text = io.TextIOWrapper(binary_file, encoding='utf-8-sig', newline='')
+    if file_format == 'csv':
+        return csv.DictReader(text)
+    if file_format == 'ndjson':
+        return _iter_ndjson(text)
+    return _iter_json_array(text)
+
+
+def _iter_ndjson(text):
+    for line_number, line in enumerate(text, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except json.JSONDecodeError as exc:
+            raise ValueError(f"JSON inválido en la línea {line_number}: {exc.msg}")
+
+
+def _iter_json_array(text, chunk_size=64 * 1024):
+    """Decodifica un array JSON de objetos elemento a elemento, leyendo por bloques."""
+    decoder = json.JSONDecoder()
+    buffer = ''
+    started = False
+
+    def fill():
+        nonlocal buffer
+        chunk = text.read(chunk_size)
+        buffer += chunk
+        return bool(chunk)
+
+    while True:
+        buffer = buffer.lstrip()
+        if not buffer:
+            if not fill():
+                raise ValueError("JSON incompleto: falta el cierre del array.")
+            continue
+        if not started:
+            if buffer[0] != '[':
+                raise ValueError("Se esperaba un array JSON de objetos.")
+            buffer = buffer[1:]
+            started = True
+            continue
+        if buffer[0] == ']':
+            return
+        if buffer[0] == ',':
+            buffer = buffer[1:]
+            continue
+        try:
+            item, end = decoder.raw_decode(buffer)
+        except json.JSONDecodeError as exc:
+            # El objeto puede estar partido entre dos bloques
+            if not fill():
+                raise ValueError(f"JSON inválido: {exc.msg}")
+            continue
+        buffer = buffer[end:]
+        yield item
+
+
+def _clean_row(raw):
+    """Normaliza una fila de CSV/JSON: recorta textos y descarta vacíos para que apliquen los defaults."""
+    if not isinstance(raw, dict):
+        return None
+    row = {}
+    for key, value in raw.items():
+        if key is None:
+            continue
+        key = key.strip()
+        if isinstance(value, str):
+            value = value.strip()
+        if value in ('', None):
+            continue
+        row[key] = value
+    # ExpenseSerializer recibe la categoría como category_id
+    if 'category_id' in row and 'category' not in row:
+        row['category'] = row.pop('category_id')
+    return row
+
+
+class TransactionImporter:
+    """
+    Importa ingresos o gastos por lotes:
+      * valida cada fila sin consultas,
+      * resuelve las categorías con el resolver del usuario (una consulta como mucho),
+      * descarta filas ya importadas comparando su huella con el índice (user, fingerprint),
+      * inserta con bulk_create dentro de una transacción por lote (con rollups y versión de datos).
+    """
+
+    def __init__(self, user, kind, batch_size=500, request=None):
+        self.user = user
+        self.request = request
+        self.kind = kind
+        self.model, self.row_serializer = IMPORT_KINDS[kind]
+        self.batch_size = batch_size
+        self.created = 0
+        self.duplicates = 0
+        self.total_rows = 0
+        self.error_count = 0
+        self.errors = []
+        # Cuántas veces aparece cada huella en la base (antes de esta importación) y en el fichero
+        self._existing = {}
+        self._seen = Counter()
+        self._categories = None
+
+    def run(self, rows):
+        numbered = enumerate(rows, start=1)
+        while True:
+            batch = list(islice(numbered, self.batch_size))
+            if not batch:
+                break
+            self._process_batch(batch)
+        return self.result()
+
+    def result(self):
+        return {
+            'total_rows': self.total_rows,
+            'created': self.created,
+            'duplicates': self.duplicates,
+            'error_count': self.error_count,
+            'errors': self.errors,
+        }
+
+    def _add_error(self, row_number, errors):
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'row': row_number, 'errors': errors})
+
+    def _process_batch(self, batch):
+        self.total_rows += len(batch)
+        valid = []
+        for row_number, raw in batch:
+            row = _clean_row(raw)
+            if row is None:
+                self._add_error(row_number, {'non_field_errors': ["Cada fila debe ser un objeto."]})
+                continue
+            serializer = self.row_serializer(data=row)
+            if not serializer.is_valid():
+                self._add_error(row_number, serializer.errors)
+                continue
+            valid.append((row_number, serializer.validated_data))
+
+        candidates = []
+        for row_number, data in valid:
+            data = dict(data)
+            category_id = data.pop('category', None)
+            category_name = data.pop('category_name', None)
+            if category_id is not None:
+                category = self.categories.get(category_id)
+                if category is None:
+                    self._add_error(row_number, {'category': ["Categoría no válida o no pertenece al usuario."]})
+                    continue
+            elif category_name:
+                category = self.categories.named(category_name)
+                if category is None:
+                    self._add_error(row_number, {'category_name': ["No existe una categoría con este nombre."]})
+                    continue
+            else:
+                category = None
+            fingerprint = transaction_fingerprint(data['date'], data['amount'], data.get('description'))
+            candidates.append(self.model(user=self.user, category=category, fingerprint=fingerprint, **data))
+
+        self._load_existing({obj.fingerprint for obj in candidates})
+        to_create = []
+        for obj in candidates:
+            self._seen[obj.fingerprint] += 1
+            if self._seen[obj.fingerprint] <= self._existing[obj.fingerprint]:
+                self.duplicates += 1
+            else:
+                to_create.append(obj)
+
+        if to_create:
+            with transaction.atomic():
+                self.model.objects.bulk_create(to_create)
+                record_bulk_create(self.kind, to_create)
+                bump_data_version(self.user.pk)
+            self.created += len(to_create)
+
+    @property
+    def categories(self):
+        # Se carga con la primera fila que trae categoría; la importación no crea categorías
+        if self._categories is None:
+            self._categories = get_category_resolver(self.user, self.request)
+        return self._categories
+
+    def _load_existing(self, fingerprints):
+        pending = [fp for fp in fingerprints if fp not in self._existing]
+        if not pending:
+            return
+        counts = dict(
+            self.model.objects.filter(user=self.user, fingerprint__in=pending)
+            .order_by()
+            .values('fingerprint')
+            .annotate(n=Count('id'))
+            .values_list('fingerprint', 'n')
+        )
+        for fp in pending:
+            self._existing[fp] = counts.get(fp, 0)
+
+
+def import_transactions(user, kind, rows, batch_size=500, request=None):
+    return TransactionImporter(user, kind, batch_size=batch_size, request=request).run(rows)
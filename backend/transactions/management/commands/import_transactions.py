@@ -0,0 +1,41 @@
+import json
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from transactions.importers import IMPORT_FORMATS, detect_format, import_transactions, iter_rows
+
+
+class Command(BaseCommand):
+    help = "Importa ingresos o gastos desde un CSV, NDJSON o array JSON, omitiendo filas ya importadas."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="Ruta del fichero a importar.")
+        parser.add_argument('--user', required=True, help="ID o username del usuario destino.")
+        parser.add_argument('--kind', required=True, choices=['income', 'expense'])
+        parser.add_argument('--format', dest='file_format', choices=IMPORT_FORMATS,
+                            help="Formato del fichero. Por defecto se deduce de la extensión.")
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        lookup = {'pk': options['user']} if options['user'].isdigit() else {'username': options['user']}
+        try:
+            user = User.objects.get(**lookup)
+        except User.DoesNotExist:
+            raise CommandError(f"No existe el usuario {options['user']}.")
+
+        try:
+            file_format = detect_format(options['path'], options['file_format'])
+            with open(options['path'], 'rb') as handle:
+                result = import_transactions(
+                    user, options['kind'], iter_rows(handle, file_format), batch_size=options['batch_size']
+                )
+        except (OSError, ValueError, UnicodeDecodeError) as exc:
+            raise CommandError(str(exc))
+
+        for error in result['errors']:
+            self.stderr.write(f"Fila {error['row']}: {json.dumps(error['errors'], ensure_ascii=False)}")
+        self.stdout.write(self.style.SUCCESS(
+            f"{result['total_rows']} filas: {result['created']} creadas, "
+            f"{result['duplicates']} ya existentes, {result['error_count']} con errores."
+        ))
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from transactions.rollups import rebuild_rollups, verify_rollups
+
+
+class Command(BaseCommand):
+    help = "Reconstruye los rollups mensuales desde Income/Expense y verifica que coincidan."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--verify-only', action='store_true',
+            help="No reconstruye: solo compara los rollups guardados con las tablas de movimientos.",
+        )
+        parser.add_argument(
+            '--user', type=int, action='append', dest='users',
+            help="ID de usuario a procesar (se puede repetir). Por defecto, todos.",
+        )
+
+    def handle(self, *args, **options):
+        user_ids = options['users']
+        if not options['verify_only']:
+            created = rebuild_rollups(user_ids)
+            self.stdout.write(f"Rollups reconstruidos: {created} buckets.")
+
+        mismatches = verify_rollups(user_ids)
+        for mismatch in mismatches[:50]:
+            user_id, month, category_id, kind = mismatch['key']
+            self.stderr.write(
+                f"user={user_id} mes={month:%Y-%m} categoría={category_id} tipo={kind}: "
+                f"esperado={mismatch['expected']} guardado={mismatch['stored']}"
+            )
+        if mismatches:
+            raise CommandError(f"{len(mismatches)} buckets no coinciden con los movimientos.")
+        self.stdout.write(self.style.SUCCESS("Rollups verificados: coinciden con los movimientos."))
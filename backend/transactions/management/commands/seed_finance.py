@@ -0,0 +1,189 @@
+import math
+import random
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from transactions.models import Category, Expense, Income, transaction_fingerprint
+from transactions.rollups import rebuild_rollups
+
+CENT = Decimal('0.01')
+# Usuarios por rebuild_rollups(): cada id es un parámetro del IN y SQLite admite 999 por consulta
+ROLLUP_USERS_PER_CHUNK = 500
+
+# (nombre, peso, mediana, sigma, descripciones): los importes siguen una lognormal por categoría
+EXPENSE_CATEGORIES = [
+    ('Supermercado', 30, 45, 0.6, ['Mercadona', 'Carrefour', 'Lidl', 'Frutería', 'Panadería']),
+    ('Restaurantes', 16, 22, 0.7, ['Cena', 'Comida', 'Café', 'Take away']),
+    ('Transporte', 14, 12, 0.8, ['Metro', 'Taxi', 'Gasolina', 'Parking', 'Tren']),
+    ('Ocio', 9, 25, 0.9, ['Cine', 'Concierto', 'Libros', 'Videojuegos']),
+    ('Servicios', 7, 60, 0.5, ['Luz', 'Agua', 'Internet', 'Móvil', 'Gas']),
+    ('Salud', 5, 35, 0.8, ['Farmacia', 'Dentista', 'Fisioterapia']),
+    ('Ropa', 5, 50, 0.7, ['Zapatillas', 'Camisa', 'Abrigo']),
+    ('Viajes', 2, 280, 0.9, ['Vuelo', 'Hotel', 'Alquiler de coche']),
+    ('Educación', 2, 90, 0.7, ['Curso', 'Matrícula', 'Material']),
+    ('Regalos', 2, 40, 0.8, ['Cumpleaños', 'Navidad', 'Boda']),
+]
+INCOME_CATEGORIES = ['Sueldo', 'Freelance', 'Inversiones']
+CUSTOM_CATEGORIES = ['Mascotas', 'Gimnasio', 'Hogar', 'Suscripciones', 'Coche', 'Niños', 'Donaciones']
+SUBSCRIPTIONS = [('Netflix', '12.99'), ('Spotify', '10.99'), ('Gimnasio', '39.90'), ('Seguro hogar', '24.50')]
+PAYMENT_METHODS = ['tarjeta'] * 6 + ['efectivo'] * 2 + ['bizum', 'transferencia']
+
+
+class Command(BaseCommand):
+    help = (
+        "Genera usuarios con ingresos, gastos y categorías sintéticos para benchmarks. "
+        "Con la misma --seed produce siempre los mismos datos."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10, help="Usuarios a crear.")
+        parser.add_argument(
+            '--transactions', type=int, default=1000,
+            help="Movimientos por usuario de media (cada usuario varía entre ~0,5x y ~2x).",
+        )
+        parser.add_argument('--months', type=int, default=36, help="Meses de historia hasta --end.")
+        parser.add_argument(
+            '--end', type=date.fromisoformat, default=date(2024, 12, 31),
+            help="Último día con movimientos (AAAA-MM-DD). Fijo para que la salida sea determinista.",
+        )
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--prefix', default='seed', help="Los usuarios se llaman <prefix><n>@example.com.")
+        parser.add_argument('--password', default='seed-password', help="Contraseña de todos los usuarios creados.")
+        parser.add_argument('--batch-size', type=int, default=5000, help="Filas por bulk_create.")
+        parser.add_argument(
+            '--skip-rollups', action='store_true',
+            help="No reconstruye los rollups (bulk_create no los actualiza); útil para sembrar en varias tandas.",
+        )
+
+    def handle(self, *args, **options):
+        prefix, users = options['prefix'], options['users']
+        usernames = [f'{prefix}{index}@example.com' for index in range(users)]
+        if User.objects.filter(username__in=usernames[:1000]).exists():
+            raise CommandError(f"Ya existen usuarios '{prefix}...': usa otro --prefix.")
+
+        started = time.perf_counter()
+        globals_by_name = self.global_categories()
+        # Un único hash para todos: PBKDF2 por usuario haría la siembra mucho más lenta
+        password = make_password(options['password'])
+        created_users = User.objects.bulk_create(
+            [User(username=name, email=name, first_name=f'Usuario {index}', password=password)
+             for index, name in enumerate(usernames)],
+            batch_size=options['batch_size'],
+        )
+
+        self.start = options['end'] - timedelta(days=30 * options['months'])
+        self.end = options['end']
+        self.batch_size = options['batch_size']
+        self.buffers = {Income: [], Expense: []}
+        self.totals = {Income: 0, Expense: 0}
+        for index, user in enumerate(created_users):
+            # Un generador por usuario: los datos de cada usuario no dependen de --users
+            rnd = random.Random(options['seed'] * 1_000_003 + index)
+            with transaction.atomic():
+                self.seed_user(rnd, user, globals_by_name, options['transactions'])
+                self.flush()
+            rows = sum(self.totals.values())
+            if options['verbosity'] and ((index + 1) % 100 == 0 or index + 1 == len(created_users)):
+                self.stdout.write(f"{index + 1}/{users} usuarios, {rows} movimientos ({time.perf_counter() - started:.0f}s)")
+
+        if not options['skip_rollups']:
+            user_ids = [user.id for user in created_users]
+            buckets = sum(
+                rebuild_rollups(user_ids[start:start + ROLLUP_USERS_PER_CHUNK])
+                for start in range(0, len(user_ids), ROLLUP_USERS_PER_CHUNK)
+            )
+            if options['verbosity']:
+                self.stdout.write(f"Rollups reconstruidos: {buckets} buckets.")
+        if options['verbosity']:
+            self.stdout.write(self.style.SUCCESS(
+                f"Sembrados {users} usuarios, {self.totals[Income]} ingresos y {self.totals[Expense]} gastos "
+                f"en {time.perf_counter() - started:.1f}s."
+            ))
+
+    def global_categories(self):
+        names = [name for name, *_ in EXPENSE_CATEGORIES] + INCOME_CATEGORIES
+        existing = {category.name: category for category in Category.objects.filter(user=None, name__in=names)}
+        missing = [Category(user=None, name=name) for name in names if name not in existing]
+        for category in Category.objects.bulk_create(missing):
+            existing[category.name] = category
+        return existing
+
+    def seed_user(self, rnd, user, globals_by_name, mean_transactions):
+        custom = Category.objects.bulk_create([
+            Category(user=user, name=name) for name in rnd.sample(CUSTOM_CATEGORIES, rnd.randint(0, 4))
+        ])
+        # Cada usuario gasta más o menos: volumen lognormal alrededor de la media pedida
+        volume = max(int(mean_transactions * rnd.lognormvariate(0, 0.35)), 1)
+        months = self.months()
+
+        # Ingresos: nómina mensual estable, algún extra y alguna paga sin categoría
+        salary = Decimal(rnd.lognormvariate(math.log(2200), 0.4)).quantize(CENT)
+        incomes = 0
+        for month in months:
+            self.add(Income, user, globals_by_name['Sueldo'], salary * Decimal(rnd.uniform(0.98, 1.03)),
+                     month + timedelta(days=rnd.randint(0, 4)), source='Empresa', description='Nómina')
+            incomes += 1
+            if rnd.random() < 0.3:
+                name = rnd.choice(['Freelance', 'Inversiones'])
+                self.add(Income, user, globals_by_name[name], rnd.lognormvariate(math.log(300), 0.8),
+                         self.day_in(rnd, month), source=name, description=f'{name} {month:%m/%Y}')
+                incomes += 1
+            if rnd.random() < 0.05:
+                self.add(Income, user, None, rnd.lognormvariate(math.log(80), 0.6),
+                         self.day_in(rnd, month), source='Otros', description='Devolución')
+                incomes += 1
+
+        # Gastos: suscripciones mensuales y el resto repartido por categoría según su peso
+        expenses = max(volume - incomes, 0)
+        for name, amount in rnd.sample(SUBSCRIPTIONS, rnd.randint(0, len(SUBSCRIPTIONS))):
+            for month in months[:expenses]:
+                self.add(Expense, user, globals_by_name['Servicios'], Decimal(amount), month,
+                         description=name, payment_method='tarjeta', recurrence='mensual')
+                expenses -= 1
+        weights = [weight for _, weight, *_ in EXPENSE_CATEGORIES] + [3] * len(custom)
+        choices = [(globals_by_name[name], median, sigma, texts) for name, _, median, sigma, texts in EXPENSE_CATEGORIES]
+        choices += [(category, 30, 0.8, [category.name]) for category in custom]
+        span = (self.end - self.start).days
+        for _ in range(expenses):
+            category, median, sigma, texts = rnd.choices(choices, weights)[0]
+            # Fines de semana algo más de gasto
+            spent_on = self.start + timedelta(days=rnd.randint(0, span))
+            if spent_on.weekday() < 5 and rnd.random() < 0.15:
+                spent_on += timedelta(days=5 - spent_on.weekday())
+            self.add(Expense, user, category if rnd.random() > 0.03 else None,
+                     rnd.lognormvariate(math.log(median), sigma), min(spent_on, self.end),
+                     description=rnd.choice(texts), payment_method=rnd.choice(PAYMENT_METHODS))
+
+    def months(self):
+        months, current = [], date(self.start.year, self.start.month, 1)
+        while current <= self.end:
+            if current >= self.start:
+                months.append(current)
+            current = date(current.year + current.month // 12, current.month % 12 + 1, 1)
+        return months
+
+    def day_in(self, rnd, month):
+        return min(month + timedelta(days=rnd.randint(0, 27)), self.end)
+
+    def add(self, model, user, category, amount, value_date, **fields):
+        amount = min(Decimal(amount).quantize(CENT), Decimal('99999999.99'))
+        self.buffers[model].append(model(
+            user=user, category=category, amount=amount, date=value_date,
+            fingerprint=transaction_fingerprint(value_date, amount, fields.get('description')),
+            **fields,
+        ))
+        if len(self.buffers[model]) >= self.batch_size:
+            self.flush(model)
+
+    def flush(self, *models):
+        for model in models or self.buffers:
+            if self.buffers[model]:
+                model.objects.bulk_create(self.buffers[model])
+                self.totals[model] += len(self.buffers[model])
+                self.buffers[model] = []
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.30 on 2026-10-17 15:58
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0002_expense'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='expense',
+            options={'ordering': ['-date', '-created_at', '-id']},
+        ),
+        migrations.AlterModelOptions(
+            name='income',
+            options={'ordering': ['-date', '-created_at', '-id']},
+        ),
+    ]
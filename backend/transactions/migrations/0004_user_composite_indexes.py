@@ -0,0 +1,34 @@
+# Generated by Django 4.2.30 on 2026-10-17 15:59
+
+from django.db import migrations, models
+import django.db.models.functions.text
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0003_keyset_ordering'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='category',
+            index=models.Index(models.F('user'), django.db.models.functions.text.Lower('name'), name='category_user_lower_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='expense',
+            index=models.Index(fields=['user', '-date', '-created_at', '-id'], name='expense_user_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='expense',
+            index=models.Index(fields=['user', 'category'], name='expense_user_category_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='income',
+            index=models.Index(fields=['user', '-date', '-created_at', '-id'], name='income_user_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='income',
+            index=models.Index(fields=['user', 'category'], name='income_user_category_idx'),
+        ),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 4.2.30 on 2026-10-17 16:01
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncMonth
+
+
+def populate_rollups(apps, schema_editor):
+    MonthlyRollup = apps.get_model('transactions', 'MonthlyRollup')
+    buckets = []
+    for kind, model_name in (('income', 'Income'), ('expense', 'Expense')):
+        model = apps.get_model('transactions', model_name)
+        rows = (
+            model.objects.order_by()
+            .annotate(month=TruncMonth('date'))
+            .values('user_id', 'month', 'category_id')
+            .annotate(total=Sum('amount'), count=Count('id'))
+        )
+        buckets.extend(MonthlyRollup(kind=kind, **row) for row in rows)
+    MonthlyRollup.objects.bulk_create(buckets, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('transactions', '0004_user_composite_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MonthlyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(help_text='Primer día del mes agregado')),
+                ('kind', models.CharField(choices=[('income', 'Ingreso'), ('expense', 'Gasto')], max_length=7)),
+                ('total', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('count', models.IntegerField(default=0, help_text='Número de movimientos agregados')),
+                ('category', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='transactions.category')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='monthly_rollups', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='monthlyrollup',
+            constraint=models.UniqueConstraint(condition=models.Q(('category__isnull', False)), fields=('user', 'month', 'category', 'kind'), name='rollup_unique_bucket'),
+        ),
+        migrations.AddConstraint(
+            model_name='monthlyrollup',
+            constraint=models.UniqueConstraint(condition=models.Q(('category__isnull', True)), fields=('user', 'month', 'kind'), name='rollup_unique_uncategorized_bucket'),
+        ),
+        migrations.RunPython(populate_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 4.2.30 on 2026-10-17 16:05
+
+import hashlib
+from decimal import Decimal
+
+from django.db import migrations, models
+
+
+def populate_fingerprints(apps, schema_editor):
+    # Misma normalización que transactions.models.transaction_fingerprint
+    for model_name in ('Income', 'Expense'):
+        model = apps.get_model('transactions', model_name)
+        batch = []
+        for row in model.objects.only('id', 'date', 'amount', 'description').iterator(chunk_size=2000):
+            normalized = f"{row.date.isoformat()}|{Decimal(row.amount).quantize(Decimal('0.01'))}|{(row.description or '').strip().lower()}"
+            row.fingerprint = hashlib.sha1(normalized.encode('utf-8')).hexdigest()
+            batch.append(row)
+            if len(batch) >= 2000:
+                model.objects.bulk_update(batch, ['fingerprint'])
+                batch = []
+        if batch:
+            model.objects.bulk_update(batch, ['fingerprint'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0006_data_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='expense',
+            name='fingerprint',
+            field=models.CharField(blank=True, editable=False, help_text='Huella de (fecha, monto, descripción) para importaciones idempotentes', max_length=40),
+        ),
+        migrations.AddField(
+            model_name='income',
+            name='fingerprint',
+            field=models.CharField(blank=True, editable=False, help_text='Huella de (fecha, monto, descripción) para importaciones idempotentes', max_length=40),
+        ),
+        migrations.AddIndex(
+            model_name='expense',
+            index=models.Index(fields=['user', 'fingerprint'], name='expense_user_fingerprint_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='income',
+            index=models.Index(fields=['user', 'fingerprint'], name='income_user_fingerprint_idx'),
+        ),
+        migrations.RunPython(populate_fingerprints, migrations.RunPython.noop),
+    ]
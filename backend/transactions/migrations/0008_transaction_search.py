@@ -0,0 +1,60 @@
+from django.db import migrations
+
+# Índices FTS5 de descripciones (y fuente de los ingresos), solo en SQLite.
+# La columna owner guarda 'u<user_id>' para que la búsqueda se limite a un usuario
+# dentro del propio índice. Los triggers cubren también bulk_create y update().
+SEARCH_TABLES = {
+    'transactions_income': ('transactions_income_fts', ('description', 'source')),
+    'transactions_expense': ('transactions_expense_fts', ('description',)),
+}
+
+
+def _statements(table, fts_table, columns):
+    column_list = ', '.join(columns)
+    new_values = ', '.join(f"coalesce(new.{column}, '')" for column in columns)
+    assignments = ', '.join(f"{column} = coalesce(new.{column}, '')" for column in columns)
+    old_values = ', '.join(f"coalesce({column}, '')" for column in columns)
+    return [
+        f"CREATE VIRTUAL TABLE {fts_table} USING fts5(owner, {column_list}, tokenize = 'unicode61 remove_diacritics 2')",
+        f"INSERT INTO {fts_table} (rowid, owner, {column_list}) SELECT id, 'u' || user_id, {old_values} FROM {table}",
+        f"""CREATE TRIGGER {fts_table}_ai AFTER INSERT ON {table} BEGIN
+            INSERT INTO {fts_table} (rowid, owner, {column_list}) VALUES (new.id, 'u' || new.user_id, {new_values});
+        END""",
+        f"""CREATE TRIGGER {fts_table}_au AFTER UPDATE OF user_id, {column_list} ON {table} BEGIN
+            UPDATE {fts_table} SET owner = 'u' || new.user_id, {assignments} WHERE rowid = new.id;
+        END""",
+        f"""CREATE TRIGGER {fts_table}_ad AFTER DELETE ON {table} BEGIN
+            DELETE FROM {fts_table} WHERE rowid = old.id;
+        END""",
+    ]
+
+
+def create_search_tables(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for table, (fts_table, columns) in SEARCH_TABLES.items():
+        for statement in _statements(table, fts_table, columns):
+            schema_editor.execute(statement)
+        # Sin estadísticas el planificador supone que user_id = ? es muy selectivo y recorre
+        # todas las filas del usuario en vez de empezar por el índice FTS
+        schema_editor.execute(f"ANALYZE {table}")
+
+
+def drop_search_tables(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for fts_table, _ in SEARCH_TABLES.values():
+        for suffix in ('ai', 'au', 'ad'):
+            schema_editor.execute(f"DROP TRIGGER IF EXISTS {fts_table}_{suffix}")
+        schema_editor.execute(f"DROP TABLE IF EXISTS {fts_table}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0007_transaction_fingerprint'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_tables, drop_search_tables),
+    ]
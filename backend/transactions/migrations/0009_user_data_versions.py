@@ -0,0 +1,22 @@
+from django.conf import settings
+from django.db import migrations
+
+
+def create_missing_versions(apps, schema_editor):
+    # Los usuarios nuevos ya nacen con su fila (transactions/signals.py); esto cubre los existentes
+    User = apps.get_model(*settings.AUTH_USER_MODEL.split('.'))
+    DataVersion = apps.get_model('transactions', 'DataVersion')
+    missing = User.objects.filter(data_version__isnull=True).values_list('id', flat=True)
+    DataVersion.objects.bulk_create([DataVersion(user_id=user_id) for user_id in missing.iterator()], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('transactions', '0008_transaction_search'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_missing_versions, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-17 18:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0009_user_data_versions'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dataversion',
+            name='category_version',
+            field=models.BigIntegerField(default=0),
+        ),
+    ]
@@ -1,7 +1,11 @@
-from django.db import models
+import hashlib
+from decimal import Decimal
+
+from django.db import models, transaction
 from django.contrib.auth.models import User
 from django.conf import settings
 from django.utils import timezone
+from django.db.models.functions import Coalesce, Lower
 
 # Create your models here.
 
@@ -15,11 +19,63 @@ class Category(models.Model):
     class Meta:
         verbose_name_plural = "Categories"
         unique_together = ('user', 'name') # Un usuario no puede tener dos categorías con el mismo nombre
+        indexes = [
+            # Búsqueda sin distinguir mayúsculas de CategorySerializer.validate_name
+            models.Index('user', Lower('name'), name='category_user_lower_name_idx'),
+        ]
 
     def __str__(self):
         return f"{self.name}{' (Global)' if not self.user else ''}"
 
-class Income(models.Model):
+def transaction_fingerprint(date, amount, description):
+    """
+    Huella de (fecha, monto, descripción) para detectar movimientos ya importados.
+    `date` y `amount` deben venir ya normalizados (date y Decimal).
+    """
+    normalized = f"{date.isoformat()}|{Decimal(amount).quantize(Decimal('0.01'))}|{(description or '').strip().lower()}"
+    return hashlib.sha1(normalized.encode('utf-8')).hexdigest()
+
+class RollupTrackedModel(models.Model):
+    """
+    Base de Income y Expense: cada alta o modificación actualiza MonthlyRollup
+    en la misma transacción. Los borrados se tratan en transactions/signals.py.
+    Ojo: QuerySet.update() y bulk_create() no pasan por aquí.
+    """
+    fingerprint = models.CharField(max_length=40, blank=True, editable=False, help_text="Huella de (fecha, monto, descripción) para importaciones idempotentes")
+
+    rollup_kind = None
+
+    class Meta:
+        abstract = True
+
+    def refresh_fingerprint(self):
+        meta = self._meta
+        self.fingerprint = transaction_fingerprint(
+            meta.get_field('date').to_python(self.date),
+            meta.get_field('amount').to_python(self.amount),
+            self.description,
+        )
+
+    def save(self, *args, **kwargs):
+        from .rollups import record_save
+
+        self.refresh_fingerprint()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'fingerprint' not in update_fields:
+            kwargs['update_fields'] = [*update_fields, 'fingerprint']
+
+        with transaction.atomic():
+            previous = None
+            if not self._state.adding and self.pk is not None:
+                previous = (
+                    type(self)._default_manager.filter(pk=self.pk)
+                    .values('user_id', 'date', 'category_id', 'amount')
+                    .first()
+                )
+            super().save(*args, **kwargs)
+            record_save(self, previous)
+
+class Income(RollupTrackedModel):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='incomes')
     amount = models.DecimalField(max_digits=10, decimal_places=2, help_text="Monto del ingreso")
     date = models.DateField(default=timezone.now, help_text="Fecha en que se recibió el ingreso")
@@ -44,13 +100,23 @@ class Income(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    rollup_kind = 'income'
+
     def __str__(self):
         return f"Ingreso de {self.amount} para {self.user.username} el {self.date}"
 
     class Meta:
-        ordering = ['-date', '-created_at']
+        ordering = ['-date', '-created_at', '-id']
+        indexes = [
+            # Listado por usuario en el orden de Meta.ordering (y de KeysetPagination)
+            models.Index(fields=['user', '-date', '-created_at', '-id'], name='income_user_date_idx'),
+            # Resúmenes por categoría
+            models.Index(fields=['user', 'category'], name='income_user_category_idx'),
+            # Detección de duplicados al importar
+            models.Index(fields=['user', 'fingerprint'], name='income_user_fingerprint_idx'),
+        ]
 
-class Expense(models.Model):
+class Expense(RollupTrackedModel):
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
     category = models.ForeignKey(Category, on_delete=models.SET_NULL, null=True, blank=True, related_name='expenses')
     description = models.CharField(max_length=255)
@@ -62,8 +128,72 @@ class Expense(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    rollup_kind = 'expense'
+
     def __str__(self):
         return f"{self.description} - {self.amount} ({self.user.username})"
 
     class Meta:
-        ordering = ['-date']
+        ordering = ['-date', '-created_at', '-id']
+        indexes = [
+            models.Index(fields=['user', '-date', '-created_at', '-id'], name='expense_user_date_idx'),
+            models.Index(fields=['user', 'category'], name='expense_user_category_idx'),
+            models.Index(fields=['user', 'fingerprint'], name='expense_user_fingerprint_idx'),
+        ]
+
+
+class MonthlyRollup(models.Model):
+    """
+    Totales mensuales por (usuario, mes, categoría, tipo), mantenidos de forma
+    incremental por transactions/rollups.py. Los resúmenes leen de aquí.
+    """
+    KIND_CHOICES = [
+        ('income', 'Ingreso'),
+        ('expense', 'Gasto'),
+    ]
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='monthly_rollups')
+    month = models.DateField(help_text="Primer día del mes agregado")
+    # Al borrar una categoría sus totales se pasan antes a la fila sin categoría (ver signals.py)
+    category = models.ForeignKey(Category, on_delete=models.CASCADE, null=True, blank=True, related_name='+')
+    kind = models.CharField(max_length=7, choices=KIND_CHOICES)
+    total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    count = models.IntegerField(default=0, help_text="Número de movimientos agregados")
+
+    class Meta:
+        constraints = [
+            # NULL no es igual a NULL en un UNIQUE, así que el caso sin categoría va aparte
+            models.UniqueConstraint(
+                fields=['user', 'month', 'category', 'kind'],
+                condition=models.Q(category__isnull=False),
+                name='rollup_unique_bucket',
+            ),
+            models.UniqueConstraint(
+                fields=['user', 'month', 'kind'],
+                condition=models.Q(category__isnull=True),
+                name='rollup_unique_uncategorized_bucket',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} {self.month:%Y-%m} de {self.user_id}: {self.total}"
+
+
+class DataVersion(models.Model):
+    """
+    Contador de cambios por usuario (user=None para las categorías globales).
+    `version` se incrementa en cada escritura de Income, Expense o Category y forma parte
+    de la clave de caché de los resúmenes (ver transactions/cache.py); `category_version`
+    solo con las de Category y es la clave de los resolvers (transactions/categories.py).
+    """
+    user = models.OneToOneField(User, on_delete=models.CASCADE, null=True, blank=True, related_name='data_version')
+    version = models.BigIntegerField(default=0)
+    category_version = models.BigIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            # OneToOne no impide varias filas con user NULL: una sola fila global
+            models.UniqueConstraint(Coalesce('user', models.Value(0)), name='dataversion_single_row_per_user'),
+        ]
+
+    def __str__(self):
+        return f"v{self.version} de {self.user_id or 'global'}"
@@ -0,0 +1,212 @@
+import base64
+import json
+from collections import OrderedDict
+from datetime import date, datetime
+from decimal import Decimal
+from functools import partial
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.filters import OrderingFilter
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Paginación por cursor (keyset) sobre (date, created_at, id).
+
+    El cursor guarda los valores de la última fila servida y la página siguiente
+    se obtiene con un WHERE sobre esas columnas, así que el coste de cada página
+    no depende de lo profundo que haya navegado el cliente (sin OFFSET ni COUNT).
+    """
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Cursor inválido.'
+
+    # Debe coincidir con Meta.ordering de Income y Expense
+    default_ordering = ('-date', '-created_at', '-id')
+    # Columnas de desempate que se añaden tras el campo pedido en ?ordering=
+    tiebreakers = ('date', 'created_at', 'id')
+    # Anotación de relevancia de ?search= (transactions/search.py): menor es más relevante
+    rank_annotation = 'search_rank'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        page_queryset, cursor = self._page_queryset(queryset, request, view)
+        return self._set_page(list(page_queryset), cursor)
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """Como paginate_queryset(), pero leyendo la página con iteración async del ORM."""
+        page_queryset, cursor = self._page_queryset(queryset, request, view)
+        return self._set_page([obj async for obj in page_queryset], cursor)
+
+    def _page_queryset(self, queryset, request, view):
+        """Queryset de la página (sin ejecutar) y el cursor recibido."""
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.ordering = self.get_ordering(request, queryset, view)
+
+        cursor = self.decode_cursor(request, queryset)
+        reverse = cursor is not None and cursor['reverse']
+
+        ordering = self.ordering
+        if reverse:
+            ordering = tuple(self._invert(field) for field in ordering)
+        queryset = queryset.order_by(*ordering)
+        if cursor is not None:
+            queryset = queryset.filter(self._after(ordering, cursor['values']))
+
+        # Pedimos una fila extra para saber si hay más páginas sin hacer COUNT(*)
+        return queryset[:self.page_size + 1], cursor
+
+    def _set_page(self, results, cursor):
+        reverse = cursor is not None and cursor['reverse']
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+
+        if reverse:
+            results.reverse()
+            self.has_next = True
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = cursor is not None
+
+        self.page = results
+        return results
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+            if page_size > 0:
+                return min(page_size, self.max_page_size)
+        except (KeyError, ValueError):
+            pass
+        return self.page_size
+
+    def get_ordering(self, request, queryset, view):
+        """
+        Traduce el ?ordering= del OrderingFilter de la vista a una clave completa
+        y única, p. ej. '-amount' -> ('-amount', '-date', '-created_at', '-id').
+        """
+        requested = None
+        for backend in getattr(view, 'filter_backends', []):
+            if issubclass(backend, OrderingFilter):
+                requested = backend().get_ordering(request, queryset, view)
+                break
+        if not requested:
+            if self.rank_annotation in queryset.query.annotations:
+                return (self.rank_annotation,) + self.default_ordering
+            return self.default_ordering
+
+        primary = requested[0]
+        prefix = '-' if primary.startswith('-') else ''
+        name = primary.lstrip('-')
+        fields = [name] + [field for field in self.tiebreakers if field != name]
+        return tuple(prefix + field for field in fields)
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def decode_cursor(self, request, queryset):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')).decode('utf-8'))
+            values = payload['v']
+            reverse = bool(payload.get('r', False))
+        except (TypeError, ValueError, KeyError, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(values, list) or len(values) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        # El cursor viene del cliente: cada valor se convierte con su campo antes de llegar
+        # al WHERE, para que un cursor manipulado sea un 404 y no un error en .filter()
+        try:
+            values = [
+                self._cursor_value(queryset, field.lstrip('-'), value)
+                for field, value in zip(self.ordering, values)
+            ]
+        except (ValidationError, FieldDoesNotExist, TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        return {'values': values, 'reverse': reverse}
+
+    @staticmethod
+    def _cursor_value(queryset, name, value):
+        # Las columnas de ordenación no admiten NULL
+        if value is None or isinstance(value, (list, dict)):
+            raise ValueError(name)
+        annotation = queryset.query.annotations.get(name)
+        field = annotation.output_field if annotation is not None else queryset.model._meta.get_field(name)
+        return field.to_python(value)
+
+    def encode_cursor(self, instance, reverse):
+        # La fila puede ser una instancia o un diccionario de .values() (transactions/fastlist.py)
+        get = instance.get if isinstance(instance, dict) else partial(getattr, instance)
+        values = [self._to_primitive(get(field.lstrip('-'))) for field in self.ordering]
+        payload = {'v': values}
+        if reverse:
+            payload['r'] = True
+        encoded = base64.urlsafe_b64encode(json.dumps(payload).encode('utf-8')).decode('ascii')
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    @staticmethod
+    def _invert(field):
+        return field[1:] if field.startswith('-') else '-' + field
+
+    @staticmethod
+    def _to_primitive(value):
+        if isinstance(value, (date, datetime)):
+            return value.isoformat()
+        if isinstance(value, Decimal):
+            return str(value)
+        return value
+
+    @staticmethod
+    def _after(ordering, values):
+        """
+        Condición "fila posterior al cursor" en orden lexicográfico:
+            k1 <= v1 AND (k1 < v1 OR (k1 = v1 AND (k2 < v2 OR ...)))
+        La cota redundante sobre la primera columna permite un range scan por índice.
+        """
+        condition = None
+        for field, value in reversed(list(zip(ordering, values))):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            strict = Q(**{f'{name}__{lookup}': value})
+            condition = strict if condition is None else strict | (Q(**{name: value}) & condition)
+
+        first = ordering[0]
+        bound = 'lte' if first.startswith('-') else 'gte'
+        return Q(**{f'{first.lstrip("-")}__{bound}': values[0]}) & condition
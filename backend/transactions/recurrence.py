@@ -0,0 +1,150 @@
+"""
+Expansión de movimientos recurrentes.
+
+Income.recurrence usa RECURRENCE_CHOICES, pero Expense.recurrence es texto libre
+('mensual', 'monthly', 'yearly', ...). normalize_recurrence() reduce ambos a los códigos
+de Income. Una fila recurrente es la primera ocurrencia; las siguientes son "virtuales":
+  * iter_occurrences() / expand() las generan de forma perezosa (generadores),
+  * count_occurrences() las cuenta aritméticamente, así que los totales cuestan O(filas
+    recurrentes) sin importar cuántos días o años abarque el rango.
+"""
+import calendar
+import heapq
+import unicodedata
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.db.models import Q
+
+from .models import Expense, Income
+
+NONE = 'none'
+DAILY = 'daily'
+WEEKLY = 'weekly'
+BIWEEKLY = 'biweekly'
+MONTHLY = 'monthly'
+ANNUALLY = 'annually'
+
+# Sinónimos aceptados en Expense.recurrence (sin tildes y en minúsculas)
+_ALIASES = {
+    DAILY: ('daily', 'diario', 'diaria', 'cada dia', 'todos los dias'),
+    WEEKLY: ('weekly', 'semanal', 'semanalmente', 'cada semana'),
+    BIWEEKLY: ('biweekly', 'fortnightly', 'quincenal', 'quincenalmente', 'cada dos semanas', 'bisemanal'),
+    MONTHLY: ('monthly', 'mensual', 'mensualmente', 'cada mes'),
+    ANNUALLY: ('annually', 'annual', 'yearly', 'anual', 'anualmente', 'cada ano'),
+}
+_NORMALIZED = {alias: code for code, aliases in _ALIASES.items() for alias in aliases}
+
+# Recurrencias de paso fijo en días
+_DAY_STEPS = {DAILY: 1, WEEKLY: 7, BIWEEKLY: 14}
+# Recurrencias de paso en meses
+_MONTH_STEPS = {MONTHLY: 1, ANNUALLY: 12}
+
+
+def normalize_recurrence(value):
+    """Devuelve el código canónico ('daily', ..., 'annually') o 'none' si no se reconoce."""
+    if not value:
+        return NONE
+    text = unicodedata.normalize('NFKD', str(value)).encode('ascii', 'ignore').decode('ascii')
+    text = ' '.join(text.lower().replace('_', ' ').replace('-', ' ').split())
+    return _NORMALIZED.get(text, NONE)
+
+
+def _add_months(anchor, months):
+    """anchor + n meses, ajustando el día al último del mes si no existe (31 -> 30/28...)."""
+    index = anchor.year * 12 + anchor.month - 1 + months
+    year, month = divmod(index, 12)
+    month += 1
+    return date(year, month, min(anchor.day, calendar.monthrange(year, month)[1]))
+
+
+def _month_span(start, end):
+    return (end.year - start.year) * 12 + (end.month - start.month)
+
+
+def _index_bounds(anchor, recurrence, range_start, range_end):
+    """
+    Índices (k_first, k_last) de las ocurrencias virtuales (k >= 1) que caen en
+    [range_start, range_end]. La ocurrencia k = 0 es la propia fila.
+    """
+    lower = max(range_start, anchor + timedelta(days=1)) if range_start else anchor + timedelta(days=1)
+    if range_end < lower:
+        return 1, 0
+
+    if recurrence in _DAY_STEPS:
+        step = _DAY_STEPS[recurrence]
+        first = -(-(lower - anchor).days // step) # ceil
+        last = (range_end - anchor).days // step
+        return max(first, 1), last
+
+    step = _MONTH_STEPS[recurrence]
+    first = _month_span(anchor, lower) // step
+    if _add_months(anchor, first * step) < lower:
+        first += 1
+    last = _month_span(anchor, range_end) // step
+    if last >= 0 and _add_months(anchor, last * step) > range_end:
+        last -= 1
+    return max(first, 1), last
+
+
+def count_occurrences(anchor, recurrence, range_start, range_end):
+    """Número de ocurrencias virtuales en [range_start, range_end], en O(1)."""
+    recurrence = normalize_recurrence(recurrence)
+    if recurrence == NONE:
+        return 0
+    first, last = _index_bounds(anchor, recurrence, range_start, range_end)
+    return max(0, last - first + 1)
+
+
+def iter_occurrences(anchor, recurrence, range_start, range_end):
+    """Genera perezosamente las fechas de las ocurrencias virtuales en [range_start, range_end]."""
+    recurrence = normalize_recurrence(recurrence)
+    if recurrence == NONE:
+        return
+    first, last = _index_bounds(anchor, recurrence, range_start, range_end)
+    for k in range(first, last + 1):
+        if recurrence in _DAY_STEPS:
+            yield anchor + timedelta(days=k * _DAY_STEPS[recurrence])
+        else:
+            yield _add_months(anchor, k * _MONTH_STEPS[recurrence])
+
+
+def recurring_items(user, kind):
+    """Filas recurrentes del usuario como dicts (una consulta), ya con la recurrencia normalizada."""
+    if kind == 'income':
+        queryset = Income.objects.filter(user=user).exclude(recurrence=NONE)
+    else:
+        queryset = Expense.objects.filter(user=user).exclude(Q(recurrence__isnull=True) | Q(recurrence='') | Q(recurrence__iexact=NONE))
+    for item in queryset.order_by().values('id', 'amount', 'date', 'recurrence', 'category__name').iterator():
+        item['recurrence'] = normalize_recurrence(item['recurrence'])
+        if item['recurrence'] != NONE:
+            yield item
+
+
+def expand(items, range_start, range_end):
+    """
+    Ocurrencias virtuales de varias filas ordenadas por fecha, como (fecha, item).
+    Es un generador: nada se materializa salvo la siguiente ocurrencia de cada fila.
+    """
+    streams = (
+        ((occurrence, index, item) for occurrence in iter_occurrences(item['date'], item['recurrence'], range_start, range_end))
+        for index, item in enumerate(items)
+    )
+    for occurrence, _, item in heapq.merge(*streams):
+        yield occurrence, item
+
+
+def recurring_totals(user, until, since=None):
+    """
+    Importe de las ocurrencias virtuales hasta `until` (y desde `since` si se indica),
+    por tipo y nombre de categoría: {('income'|'expense', category_name): Decimal}.
+    Se calcula como importe x número de ocurrencias, sin enumerarlas.
+    """
+    totals = {}
+    for kind in ('income', 'expense'):
+        for item in recurring_items(user, kind):
+            count = count_occurrences(item['date'], item['recurrence'], since, until)
+            if count:
+                key = (kind, item['category__name'])
+                totals[key] = totals.get(key, Decimal('0')) + item['amount'] * count
+    return totals
@@ -0,0 +1,40 @@
+"""
+Renderers propios de los listados de movimientos.
+
+ColumnarJSONRenderer (?format=columns) devuelve las filas por columnas en lugar de una
+lista de objetos, así los nombres de los campos no se repiten en cada fila:
+
+    {"next": ..., "previous": ..., "results": {"id": [3, 2], "amount": ["10.00", "4.50"]}}
+
+Se combina con ?fields= (transactions/fieldsets.py) para pedir solo las columnas que
+se van a pintar. Las respuestas que no son listas (errores) salen como JSON normal.
+"""
+from config.renderers import ORJSONRenderer
+
+
+def to_columns(rows, names):
+    return {name: [row.get(name) for row in rows] for name in names}
+
+
+class ColumnarJSONRenderer(ORJSONRenderer):
+    media_type = 'application/vnd.columns+json'
+    format = 'columns'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        response = (renderer_context or {}).get('response')
+        if response is not None and response.exception:
+            return super().render(data, accepted_media_type, renderer_context)
+        if isinstance(data, dict) and isinstance(data.get('results'), list):
+            data = {**data, 'results': to_columns(data['results'], self.column_names(data['results'], renderer_context))}
+        elif isinstance(data, list):
+            data = to_columns(data, self.column_names(data, renderer_context))
+        return super().render(data, accepted_media_type, renderer_context)
+
+    def column_names(self, rows, renderer_context):
+        if rows:
+            return list(rows[0])
+        # Sin filas las columnas salen del serializer de la vista (ya recortado por ?fields=)
+        view = (renderer_context or {}).get('view')
+        if view is None or not hasattr(view, 'get_serializer'):
+            return []
+        return [name for name, field in view.get_serializer().fields.items() if not field.write_only]
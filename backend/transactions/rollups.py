@@ -0,0 +1,243 @@
+from datetime import date
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, Exists, F, OuterRef, Subquery, Sum
+from django.db.models.functions import TruncMonth
+
+from .models import Expense, Income, MonthlyRollup
+
+ROLLUP_MODELS = {
+    'income': Income,
+    'expense': Expense,
+}
+
+
+def month_start(value):
+    return date(value.year, value.month, 1)
+
+
+def _bucket_key(user_id, value_date, category_id):
+    return (user_id, month_start(value_date), category_id)
+
+
+def apply_delta(user_id, month, category_id, kind, amount, count):
+    """
+    Suma `amount` y `count` al bucket (user, month, category, kind), creándolo si no existe.
+    Debe llamarse dentro de la transacción que modifica el movimiento.
+    """
+    bucket = MonthlyRollup.objects.filter(user_id=user_id, month=month, category_id=category_id, kind=kind)
+    if bucket.update(total=F('total') + amount, count=F('count') + count):
+        return
+    try:
+        with transaction.atomic():
+            MonthlyRollup.objects.create(
+                user_id=user_id, month=month, category_id=category_id, kind=kind, total=amount, count=count
+            )
+    except IntegrityError:
+        # Otro proceso creó el bucket entre el UPDATE y el INSERT
+        bucket.update(total=F('total') + amount, count=F('count') + count)
+
+
+def _normalized(instance):
+    """Valores del movimiento tal como se guardan en la base (la fecha puede venir como datetime)."""
+    meta = instance._meta
+    return (
+        meta.get_field('date').to_python(instance.date),
+        meta.get_field('amount').to_python(instance.amount),
+    )
+
+
+def record_save(instance, previous=None):
+    """
+    Refleja en los rollups el alta (previous=None) o modificación de un Income/Expense.
+    `previous` son los valores de la fila antes de guardar: user_id, date, category_id, amount.
+    """
+    kind = instance.rollup_kind
+    value_date, amount = _normalized(instance)
+    new_key = _bucket_key(instance.user_id, value_date, instance.category_id)
+
+    if previous is None:
+        apply_delta(*new_key, kind, amount, 1)
+        return
+
+    old_key = _bucket_key(previous['user_id'], previous['date'], previous['category_id'])
+    if old_key == new_key:
+        difference = amount - previous['amount']
+        if difference:
+            apply_delta(*new_key, kind, difference, 0)
+        return
+    apply_delta(*old_key, kind, -previous['amount'], -1)
+    apply_delta(*new_key, kind, amount, 1)
+
+
+def record_bulk_create(kind, instances):
+    """
+    Equivalente a record_save() para filas insertadas con bulk_create(): agrupa los importes
+    por bucket y hace una actualización por bucket en lugar de una por fila.
+    """
+    record_bulk_changes(kind, created=instances)
+
+
+def record_bulk_changes(kind, created=(), updated=(), deleted=()):
+    """
+    Como record_bulk_create() para cualquier mezcla de altas, modificaciones (bulk_update)
+    y borrados sin señales. `updated` son pares (valores previos, instancia) con los mismos
+    valores previos que record_save(); `deleted` son las instancias tal como se leyeron.
+    """
+    deltas = {}
+
+    def add(key, amount, count):
+        total, previous_count = deltas.get(key, (Decimal('0'), 0))
+        deltas[key] = (total + amount, previous_count + count)
+
+    for instance in created:
+        value_date, amount = _normalized(instance)
+        add(_bucket_key(instance.user_id, value_date, instance.category_id), amount, 1)
+    for previous, instance in updated:
+        add(_bucket_key(previous['user_id'], previous['date'], previous['category_id']), -previous['amount'], -1)
+        value_date, amount = _normalized(instance)
+        add(_bucket_key(instance.user_id, value_date, instance.category_id), amount, 1)
+    for instance in deleted:
+        value_date, amount = _normalized(instance)
+        add(_bucket_key(instance.user_id, value_date, instance.category_id), -amount, -1)
+
+    apply_deltas(kind, {key: delta for key, delta in deltas.items() if delta[0] or delta[1]})
+
+
+def apply_deltas(kind, deltas):
+    """
+    apply_delta() para muchos buckets a la vez: {(user_id, month, category_id): (total, count)}.
+    Una lectura de los buckets existentes, un bulk_update con F() y un bulk_create de los
+    que faltan, sea cual sea el número de buckets.
+    """
+    if not deltas:
+        return
+    existing = {
+        (bucket.user_id, bucket.month, bucket.category_id): bucket
+        for bucket in MonthlyRollup.objects.filter(
+            kind=kind,
+            user_id__in={key[0] for key in deltas},
+            month__in={key[1] for key in deltas},
+        )
+        if (bucket.user_id, bucket.month, bucket.category_id) in deltas
+    }
+    changed = []
+    for key, bucket in existing.items():
+        total, count = deltas[key]
+        bucket.total = F('total') + total
+        bucket.count = F('count') + count
+        changed.append(bucket)
+    if changed:
+        MonthlyRollup.objects.bulk_update(changed, ['total', 'count'])
+
+    missing = {key: delta for key, delta in deltas.items() if key not in existing}
+    if not missing:
+        return
+    try:
+        with transaction.atomic():
+            MonthlyRollup.objects.bulk_create([
+                MonthlyRollup(user_id=user_id, month=month, category_id=category_id, kind=kind, total=total, count=count)
+                for (user_id, month, category_id), (total, count) in missing.items()
+            ])
+    except IntegrityError:
+        # Otro proceso creó alguno entre la lectura y el INSERT: bucket a bucket
+        for (user_id, month, category_id), (total, count) in missing.items():
+            apply_delta(user_id, month, category_id, kind, total, count)
+
+
+def record_delete(instance):
+    value_date, amount = _normalized(instance)
+    apply_delta(*_bucket_key(instance.user_id, value_date, instance.category_id), instance.rollup_kind, -amount, -1)
+
+
+def merge_into_uncategorized(category):
+    """
+    Antes de borrar una categoría sus movimientos pasan a category=NULL (SET_NULL),
+    así que sus buckets se suman a los buckets sin categoría del mismo mes.
+    Se hace con tres sentencias, sin importar cuántos meses tenga la categoría.
+    """
+    same_bucket = {'user_id': OuterRef('user_id'), 'month': OuterRef('month'), 'kind': OuterRef('kind')}
+    category_buckets = MonthlyRollup.objects.filter(category=category, **same_bucket)
+    uncategorized_buckets = MonthlyRollup.objects.filter(category__isnull=True, **same_bucket)
+
+    # 1. Suma a los buckets sin categoría que ya existen
+    MonthlyRollup.objects.filter(Exists(category_buckets), category__isnull=True).update(
+        total=F('total') + Subquery(category_buckets.values('total')[:1]),
+        count=F('count') + Subquery(category_buckets.values('count')[:1]),
+    )
+    # 2. Los buckets ya sumados sobran
+    MonthlyRollup.objects.filter(Exists(uncategorized_buckets), category=category).delete()
+    # 3. El resto pasa a ser el bucket sin categoría de su mes
+    MonthlyRollup.objects.filter(category=category).update(category=None)
+
+
+def compute_rollups(user_ids=None):
+    """
+    Calcula los buckets desde las tablas de movimientos.
+    Devuelve un dict {(user_id, month, category_id, kind): (total, count)}.
+    """
+    expected = {}
+    for kind, model in ROLLUP_MODELS.items():
+        queryset = model.objects.all()
+        if user_ids is not None:
+            queryset = queryset.filter(user_id__in=user_ids)
+        rows = (
+            queryset.order_by()
+            .annotate(month=TruncMonth('date'))
+            .values('user_id', 'month', 'category_id')
+            .annotate(total=Sum('amount'), count=Count('id'))
+        )
+        for row in rows:
+            key = (row['user_id'], row['month'], row['category_id'], kind)
+            expected[key] = (row['total'] or Decimal('0'), row['count'])
+    return expected
+
+
+def stored_rollups(user_ids=None):
+    queryset = MonthlyRollup.objects.filter(count__gt=0)
+    if user_ids is not None:
+        queryset = queryset.filter(user_id__in=user_ids)
+    return {
+        (row['user_id'], row['month'], row['category_id'], row['kind']): (row['total'], row['count'])
+        for row in queryset.values('user_id', 'month', 'category_id', 'kind', 'total', 'count')
+    }
+
+
+def rebuild_rollups(user_ids=None):
+    """Reconstruye los rollups desde cero. Devuelve el número de buckets creados."""
+    expected = compute_rollups(user_ids)
+    with transaction.atomic():
+        existing = MonthlyRollup.objects.all()
+        if user_ids is not None:
+            existing = existing.filter(user_id__in=user_ids)
+        existing.delete()
+        MonthlyRollup.objects.bulk_create(
+            [
+                MonthlyRollup(user_id=user_id, month=month, category_id=category_id, kind=kind, total=total, count=count)
+                for (user_id, month, category_id, kind), (total, count) in expected.items()
+            ],
+            batch_size=1000,
+        )
+    return len(expected)
+
+
+def verify_rollups(user_ids=None):
+    """Compara rollups guardados con los calculados. Devuelve la lista de diferencias."""
+    expected = compute_rollups(user_ids)
+    stored = stored_rollups(user_ids)
+    quantum = Decimal('0.01')
+    mismatches = []
+    for key in sorted(set(expected) | set(stored), key=lambda k: (k[0], k[1], k[2] or 0, k[3])):
+        expected_total, expected_count = expected.get(key, (Decimal('0'), 0))
+        stored_total, stored_count = stored.get(key, (Decimal('0'), 0))
+        if (
+            Decimal(expected_total).quantize(quantum) != Decimal(stored_total).quantize(quantum)
+            or expected_count != stored_count
+        ):
+            mismatches.append({
+                'key': key,
+                'expected': (expected_total, expected_count),
+                'stored': (stored_total, stored_count),
+            })
+    return mismatches
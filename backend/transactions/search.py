@@ -0,0 +1,70 @@
+"""
+Búsqueda de texto en descripciones de ingresos y gastos (y fuente de los ingresos).
+
+En SQLite usa las tablas FTS5 de la migración 0008: la consulta se resuelve en el
+índice invertido, restringida al usuario por la columna owner, así que el coste
+depende de las coincidencias y no del tamaño de las tablas. Los resultados se
+anotan con search_rank = bm25() (menor es más relevante). En otros motores se usa
+icontains sobre los mismos campos, sin ranking.
+"""
+import re
+
+from django.db import connections
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+# Tabla FTS, campos indexados y peso de cada uno en bm25 (owner pesa 0)
+SEARCH_FIELDS = {
+    'income': ('transactions_income_fts', {'description': 10.0, 'source': 5.0}),
+    'expense': ('transactions_expense_fts', {'description': 10.0}),
+}
+RANK_ANNOTATION = 'search_rank'
+
+_TOKEN = re.compile(r'\w+', re.UNICODE)
+
+
+def search_terms(text):
+    return _TOKEN.findall(text or '')
+
+
+def build_match(user_id, terms, fields):
+    """
+    Expresión MATCH de FTS5: el usuario y cualquiera de los términos (como prefijos),
+    p. ej. owner : u5 AND {description source} : ("netflix"* OR "cargo"*).
+    Al ir entre comillas, la sintaxis de FTS5 del texto del usuario no se interpreta.
+    """
+    quoted = ' OR '.join(f'"{term}"*' for term in terms)
+    match = f"{{{' '.join(fields)}}} : ({quoted})"
+    if user_id is None:
+        return match
+    return f"owner : u{user_id} AND {match}"
+
+
+def uses_fts(queryset):
+    return connections[queryset.db].vendor == 'sqlite'
+
+
+def search_queryset(queryset, kind, text, user=None):
+    """Filtra `queryset` por el texto buscado y, en SQLite, lo anota con la relevancia."""
+    terms = search_terms(text)
+    if not terms:
+        return queryset.none()
+    fts_table, weights = SEARCH_FIELDS[kind]
+
+    if not uses_fts(queryset):
+        condition = Q()
+        for term in terms:
+            for field in weights:
+                condition |= Q(**{f'{field}__icontains': term})
+        return queryset.filter(condition)
+
+    # Join con la tabla FTS (no un IN + subconsulta correlacionada): así SQLite recorre
+    # primero el índice invertido y bm25() se calcula una vez por fila encontrada
+    match = build_match(user.pk if user is not None else None, terms, weights)
+    table = queryset.model._meta.db_table
+    bm25_weights = ', '.join(['0.0'] + [str(weight) for weight in weights.values()])
+    return queryset.extra(
+        tables=[fts_table],
+        where=[f'{fts_table}.rowid = {table}.id', f'{fts_table} MATCH %s'],
+        params=[match],
+    ).annotate(**{RANK_ANNOTATION: RawSQL(f'bm25({fts_table}, {bm25_weights})', ())})
@@ -1,6 +1,34 @@
 from rest_framework import serializers
 from .models import Category, Income, Expense
 from django.contrib.auth.models import User # Necesario si queremos mostrar info del usuario
+from django.db.models import Value
+from django.db.models.functions import Lower
+from .categories import resolver_from_context
+from .coalescing import save_coalesced
+from .fieldsets import SparseFieldsetMixin # ?fields= en las lecturas
+
+
+class CategoryRelatedField(serializers.PrimaryKeyRelatedField):
+    """
+    PrimaryKeyRelatedField que, con petición, resuelve la categoría desde el resolver
+    del usuario (una consulta por petición como mucho) en vez de un get() por campo.
+    Las categorías de otros usuarios no son visibles y se rechazan aquí mismo.
+    """
+    default_error_messages = {
+        'not_visible': "Categoría no válida o no pertenece al usuario.",
+    }
+
+    def to_internal_value(self, data):
+        resolver = resolver_from_context(self.context)
+        if resolver is None:
+            return super().to_internal_value(data)
+        if isinstance(data, bool):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        category = resolver.get(data)
+        if category is None:
+            self.fail('not_visible')
+        return category
+
 
 class CategorySerializer(serializers.ModelSerializer):
     # Opcional: Si quieres que el usuario se asigne automáticamente en la vista y no sea un campo editable
@@ -19,8 +47,8 @@ class CategorySerializer(serializers.ModelSerializer):
         # Validación de unicidad (user, name) a nivel de serializer si es necesario, aunque unique_together en el modelo ya lo maneja
         request = self.context.get('request')
         if request and hasattr(request, 'user') and request.user.is_authenticated:
-            user = request.user
-            if Category.objects.filter(user=user, name__iexact=value).exists():
+            # El resolver de la petición ya tiene las categorías del usuario: sin consulta extra
+            if resolver_from_context(self.context).own_named(value):
                  # Si es una actualización, permitir el mismo nombre si es el mismo objeto
                 if self.instance and self.instance.name.lower() == value.lower():
                     pass
@@ -28,17 +56,45 @@ class CategorySerializer(serializers.ModelSerializer):
                     raise serializers.ValidationError("Ya tienes una categoría con este nombre.")
         # Para categorías globales (user=None)
         elif not request or not hasattr(request, 'user') or not request.user.is_authenticated:
-             if Category.objects.filter(user=None, name__iexact=value).exists():
+             resolver = resolver_from_context(self.context)
+             if resolver is not None:
+                 exists = resolver.global_named(value) is not None
+             else:
+                 # Lower('name') = Lower(valor) usa el índice (user, lower(name)); iexact no
+                 exists = Category.objects.annotate(name_lower=Lower('name')).filter(user=None, name_lower=Lower(Value(value))).exists()
+             if exists:
                 if self.instance and self.instance.name.lower() == value.lower():
                     pass
                 else:
                     raise serializers.ValidationError("Ya existe una categoría global con este nombre.")
         return value
 
-class IncomeSerializer(serializers.ModelSerializer):
-    user = serializers.ReadOnlyField(source='user.username') # Para mostrar username en lugar de ID
+class OwnerUsernameField(serializers.ReadOnlyField):
+    """
+    username del dueño del movimiento. Si es el usuario de la petición (siempre, en los
+    listados) se toma de request.user, que con ClaimsJWTAuthentication sale del token:
+    no hace falta cargar ni unir auth_user.
+    """
+
+    def get_attribute(self, instance):
+        request = self.context.get('request')
+        user = getattr(request, 'user', None)
+        if user is not None and user.is_authenticated and instance.user_id == user.pk:
+            return user.username
+        return instance.user.username
+
+
+class CoalescedCreateMixin:
+    """Las altas pasan por save_coalesced() (agrupadas si settings.WRITE_COALESCING)."""
+
+    def create(self, validated_data):
+        return save_coalesced(self.Meta.model(**validated_data))
+
+
+class IncomeSerializer(SparseFieldsetMixin, CoalescedCreateMixin, serializers.ModelSerializer):
+    user = OwnerUsernameField() # Para mostrar username en lugar de ID
     category_name = serializers.CharField(source='category.name', read_only=True, allow_null=True)
-    category = serializers.PrimaryKeyRelatedField(
+    category = CategoryRelatedField(
         queryset=Category.objects.all(), 
         allow_null=True, 
         required=False
@@ -73,7 +129,8 @@ class IncomeSerializer(serializers.ModelSerializer):
         request = self.context.get('request')
         if value and request and hasattr(request, 'user') and request.user.is_authenticated:
             # Permitir categorías globales (user=None) o categorías del usuario actual
-            if value.user is not None and value.user != request.user:
+            # user_id evita cargar el usuario de la categoría con otra consulta
+            if value.user_id is not None and value.user_id != request.user.id:
                 raise serializers.ValidationError("Categoría no válida o no pertenece al usuario.")
         # Si value es None (categoría opcional), no hay nada que validar aquí.
         return value
@@ -98,11 +155,11 @@ class IncomeSerializer(serializers.ModelSerializer):
         # validated_data.pop('user', None) # Prevenir actualización del usuario
         return super().update(instance, validated_data)
 
-class ExpenseSerializer(serializers.ModelSerializer):
-    user = serializers.ReadOnlyField(source='user.username')
+class ExpenseSerializer(SparseFieldsetMixin, CoalescedCreateMixin, serializers.ModelSerializer):
+    user = OwnerUsernameField()
     # category = CategorySerializer() # Si quieres el objeto categoría completo al leer
     category_name = serializers.CharField(source='category.name', read_only=True, allow_null=True) # Para mostrar el nombre, permitir null si no hay categoría
-    category_id = serializers.PrimaryKeyRelatedField(
+    category_id = CategoryRelatedField(
         queryset=Category.objects.all(), 
         source='category', 
         write_only=True, 
@@ -127,7 +184,8 @@ class ExpenseSerializer(serializers.ModelSerializer):
         request = self.context.get('request')
         # Si 'value' es None (porque allow_null=True), no hay nada que validar aquí.
         if value and request and hasattr(request, 'user'):
-            if value.user is not None and value.user != request.user:
+            # user_id evita cargar el usuario de la categoría con otra consulta
+            if value.user_id is not None and value.user_id != request.user.id:
                 raise serializers.ValidationError("Categoría no válida o no pertenece al usuario.")
         return value
 
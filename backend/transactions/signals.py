@@ -0,0 +1,75 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.contrib.auth import get_user_model
+from django.db.models import QuerySet
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from .cache import bump_data_version
+from .models import Category, DataVersion, Expense, Income
+from .rollups import merge_into_uncategorized, record_delete
+
+
+# Modelos cuyos borrados ya ajustan rollups y versión de datos quien los hace (batch.py)
+_handled_deletes = ContextVar('handled_deletes', default=frozenset())
+
+
+@contextmanager
+def deletes_handled_by_caller(*models):
+    """Dentro del bloque, los borrados de `models` no actualizan rollups ni versión por fila."""
+    token = _handled_deletes.set(_handled_deletes.get() | frozenset(models))
+    try:
+        yield
+    finally:
+        _handled_deletes.reset(token)
+
+
+def _deleting_user(origin):
+    # Al borrar un usuario sus rollups caen en cascada: no hay nada que mantener
+    model = origin.model if isinstance(origin, QuerySet) else type(origin)
+    return issubclass(model, get_user_model())
+
+
+# Collector.delete() envía estas señales dentro de su transacción,
+# así que el rollup se actualiza de forma atómica con el borrado.
+@receiver(post_delete, sender=Income)
+@receiver(post_delete, sender=Expense)
+def update_rollup_on_delete(sender, instance, origin=None, **kwargs):
+    if sender in _handled_deletes.get() or (origin is not None and _deleting_user(origin)):
+        return
+    record_delete(instance)
+
+
+@receiver(pre_delete, sender=Category)
+def merge_rollups_on_category_delete(sender, instance, origin=None, **kwargs):
+    if origin is not None and _deleting_user(origin):
+        return
+    merge_into_uncategorized(instance)
+
+
+# Cada usuario nace con su fila de versión: así su primera escritura incrementa con un UPDATE,
+# como las demás, y no con UPDATE fallido + SAVEPOINT/INSERT/RELEASE (bump_data_version)
+@receiver(post_save, sender=get_user_model())
+def create_data_version(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        DataVersion.objects.create(user=instance)
+
+
+# Cualquier escritura invalida la caché de resúmenes del dueño de los datos; solo las de
+# Category, además, la de resolvers de categorías.
+# Para Income/Expense post_save llega dentro del atomic() de RollupTrackedModel.save().
+@receiver(post_save, sender=Income)
+@receiver(post_save, sender=Expense)
+@receiver(post_save, sender=Category)
+def bump_version_on_save(sender, instance, **kwargs):
+    bump_data_version(instance.user_id, categories=sender is Category)
+
+
+@receiver(post_delete, sender=Income)
+@receiver(post_delete, sender=Expense)
+@receiver(post_delete, sender=Category)
+def bump_version_on_delete(sender, instance, origin=None, **kwargs):
+    if sender in _handled_deletes.get() or (origin is not None and _deleting_user(origin)):
+        return
+    bump_data_version(instance.user_id, categories=sender is Category)
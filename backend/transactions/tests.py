@@ -1,3 +1,1185 @@
-from django.test import TestCase
+import base64
+import json
+import threading
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db import IntegrityError, connection
+from django.db.models import Q
+from django.test import AsyncClient, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+
+from accounts.authentication import user_status
+from accounts.serializers import ClaimsTokenObtainPairSerializer
+from config.query_budget import QueryBudgetExceeded, endpoints_without_budget
+
+from .cache import CATEGORY_CACHE_ALIAS, SUMMARY_CACHE_ALIAS, InstrumentedLocMemCache, stats_for
+from .categories import get_category_resolver
+from .coalescing import WriteCoalescer, get_write_coalescer
+from .fastlist import RowPlan
+from .filters import ExpenseFilter, IncomeFilter
+from .models import Category, DataVersion, Expense, Income, MonthlyRollup
+from .serializers import ExpenseSerializer, IncomeSerializer
+from .recurrence import count_occurrences, iter_occurrences, normalize_recurrence, recurring_totals
+from .rollups import compute_rollups, rebuild_rollups, stored_rollups, verify_rollups
+from .timeseries import GRANULARITIES, ZERO, get_timeseries
+
+
+class TransactionsTestMixin:
+    """Usuario autenticado con cachés limpias (SQLite reutiliza los pk entre tests)."""
+
+    def setUp(self):
+        for alias in ('default', SUMMARY_CACHE_ALIAS, CATEGORY_CACHE_ALIAS):
+            caches[alias].clear()
+        user_status.clear()
+        self.user = User.objects.create_user('ana@example.com', password='secreta-123')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.category = Category.objects.create(user=self.user, name='Comida')
+
+    def create_income(self, amount='100.00', day=date(2024, 3, 10), **kwargs):
+        kwargs.setdefault('description', 'Sueldo')
+        kwargs.setdefault('category', self.category)
+        return Income.objects.create(user=self.user, amount=Decimal(amount), date=day, **kwargs)
+
+    def create_expense(self, amount='10.00', day=date(2024, 3, 10), **kwargs):
+        kwargs.setdefault('description', 'Supermercado')
+        kwargs.setdefault('category', self.category)
+        return Expense.objects.create(user=self.user, amount=Decimal(amount), date=day, **kwargs)
+
+
+class TransactionsTestCase(TransactionsTestMixin, TestCase):
+    pass
+
+
+def make_cursor(values, reverse=False):
+    payload = {'v': values}
+    if reverse:
+        payload['r'] = True
+    return base64.urlsafe_b64encode(json.dumps(payload).encode('utf-8')).decode('ascii')
+
+
+class KeysetPaginationTests(TransactionsTestCase):
+
+    def test_pages_follow_next_link(self):
+        for day in range(1, 8):
+            self.create_expense(day=date(2024, 3, day))
+        url = reverse('expense-list-create')
+        seen = []
+        response = self.client.get(url, {'page_size': 3})
+        while True:
+            self.assertEqual(response.status_code, 200)
+            seen += [row['date'] for row in response.data['results']]
+            if response.data['next'] is None:
+                break
+            response = self.client.get(response.data['next'])
+        self.assertEqual(seen, [date(2024, 3, day).isoformat() for day in range(7, 0, -1)])
+
+    def test_tampered_cursor_is_not_found(self):
+        self.create_expense()
+        url = reverse('expense-list-create')
+        tampered = [
+            ['notadate', 'x', 1],
+            ['2024-03-10', 'notadatetime', 1],
+            ['2024-03-10', '2024-03-10T00:00:00+00:00', 'x'],
+            ['2024-03-10', None, 1],
+            [['2024-03-10'], '2024-03-10T00:00:00+00:00', 1],
+            ['2024-03-10', '2024-03-10T00:00:00+00:00'],
+        ]
+        for values in tampered:
+            with self.subTest(values=values):
+                response = self.client.get(url, {'cursor': make_cursor(values)})
+                self.assertEqual(response.status_code, 404)
+        self.assertEqual(self.client.get(url, {'cursor': 'no-es-base64!'}).status_code, 404)
+
+    def test_tampered_ordering_cursor_is_not_found(self):
+        self.create_expense()
+        url = reverse('expense-list-create')
+        cursor = make_cursor(['mucho', '2024-03-10', '2024-03-10T00:00:00+00:00', 1])
+        response = self.client.get(url, {'ordering': '-amount', 'cursor': cursor})
+        self.assertEqual(response.status_code, 404)
+
+    def test_search_pages_follow_next_link(self):
+        for day in range(1, 6):
+            self.create_expense(day=date(2024, 3, day), description=f'Café {day}')
+        url = reverse('expense-list-create')
+        response = self.client.get(url, {'search': 'café', 'page_size': 2})
+        total = len(response.data['results'])
+        while response.data['next'] is not None:
+            response = self.client.get(response.data['next'])
+            self.assertEqual(response.status_code, 200)
+            total += len(response.data['results'])
+        self.assertEqual(total, 5)
+
+
+class TransactionFilterTests(TransactionsTestCase):
+
+    def filtered(self, filterset_class, data):
+        model = filterset_class._meta.model
+        return filterset_class(data=data, queryset=model.objects.filter(user=self.user)).qs
+
+    def test_month_and_year_compile_to_date_range(self):
+        for filterset_class in (IncomeFilter, ExpenseFilter):
+            for data in ({'month': 2, 'year': 2024}, {'year': 2024}):
+                with self.subTest(filterset=filterset_class.__name__, data=data):
+                    sql = str(self.filtered(filterset_class, data).query)
+                    self.assertIn('"date" BETWEEN', sql)
+                    self.assertNotIn('django_date_extract', sql)
+
+    def test_month_and_year_use_user_date_index(self):
+        for filterset_class, index in ((IncomeFilter, 'income_user_date_idx'), (ExpenseFilter, 'expense_user_date_idx')):
+            with self.subTest(filterset=filterset_class.__name__):
+                plan = self.filtered(filterset_class, {'month': 2, 'year': 2024}).explain()
+                self.assertIn(f'USING INDEX {index}', plan)
+
+    def test_month_and_year_bounds(self):
+        inside = [self.create_expense(day=date(2024, 2, 1)), self.create_expense(day=date(2024, 2, 29))]
+        self.create_expense(day=date(2024, 1, 31))
+        self.create_expense(day=date(2024, 3, 1))
+        self.create_expense(day=date(2023, 2, 15))
+        self.assertCountEqual(self.filtered(ExpenseFilter, {'month': 2, 'year': 2024}), inside)
+        self.assertEqual(self.filtered(ExpenseFilter, {'year': 2024}).count(), 4)
+        # Sin año, el mes se filtra en todos los años
+        self.assertEqual(self.filtered(ExpenseFilter, {'month': 2}).count(), 3)
+
+    def test_amount_range(self):
+        self.create_income(amount='9.99')
+        inside = [self.create_income(amount='10.00'), self.create_income(amount='20.00')]
+        self.create_income(amount='20.01')
+        self.assertCountEqual(self.filtered(IncomeFilter, {'amount_min': '10', 'amount_max': '20'}), inside)
+
+    def test_date_range(self):
+        self.create_income(day=date(2024, 2, 29))
+        inside = [self.create_income(day=date(2024, 3, 1)), self.create_income(day=date(2024, 3, 15))]
+        self.create_income(day=date(2024, 3, 16))
+        queryset = self.filtered(IncomeFilter, {'date_from': '2024-03-01', 'date_to': '2024-03-15'})
+        self.assertCountEqual(queryset, inside)
+        self.assertIn('USING INDEX income_user_date_idx', queryset.explain())
+
+    def test_search_combined_with_period_and_amount(self):
+        match = self.create_expense(amount='25.00', day=date(2024, 3, 5), description='Café con leche')
+        self.create_expense(amount='5.00', day=date(2024, 3, 6), description='Café solo')
+        self.create_expense(amount='25.00', day=date(2024, 4, 5), description='Café de abril')
+        self.create_expense(amount='25.00', day=date(2024, 3, 7), description='Gasolina')
+        queryset = self.filtered(ExpenseFilter, {'search': 'cafe', 'month': 3, 'year': 2024, 'amount_min': '10'})
+        self.assertEqual(list(queryset), [match])
+        sql = str(queryset.query)
+        self.assertIn('"date" BETWEEN', sql)
+        self.assertNotIn('django_date_extract', sql)
+
+        response = self.client.get(reverse('expense-list-create'), {'search': 'café', 'month': 3, 'year': 2024, 'amount_min': '10'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row['id'] for row in response.data['results']], [match.id])
+
+
+class RollupTests(TransactionsTestCase):
+    """Cada escritura deja MonthlyRollup igual a agregar los movimientos desde cero."""
+
+    def assert_rollups_match(self):
+        self.assertEqual(verify_rollups(), [])
+        self.assertEqual(stored_rollups(), compute_rollups())
+
+    def test_create(self):
+        self.create_income(amount='100.00', day=date(2024, 1, 5))
+        self.create_income(amount='50.50', day=date(2024, 1, 20))
+        self.create_income(amount='7.00', day=date(2024, 2, 1), category=None)
+        self.create_expense(amount='3.25', day=date(2024, 1, 31))
+        self.assert_rollups_match()
+        self.assertEqual(
+            stored_rollups()[(self.user.id, date(2024, 1, 1), self.category.id, 'income')],
+            (Decimal('150.50'), 2),
+        )
+
+    def test_update(self):
+        other = Category.objects.create(user=self.user, name='Otra')
+        for model_factory in (self.create_income, self.create_expense):
+            with self.subTest(model=model_factory.__name__):
+                item = model_factory(amount='10.00', day=date(2024, 1, 15))
+                model_factory(amount='1.00', day=date(2024, 1, 16))
+
+                item.amount = Decimal('12.34')
+                item.save()
+                self.assert_rollups_match()
+
+                item.date = date(2023, 12, 31)
+                item.save()
+                self.assert_rollups_match()
+
+                item.category = other
+                item.save(update_fields=['category'])
+                self.assert_rollups_match()
+
+                item.category = None
+                item.amount = Decimal('99.99')
+                item.date = date(2024, 3, 1)
+                item.save()
+                self.assert_rollups_match()
+
+    def test_delete(self):
+        kept = self.create_income(amount='5.00', day=date(2024, 1, 1))
+        self.create_income(amount='6.00', day=date(2024, 1, 2)).delete()
+        self.create_expense(amount='7.00', day=date(2024, 2, 2)).delete()
+        self.assert_rollups_match()
+        kept.delete()
+        self.assert_rollups_match()
+        self.assertEqual(stored_rollups(), {})
+
+    def test_category_delete_merges_into_uncategorized(self):
+        # Enero ya tiene bucket sin categoría; febrero no
+        self.create_income(amount='1.00', day=date(2024, 1, 10), category=None)
+        self.create_income(amount='2.00', day=date(2024, 1, 11))
+        self.create_income(amount='3.00', day=date(2024, 2, 11))
+        self.create_expense(amount='4.00', day=date(2024, 2, 12))
+        category_id = self.category.id
+        self.category.delete()
+        self.assert_rollups_match()
+        self.assertFalse(MonthlyRollup.objects.filter(category_id=category_id).exists())
+        self.assertEqual(
+            stored_rollups()[(self.user.id, date(2024, 1, 1), None, 'income')],
+            (Decimal('3.00'), 2),
+        )
+
+    def test_rebuild_command_reports_and_fixes_drift(self):
+        self.create_income(amount='10.00', day=date(2024, 1, 10))
+        MonthlyRollup.objects.filter(user=self.user).update(total=Decimal('11.00'))
+
+        stderr = StringIO()
+        with self.assertRaises(CommandError):
+            call_command('rebuild_rollups', verify_only=True, stdout=StringIO(), stderr=stderr)
+        self.assertIn("mes=2024-01", stderr.getvalue())
+        self.assertIn("guardado=(Decimal('11.00'), 1)", stderr.getvalue())
+
+        stdout = StringIO()
+        call_command('rebuild_rollups', users=[self.user.id], stdout=stdout)
+        self.assertIn('Rollups verificados', stdout.getvalue())
+        self.assert_rollups_match()
+
+    def test_seed_rebuilds_rollups_in_chunks(self):
+        command = 'transactions.management.commands.seed_finance'
+        with mock.patch(f'{command}.ROLLUP_USERS_PER_CHUNK', 2), \
+                mock.patch(f'{command}.rebuild_rollups', wraps=rebuild_rollups) as rebuild:
+            call_command('seed_finance', users=3, transactions=20, months=3, stdout=StringIO())
+        user_ids = list(User.objects.filter(username__startswith='seed').order_by('id').values_list('id', flat=True))
+        self.assertEqual([call.args[0] for call in rebuild.call_args_list], [user_ids[:2], user_ids[2:]])
+        self.assertEqual(verify_rollups(user_ids), [])
+        self.assertEqual(set(user_id for user_id, *_ in stored_rollups(user_ids)), set(user_ids))
+
+
+def naive_occurrences(anchor, recurrence, range_start, range_end):
+    """Ocurrencias k >= 1 enumeradas una a una, para comparar con el cálculo aritmético."""
+    steps = {'daily': (1, 0), 'weekly': (7, 0), 'biweekly': (14, 0), 'monthly': (0, 1), 'annually': (0, 12)}
+    days, months = steps[recurrence]
+    found, k = [], 1
+    while True:
+        if days:
+            value = anchor + timedelta(days=k * days)
+        else:
+            index = anchor.year * 12 + anchor.month - 1 + k * months
+            year, month = divmod(index, 12)
+            day = anchor.day
+            while True:
+                try:
+                    value = date(year, month + 1, day)
+                    break
+                except ValueError:
+                    day -= 1
+        if value > range_end:
+            return found
+        if range_start is None or value >= range_start:
+            found.append(value)
+        k += 1
+
+
+class RecurrenceTests(SimpleTestCase):
+
+    def test_month_end_is_clamped(self):
+        cases = (
+            (date(2024, 1, 31), 'monthly', [date(2024, 2, 29), date(2024, 3, 31), date(2024, 4, 30)]),
+            (date(2023, 1, 31), 'monthly', [date(2023, 2, 28), date(2023, 3, 31), date(2023, 4, 30)]),
+            (date(2024, 2, 29), 'annually', [date(2025, 2, 28), date(2026, 2, 28), date(2027, 2, 28)]),
+        )
+        for anchor, recurrence, expected in cases:
+            with self.subTest(anchor=anchor, recurrence=recurrence):
+                range_end = expected[-1]
+                self.assertEqual(list(iter_occurrences(anchor, recurrence, None, range_end)), expected)
+                self.assertEqual(count_occurrences(anchor, recurrence, None, range_end), len(expected))
+
+    def test_ranges(self):
+        anchor = date(2024, 1, 10)
+        cases = (
+            # (recurrencia, desde, hasta, ocurrencias)
+            ('weekly', date(2023, 1, 1), date(2024, 1, 31), [date(2024, 1, 17), date(2024, 1, 24), date(2024, 1, 31)]),
+            ('weekly', None, date(2024, 1, 16), []),
+            ('weekly', date(2024, 1, 10), date(2024, 1, 10), []), # la propia fila no es virtual
+            ('daily', date(2024, 2, 1), date(2024, 1, 31), []),
+            ('biweekly', date(2024, 1, 25), date(2024, 2, 7), [date(2024, 2, 7)]),
+            ('monthly', date(2024, 3, 11), date(2024, 4, 9), []),
+            ('annually', date(2020, 1, 1), date(2026, 1, 10), [date(2025, 1, 10), date(2026, 1, 10)]),
+            ('none', None, date(2030, 1, 1), []),
+        )
+        for recurrence, range_start, range_end, expected in cases:
+            with self.subTest(recurrence=recurrence, range_start=range_start, range_end=range_end):
+                self.assertEqual(list(iter_occurrences(anchor, recurrence, range_start, range_end)), expected)
+                self.assertEqual(count_occurrences(anchor, recurrence, range_start, range_end), len(expected))
+
+    def test_matches_naive_enumeration(self):
+        anchors = [date(2024, 1, 31), date(2023, 12, 30), date(2024, 2, 29), date(2024, 3, 1)]
+        starts = [None, date(2023, 6, 15), date(2024, 2, 28), date(2024, 3, 31)]
+        ends = [date(2024, 1, 30), date(2024, 2, 29), date(2024, 12, 31), date(2027, 3, 1)]
+        for recurrence in ('daily', 'weekly', 'biweekly', 'monthly', 'annually'):
+            for anchor in anchors:
+                for range_start in starts:
+                    for range_end in ends:
+                        expected = naive_occurrences(anchor, recurrence, range_start, range_end)
+                        with self.subTest(recurrence=recurrence, anchor=anchor, range_start=range_start, range_end=range_end):
+                            self.assertEqual(list(iter_occurrences(anchor, recurrence, range_start, range_end)), expected)
+                            self.assertEqual(count_occurrences(anchor, recurrence, range_start, range_end), len(expected))
+
+    def test_expense_aliases(self):
+        cases = {
+            'Mensual': 'monthly', 'mensualmente': 'monthly', 'cada  mes': 'monthly', 'MONTHLY': 'monthly',
+            'diario': 'daily', 'Todos los días': 'daily',
+            'semanal': 'weekly', 'cada-semana': 'weekly',
+            'quincenal': 'biweekly', 'bisemanal': 'biweekly', 'fortnightly': 'biweekly',
+            'anual': 'annually', 'yearly': 'annually', 'cada año': 'annually',
+            '': 'none', None: 'none', 'a veces': 'none', 'none': 'none',
+        }
+        for value, expected in cases.items():
+            with self.subTest(value=value):
+                self.assertEqual(normalize_recurrence(value), expected)
+
+
+class RecurringTotalsTests(TransactionsTestCase):
+
+    def test_totals_use_normalized_expense_recurrence(self):
+        self.create_expense(amount='10.00', day=date(2024, 1, 31), recurrence='Mensual')
+        self.create_expense(amount='1.00', day=date(2024, 1, 1), recurrence='cada semana', category=None)
+        self.create_expense(amount='99.00', day=date(2024, 1, 1), recurrence='de vez en cuando')
+        self.create_income(amount='100.00', day=date(2024, 1, 15), recurrence='annually')
+        totals = recurring_totals(self.user, date(2024, 4, 30))
+        self.assertEqual(totals, {
+            ('expense', 'Comida'): Decimal('30.00'), # 29/02, 31/03, 30/04
+            ('expense', None): Decimal('17.00'), # 8/01 ... 29/04
+        })
+        # Del 1 al 15 de enero de 2025: la mensual cae el 31 y no cuenta
+        self.assertEqual(recurring_totals(self.user, date(2025, 1, 15), since=date(2025, 1, 1)), {
+            ('expense', None): Decimal('2.00'), # 6/01 y 13/01
+            ('income', 'Comida'): Decimal('100.00'),
+        })
+
+
+def naive_period(day, granularity):
+    if granularity == 'day':
+        return day
+    if granularity == 'week':
+        return day - timedelta(days=day.weekday())
+    if granularity == 'month':
+        return day.replace(day=1)
+    return day.replace(month=1, day=1)
+
+
+class TimeseriesTests(TransactionsTestCase):
+    """get_timeseries frente a agregar fila a fila en Python lo que cae en el rango."""
+
+    def setUp(self):
+        super().setUp()
+        other = Category.objects.create(user=self.user, name='Ocio')
+        # Enero y abril con movimientos, febrero y marzo vacíos; junio solo con gastos
+        for amount, day, category in (
+            ('100.00', date(2024, 1, 3), self.category),
+            ('20.50', date(2024, 1, 20), None),
+            ('7.25', date(2024, 1, 31), other),
+            ('300.00', date(2024, 4, 1), self.category),
+            ('0.10', date(2024, 4, 15), self.category),
+            ('45.00', date(2024, 4, 30), other),
+            ('1.00', date(2024, 7, 2), self.category),
+        ):
+            self.create_income(amount=amount, day=day, category=category)
+        for amount, day, category in (
+            ('9.99', date(2024, 1, 10), self.category),
+            ('12.00', date(2024, 4, 16), None),
+            ('3.00', date(2024, 6, 6), other),
+            ('4.00', date(2024, 6, 28), self.category),
+        ):
+            self.create_expense(amount=amount, day=day, category=category)
+
+    def naive(self, start, end, granularity, by_category=False):
+        periods = {}
+        day = start
+        while day <= end:
+            periods.setdefault(naive_period(day, granularity), {'income': ZERO, 'expense': ZERO, 'categories': {}})
+            day += timedelta(days=1)
+        for kind, model in (('income', Income), ('expense', Expense)):
+            for item in model.objects.filter(user=self.user).select_related('category'):
+                if not start <= item.date <= end:
+                    continue
+                bucket = periods[naive_period(item.date, granularity)]
+                bucket[kind] += item.amount
+                key = (kind, item.category.name if item.category else None)
+                bucket['categories'][key] = bucket['categories'].get(key, ZERO) + item.amount
+        series = []
+        for period, bucket in periods.items():
+            point = {
+                'period': period,
+                'income': bucket['income'],
+                'expense': bucket['expense'],
+                'net': bucket['income'] - bucket['expense'],
+            }
+            if by_category:
+                for kind, field in (('income', 'incomes_by_category'), ('expense', 'expenses_by_category')):
+                    point[field] = sorted(
+                        ({'category_name': name, 'total_amount': total}
+                         for (row_kind, name), total in bucket['categories'].items() if row_kind == kind),
+                        key=lambda entry: (entry['total_amount'], entry['category_name'] or ''),
+                    )
+            series.append(point)
+        return series
+
+    def assert_matches_naive(self, start, end, granularity, by_category=False):
+        series = get_timeseries(self.user, start, end, granularity, by_category=by_category)
+        if by_category:
+            # El orden entre categorías con el mismo total no está definido
+            for point in series:
+                for field in ('incomes_by_category', 'expenses_by_category'):
+                    point[field] = sorted(point[field], key=lambda entry: (entry['total_amount'], entry['category_name'] or ''))
+        self.assertEqual(series, self.naive(start, end, granularity, by_category))
+        return series
+
+    def test_matches_naive_aggregate(self):
+        ranges = (
+            (date(2024, 1, 1), date(2024, 7, 31)), # solo meses completos
+            (date(2024, 1, 15), date(2024, 4, 15)), # extremos parciales
+            (date(2024, 1, 31), date(2024, 4, 1)), # un día de cada extremo
+            (date(2024, 4, 2), date(2024, 4, 29)), # dentro de un mes
+            (date(2023, 11, 20), date(2025, 2, 3)), # varios años
+        )
+        for start, end in ranges:
+            for granularity in GRANULARITIES:
+                for by_category in (False, True):
+                    with self.subTest(start=start, end=end, granularity=granularity, by_category=by_category):
+                        self.assert_matches_naive(start, end, granularity, by_category)
+
+    def test_empty_periods_are_zero(self):
+        series = self.assert_matches_naive(date(2023, 12, 10), date(2024, 6, 10), 'month', by_category=True)
+        self.assertEqual(
+            [point['period'] for point in series],
+            [date(2023, 12, 1)] + [date(2024, month, 1) for month in range(1, 7)],
+        )
+        empty = {point['period']: point for point in series if point['period'] in (date(2023, 12, 1), date(2024, 2, 1), date(2024, 3, 1))}
+        self.assertEqual(len(empty), 3)
+        for point in empty.values():
+            self.assertEqual(
+                (point['income'], point['expense'], point['net'], point['incomes_by_category'], point['expenses_by_category']),
+                (ZERO, ZERO, ZERO, [], []),
+            )
+        self.assertEqual(len(get_timeseries(self.user, date(2024, 2, 1), date(2024, 3, 31), 'day')), 60)
+
+    def test_full_months_come_from_rollups_and_partial_ones_from_rows(self):
+        # Un rollup alterado a mano solo se nota en los meses que el rango cubre enteros
+        MonthlyRollup.objects.filter(user=self.user, kind='income').update(total=Decimal('1000.00'))
+        series = {
+            point['period']: point['income']
+            for point in get_timeseries(self.user, date(2024, 1, 15), date(2024, 4, 30), 'month')
+        }
+        self.assertEqual(series[date(2024, 1, 1)], Decimal('27.75'))
+        self.assertEqual(series[date(2024, 4, 1)], Decimal('2000.00'))
+        # Abril: dos categorías con rollup alterado
+        series = get_timeseries(self.user, date(2024, 1, 15), date(2024, 6, 30), 'year')
+        self.assertEqual(series[0]['income'], Decimal('2027.75'))
+
+
+class BatchMutationTests(TransactionsTestCase):
+
+    def test_mixed_batch_keeps_rollups_in_sync(self):
+        other = Category.objects.create(user=self.user, name='Transporte')
+        doomed = Category.objects.create(user=self.user, name='Ocio')
+        incomes = [self.create_income(day=date(2024, 1, 5)), self.create_income(day=date(2024, 2, 5))]
+        expenses = [self.create_expense(day=date(2024, 1, 7)), self.create_expense(day=date(2024, 3, 7))]
+        cinema = self.create_expense(amount='12.00', day=date(2024, 2, 9), category=doomed)
+        # Supervivientes en los buckets de los borrados: un ajuste doble los dejaría mal
+        self.create_income(amount='7.00', day=date(2024, 2, 25))
+        self.create_expense(amount='3.00', day=date(2024, 3, 25))
+
+        operations = [
+            {'op': 'create', 'model': 'expense', 'data': {'description': 'Bus', 'amount': '1.50', 'date': '2024-02-01', 'category': other.id}},
+            {'op': 'create', 'model': 'income', 'data': {'description': 'Extra', 'amount': '50.00', 'date': '2024-03-01'}},
+            {'op': 'update', 'model': 'expense', 'id': expenses[0].id, 'data': {'amount': '99.00', 'date': '2024-02-20', 'category': other.id}},
+            {'op': 'update', 'model': 'income', 'id': incomes[0].id, 'data': {'category': None}},
+            {'op': 'delete', 'model': 'expense', 'id': expenses[1].id},
+            {'op': 'delete', 'model': 'income', 'id': incomes[1].id},
+            {'op': 'delete', 'model': 'category', 'id': doomed.id},
+        ]
+        response = self.client.post(reverse('transaction-batch'), {'operations': operations}, format='json')
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertFalse(Expense.objects.filter(pk=expenses[1].pk).exists())
+        self.assertFalse(Income.objects.filter(pk=incomes[1].pk).exists())
+        cinema.refresh_from_db()
+        self.assertIsNone(cinema.category_id)
+
+        self.assertEqual(verify_rollups([self.user.pk]), [])
+        stored = stored_rollups([self.user.pk])
+        self.assertEqual(stored, compute_rollups([self.user.pk]))
+        rebuild_rollups([self.user.pk])
+        self.assertEqual(stored, stored_rollups([self.user.pk]))
+
+    def test_batch_delete_invalidates_summaries(self):
+        expense = self.create_expense(amount='40.00')
+        url = reverse('financial-summary')
+        self.assertEqual(Decimal(str(self.client.get(url).data['expenses'])), Decimal('40.00'))
+        operations = [{'op': 'delete', 'model': 'expense', 'id': expense.id}]
+        self.assertEqual(self.client.post(reverse('transaction-batch'), {'operations': operations}, format='json').status_code, 200)
+        self.assertEqual(Decimal(str(self.client.get(url).data['expenses'] or 0)), Decimal('0'))
+
+
+class ExportImportRoundTripTests(TransactionsTestCase):
+    compared = {
+        'income': ('date', 'amount', 'category_id', 'source', 'recurrence', 'description'),
+        'expense': ('date', 'amount', 'category_id', 'payment_method', 'recurrence', 'description'),
+    }
+
+    def export(self, kind, file_format):
+        response = self.client.get(reverse(f'{kind}-export'), {'file_format': file_format})
+        self.assertEqual(response.status_code, 200)
+        return b''.join(response.streaming_content)
+
+    def snapshot(self, model, kind):
+        return sorted(model.objects.filter(user=self.user).values_list(*self.compared[kind]))
+
+    def test_csv_and_ndjson_write_the_same_datetimes(self):
+        income = self.create_income()
+        csv_row = self.export('income', 'csv').decode('utf-8-sig').splitlines()[1]
+        ndjson_row = json.loads(self.export('income', 'ndjson'))
+        self.assertEqual(ndjson_row['created_at'], income.created_at.isoformat())
+        self.assertIn(ndjson_row['created_at'], csv_row)
+        self.assertEqual(ndjson_row['amount'], '100.00')
+
+    def test_export_round_trips_through_import(self):
+        kinds = (
+            ('income', Income, lambda **kwargs: self.create_income(source='Empresa', recurrence='monthly', **kwargs)),
+            ('expense', Expense, lambda **kwargs: self.create_expense(payment_method='tarjeta', **kwargs)),
+        )
+        for kind, model, create in kinds:
+            create(amount='1234.56', day=date(2024, 1, 31), description='Con "comillas", comas y ñ')
+            create(amount='0.01', day=date(2024, 2, 29), category=None)
+            for file_format in ('csv', 'ndjson'):
+                with self.subTest(kind=kind, file_format=file_format):
+                    before = self.snapshot(model, kind)
+                    exported = self.export(kind, file_format)
+                    model.objects.filter(user=self.user).delete()
+
+                    upload = SimpleUploadedFile(f'export.{file_format}', exported)
+                    response = self.client.post(reverse(f'{kind}-import'), {'file': upload}, format='multipart')
+                    self.assertEqual(response.status_code, 201, response.data)
+                    self.assertEqual(response.data['created'], len(before))
+                    self.assertEqual(response.data['error_count'], 0)
+                    self.assertEqual(self.snapshot(model, kind), before)
+
+
+class FastListSerializationTests(TransactionsTestCase):
+    """RowPlan.serialize debe producir el mismo JSON, byte a byte, que el serializer de DRF."""
+
+    def setUp(self):
+        super().setUp()
+        for amount, day, category in (
+            ('1234.5', date(2024, 2, 29), self.category),
+            ('0.01', date(2023, 12, 31), None),
+            ('99999999.99', date(2024, 1, 1), self.category),
+        ):
+            self.create_income(amount=amount, day=day, category=category, source='', recurrence='monthly')
+            self.create_expense(amount=amount, day=day, category=category, payment_method=None)
+
+    def assert_same_output(self, serializer_class, model, fields=None):
+        request = Request(APIRequestFactory().get('/', {'fields': fields} if fields else {}))
+        request.user = self.user
+        context = {'request': request}
+        queryset = model.objects.filter(user=self.user).select_related('category').order_by('-date', '-id')
+        plan = RowPlan.for_serializer(serializer_class(context=context))
+        self.assertIsNotNone(plan)
+
+        renderer = JSONRenderer()
+        expected = renderer.render(serializer_class(queryset, many=True, context=context).data)
+        self.assertEqual(renderer.render(plan.serialize(plan.values(queryset))), expected)
+        return json.loads(expected)
+
+    def test_full_rows(self):
+        for serializer_class, model in ((IncomeSerializer, Income), (ExpenseSerializer, Expense)):
+            with self.subTest(model=model.__name__):
+                rows = self.assert_same_output(serializer_class, model)
+                self.assertEqual([row['amount'] for row in rows], ['1234.50', '99999999.99', '0.01'])
+                self.assertEqual(rows[0]['date'], '2024-02-29')
+                self.assertIsNone(rows[2]['category_name'])
+
+    def test_sparse_fields(self):
+        for fields in ('amount,date', 'category_name', 'id,created_at,updated_at,user', 'date,amount,category_name'):
+            for serializer_class, model in ((IncomeSerializer, Income), (ExpenseSerializer, Expense)):
+                with self.subTest(model=model.__name__, fields=fields):
+                    rows = self.assert_same_output(serializer_class, model, fields)
+                    self.assertEqual(set(rows[0]), set(fields.split(',')))
+
+
+class SparseFieldsetTests(TransactionsTestCase):
+    """?fields= y ?format=columns a través de las vistas."""
+
+    def setUp(self):
+        super().setUp()
+        self.incomes = [
+            self.create_income(amount='1.00', day=date(2024, 3, 1)),
+            self.create_income(amount='2.00', day=date(2024, 3, 2), category=None),
+            self.create_income(amount='3.00', day=date(2024, 3, 3)),
+        ]
+
+    def get(self, name, params, **kwargs):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(reverse(name, kwargs=kwargs or None), params)
+        return response, [query['sql'] for query in context.captured_queries]
+
+    def test_unknown_field_is_rejected(self):
+        for name, kwargs in (('income-list-create', {}), ('income-detail', {'pk': self.incomes[0].pk}), ('expense-list-create', {})):
+            with self.subTest(name=name):
+                response, _ = self.get(name, {'fields': 'id,importe'}, **kwargs)
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('importe', response.data['fields'][0])
+                self.assertIn('category_name', response.data['fields'][0])
+
+    def test_nested_field_joins_only_when_requested(self):
+        response, queries = self.get('income-list-create', {'fields': 'category_name,amount'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['results'], [
+            {'amount': '3.00', 'category_name': 'Comida'},
+            {'amount': '2.00', 'category_name': None},
+            {'amount': '1.00', 'category_name': 'Comida'},
+        ])
+        self.assertTrue(any('JOIN "transactions_category"' in sql for sql in queries))
+
+        response, queries = self.get('income-list-create', {'fields': 'id,amount'})
+        self.assertEqual(list(response.data['results'][0]), ['id', 'amount'])
+        self.assertFalse(any('"transactions_category"' in sql for sql in queries))
+
+        # El detalle lee instancias con .only(): sin category_name tampoco hay JOIN
+        response, queries = self.get('income-detail', {'fields': 'category_name'}, pk=self.incomes[0].pk)
+        self.assertEqual(response.data, {'category_name': 'Comida'})
+        self.assertTrue(any('JOIN "transactions_category"' in sql for sql in queries))
+        response, queries = self.get('income-detail', {'fields': 'amount'}, pk=self.incomes[0].pk)
+        self.assertEqual(response.data, {'amount': '1.00'})
+        self.assertFalse(any('"transactions_category"' in sql for sql in queries))
+
+    def test_writes_ignore_fields(self):
+        response = self.client.post(
+            reverse('income-list-create') + '?fields=id', {'amount': '4.00', 'date': '2024-03-04'}, format='json',
+        )
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertIn('amount', response.data)
+        self.assertIn('category_name', response.data)
+
+    def test_columnar_pages(self):
+        response = self.client.get(reverse('income-list-create'), {'format': 'columns', 'fields': 'id,amount,category_name', 'page_size': 2})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/vnd.columns+json')
+        page = response.json()
+        self.assertEqual(page['results'], {
+            'id': [self.incomes[2].pk, self.incomes[1].pk],
+            'amount': ['3.00', '2.00'],
+            'category_name': ['Comida', None],
+        })
+        self.assertIsNone(page['previous'])
+
+        # El enlace conserva format y fields
+        page = self.client.get(page['next']).json()
+        self.assertEqual(page['results'], {'id': [self.incomes[0].pk], 'amount': ['1.00'], 'category_name': ['Comida']})
+        self.assertIsNone(page['next'])
+
+        # También por Accept, y sin filas las columnas salen del serializer recortado
+        response = self.client.get(
+            reverse('income-list-create'), {'fields': 'date,amount', 'date_from': '2030-01-01'},
+            HTTP_ACCEPT='application/vnd.columns+json',
+        )
+        self.assertEqual(response.json()['results'], {'date': [], 'amount': []})
+
+    def test_columnar_errors_are_plain_json(self):
+        response = self.client.get(reverse('income-list-create'), {'format': 'columns', 'fields': 'importe'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('fields', response.json())
+
+
+class SummaryCacheTests(TransactionsTestCase):
+    """Caché de resúmenes y ETag: las dos se invalidan con la versión de datos del usuario."""
+
+    def data_version(self):
+        return DataVersion.objects.get(user=self.user).version
+
+    def test_write_bumps_version_and_misses_cache(self):
+        self.create_income(amount='100.00')
+        stats = stats_for(SUMMARY_CACHE_ALIAS)
+        stats.reset()
+        url = reverse('financial-summary')
+
+        self.assertEqual(Decimal(self.client.get(url).data['balance']), Decimal('100.00'))
+        self.assertEqual(Decimal(self.client.get(url).data['balance']), Decimal('100.00'))
+        self.assertEqual((stats.hits, stats.misses), (1, 1))
+
+        version = self.data_version()
+        self.create_expense(amount='30.00')
+        self.assertEqual(self.data_version(), version + 1)
+        # La clave lleva la versión: la entrada anterior ya no se encuentra
+        self.assertEqual(Decimal(self.client.get(url).data['balance']), Decimal('70.00'))
+        self.assertEqual((stats.hits, stats.misses), (1, 2))
+
+    def test_lru_eviction_is_counted(self):
+        cache = InstrumentedLocMemCache('tests-lru', {'OPTIONS': {'MAX_ENTRIES': 3, 'CULL_FREQUENCY': 3}})
+        self.addCleanup(cache.clear)
+        cache.clear()
+        cache.stats.reset()
+        for key in ('a', 'b', 'c'):
+            cache.set(key, key)
+        cache.get('a') # 'b' pasa a ser la menos usada
+        cache.set('d', 'd')
+        self.assertEqual(cache.stats.evictions, 1)
+        self.assertEqual([key for key in ('a', 'b', 'c', 'd') if cache.get(key) is not None], ['a', 'c', 'd'])
+        self.assertEqual(stats_for('tests-lru').snapshot()['evictions'], 1)
+
+    def test_if_none_match_returns_304_until_a_write(self):
+        self.create_income()
+        url = reverse('income-list-create')
+        first = self.client.get(url)
+        self.assertEqual(first.status_code, 200)
+        etag = first['ETag']
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+        self.assertEqual(response.content, b'')
+
+        self.create_income(amount='5.00')
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(len(response.data['results']), 2)
+
+
+class CategoryResolverCacheTests(TransactionsTestCase):
+
+    def test_resolver_lookups_do_not_touch_summary_stats(self):
+        summary_stats, category_stats = stats_for(SUMMARY_CACHE_ALIAS), stats_for(CATEGORY_CACHE_ALIAS)
+        summary_before, category_before = summary_stats.snapshot(), category_stats.snapshot()
+
+        self.assertEqual(get_category_resolver(self.user).get(self.category.id), self.category)
+        with self.assertNumQueries(1): # solo la versión de datos: las categorías salen de la caché
+            get_category_resolver(self.user)
+
+        self.assertEqual(summary_stats.snapshot(), summary_before)
+        category_after = category_stats.snapshot()
+        self.assertEqual(category_after['misses'] - category_before['misses'], 1)
+        self.assertEqual(category_after['hits'] - category_before['hits'], 1)
+        self.assertEqual(len(caches[SUMMARY_CACHE_ALIAS]._cache), 0)
+
+    def resolver_lookup(self):
+        """(resolver, si salió de la caché de proceso)."""
+        category_stats = stats_for(CATEGORY_CACHE_ALIAS)
+        hits = category_stats.hits
+        resolver = get_category_resolver(self.user)
+        return resolver, category_stats.hits > hits
+
+    def test_only_category_writes_invalidate_the_resolver(self):
+        self.assertFalse(self.resolver_lookup()[1])
+        data_version = DataVersion.objects.get(user=self.user).version
+        # Ingresos y gastos invalidan los resúmenes, no los resolvers
+        self.create_income()
+        self.create_expense().delete()
+        self.assertGreater(DataVersion.objects.get(user=self.user).version, data_version)
+        self.assertTrue(self.resolver_lookup()[1])
+
+        for write in (
+            lambda: Category.objects.create(user=self.user, name='Propia'),
+            lambda: Category.objects.create(user=None, name='Global'),
+            lambda: Category.objects.filter(name='Propia').get().delete(),
+        ):
+            write()
+            resolver, cached = self.resolver_lookup()
+            self.assertFalse(cached)
+            self.assertEqual(
+                sorted(category.name for category in resolver),
+                sorted(Category.objects.filter(Q(user=self.user) | Q(user__isnull=True)).values_list('name', flat=True)),
+            )
+
+    def test_batch_category_writes_invalidate_the_resolver(self):
+        self.resolver_lookup()
+        operations = [{'op': 'create', 'model': 'income', 'data': {'amount': '1.00', 'date': '2024-03-01'}}]
+        response = self.client.post(reverse('transaction-batch'), {'operations': operations}, format='json')
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertTrue(self.resolver_lookup()[1])
+
+        operations = [
+            {'op': 'create', 'model': 'category', 'data': {'name': 'Nueva'}},
+            {'op': 'update', 'model': 'category', 'id': self.category.id, 'data': {'name': 'Comida y bebida'}},
+        ]
+        response = self.client.post(reverse('transaction-batch'), {'operations': operations}, format='json')
+        self.assertEqual(response.status_code, 200, response.data)
+        resolver, cached = self.resolver_lookup()
+        self.assertFalse(cached)
+        self.assertEqual(sorted(category.name for category in resolver), ['Comida y bebida', 'Nueva'])
+
+    def test_cache_stats_view_reports_each_cache(self):
+        admin = User.objects.create_superuser('admin@example.com', password='secreta-123')
+        self.client.force_authenticate(admin)
+        response = self.client.get(reverse('summary-cache-stats'))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('hit_ratio', response.data)
+        self.assertEqual(response.data['categories']['max_entries'], 5000)
+
+
+def wait_until(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError('Condición no alcanzada a tiempo')
+        time.sleep(0.001)
+
+
+class WriteCoalescerTests(TransactionsTestMixin, TransactionTestCase):
+    """El hilo escritor usa su propia conexión: los datos del test tienen que estar confirmados."""
+
+    def make_coalescer(self, **kwargs):
+        coalescer = WriteCoalescer(**kwargs)
+        self.addCleanup(coalescer.shutdown)
+        batches = []
+        write = coalescer._write
+        coalescer._write = lambda batch: (batches.append(len(batch)), write(batch))
+        return coalescer, batches
+
+    def income(self, amount='10.00', **kwargs):
+        kwargs.setdefault('description', 'Alta')
+        return Income(user=self.user, amount=Decimal(amount), date=date(2024, 3, 10), **kwargs)
+
+    def save_concurrently(self, coalescer, instances):
+        """Lanza un save() por hilo y devuelve {índice: instancia o excepción}."""
+        results = {}
+
+        def save(index, instance):
+            try:
+                results[index] = coalescer.save(instance)
+            except Exception as exc:
+                results[index] = exc
+
+        # daemon: si un futuro no se resolviera, el test falla en lugar de colgar el proceso
+        threads = [threading.Thread(target=save, args=item, daemon=True) for item in enumerate(instances)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(5)
+        return results
+
+    def test_concurrent_saves_share_a_batch(self):
+        coalescer, batches = self.make_coalescer(max_batch=4, max_wait=2)
+        results = self.save_concurrently(coalescer, [self.income(amount=f'{index}.00') for index in range(1, 5)])
+        self.assertEqual(batches, [4])
+        self.assertTrue(all(result.pk for result in results.values()))
+        self.assertEqual(Income.objects.filter(user=self.user).count(), 4)
+        self.assertEqual(verify_rollups([self.user.pk]), [])
+
+    def test_errors_reach_their_caller(self):
+        coalescer, batches = self.make_coalescer(max_batch=2, max_wait=2)
+        # Un alta inválida solo pierde su savepoint
+        results = self.save_concurrently(coalescer, [self.income(), self.income(description=None)])
+        self.assertEqual(batches, [2])
+        self.assertEqual(sorted(type(result).__name__ for result in results.values()), ['Income', 'IntegrityError'])
+        self.assertEqual(Income.objects.count(), 1)
+
+        # La clave ajena se comprueba en el commit: falla el lote entero y lo sabe cada alta
+        results = self.save_concurrently(coalescer, [self.income(), Income(user_id=999999, amount=Decimal('1.00'), date=date(2024, 3, 10))])
+        self.assertEqual([type(result) for result in results.values()], [IntegrityError, IntegrityError])
+        self.assertEqual(Income.objects.count(), 1)
+
+    def test_shutdown_writes_pending_saves_and_stops(self):
+        coalescer, batches = self.make_coalescer(max_batch=10, max_wait=30)
+        saving = threading.Thread(target=self.save_concurrently, args=(coalescer, [self.income() for _ in range(3)]), daemon=True)
+        saving.start()
+        wait_until(lambda: coalescer._queue is not None and coalescer._queue.unfinished_tasks == 3)
+        writer = coalescer._thread
+
+        started = time.monotonic()
+        coalescer.shutdown()
+        saving.join(5)
+        # No espera a max_wait: la marca de fin cierra el lote en curso
+        self.assertLess(time.monotonic() - started, 5)
+        self.assertFalse(writer.is_alive())
+        self.assertEqual(batches, [3])
+        self.assertEqual(Income.objects.count(), 3)
+
+        # Después de parar, un alta arranca otro hilo
+        coalescer.max_wait = 0
+        self.assertTrue(coalescer.save(self.income()).pk)
+        self.assertIsNot(coalescer._thread, writer)
+
+    @override_settings(WRITE_COALESCING=True)
+    def test_api_creates_through_the_coalescer(self):
+        self.addCleanup(get_write_coalescer().shutdown)
+        response = self.client.post(reverse('income-list-create'), {'amount': '12.50', 'date': '2024-03-01'}, format='json')
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertTrue(get_write_coalescer()._thread.is_alive())
+        self.assertEqual(Income.objects.get().amount, Decimal('12.50'))
+
+
+@override_settings(QUERY_BUDGET_MODE='raise')
+class AsyncViewTests(TransactionsTestCase):
+    # (vista async, vista síncrona equivalente, parámetros)
+    pairs = [
+        ('async-income-list', 'income-list-create', {}),
+        ('async-expense-list', 'expense-list-create', {'ordering': '-amount', 'page_size': 2}),
+        ('async-financial-summary', 'financial-summary', {}),
+        ('async-financial-summary', 'financial-summary', {'include_recurring': 'true', 'until': '2024-12-31'}),
+        ('async-expense-category-summary', 'expense-category-summary', {}),
+        ('async-income-category-summary', 'income-category-summary', {'include_recurring': 'true'}),
+    ]
+
+    def setUp(self):
+        super().setUp()
+        self.create_income(recurrence='monthly', day=date(2024, 1, 15))
+        self.create_income(amount='50.00', day=date(2024, 2, 1), category=None)
+        for day in range(1, 4):
+            self.create_expense(amount=f'{day}0.00', day=date(2024, 3, day))
+        token = ClaimsTokenObtainPairSerializer.get_token(self.user).access_token
+        # AsyncClient solo pasa a META las cabeceras de headers= (no los HTTP_* sueltos)
+        self.headers = {'Authorization': f'Bearer {token}'}
+        self.client.force_authenticate(None)
+        self.client.credentials(HTTP_AUTHORIZATION=self.headers['Authorization'])
+
+    async def test_requires_authentication(self):
+        for async_name, _, params in self.pairs:
+            with self.subTest(view=async_name):
+                response = await AsyncClient().get(reverse(async_name), params)
+                self.assertEqual(response.status_code, 401)
+
+    async def test_same_payload_as_sync_view(self):
+        for async_name, sync_name, params in self.pairs:
+            with self.subTest(view=async_name, params=params):
+                response = await AsyncClient().get(reverse(async_name), params, headers=self.headers)
+                self.assertEqual(response.status_code, 200)
+                expected = await self.sync_get(sync_name, params)
+                self.assertEqual(self.without_async_prefix(response.json()), expected)
+
+    async def test_not_modified_with_etag(self):
+        for async_name, _, params in self.pairs:
+            with self.subTest(view=async_name, params=params):
+                client = AsyncClient()
+                first = await client.get(reverse(async_name), params, headers=self.headers)
+                self.assertIn('ETag', first)
+                second = await client.get(reverse(async_name), params, headers={**self.headers, 'If-None-Match': first['ETag']})
+                self.assertEqual(second.status_code, 304)
+                self.assertEqual(second['ETag'], first['ETag'])
+
+    async def test_budget_is_enforced_for_async_dispatch(self):
+        from .async_views import AsyncFinancialSummaryView
+
+        budgets = AsyncFinancialSummaryView.query_budgets
+        AsyncFinancialSummaryView.query_budgets = {'GET': 0}
+        try:
+            with self.assertRaises(QueryBudgetExceeded):
+                await AsyncClient().get(reverse('async-financial-summary'), headers=self.headers)
+        finally:
+            AsyncFinancialSummaryView.query_budgets = budgets
+
+    @staticmethod
+    def without_async_prefix(data):
+        # Los enlaces de paginación apuntan a la propia ruta (/async/...)
+        for link in ('next', 'previous'):
+            if isinstance(data, dict) and data.get(link):
+                data[link] = data[link].replace('/async/', '/')
+        return data
+
+    async def sync_get(self, name, params):
+        from asgiref.sync import sync_to_async
+
+        response = await sync_to_async(self.client.get)(reverse(name), params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+
+@override_settings(QUERY_BUDGET_MODE='raise')
+class QueryBudgetTests(TransactionsTestMixin, TransactionTestCase):
+    """
+    Todas las rutas de transactions con autenticación JWT real y cachés frías, incluidos
+    los caminos caros (bucket de rollup nuevo, ?include_recurring=true). Si una vista
+    supera su @query_budget la petición lanza QueryBudgetExceeded. TransactionTestCase y
+    no TestCase: dentro de la transacción del test los atomic() de las vistas no envían
+    BEGIN y las cuentas saldrían más bajas que en el servidor.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.login(self.user)
+        self.income = self.create_income(recurrence='monthly', day=date(2024, 1, 15))
+        self.expense = self.create_expense(recurrence='weekly', day=date(2024, 1, 20))
+        self.create_expense(amount='5.00', day=date(2024, 2, 3), category=None)
+        self.create_income(amount='50.00', day=date(2024, 2, 3), category=None)
+
+    def login(self, user):
+        token = ClaimsTokenObtainPairSerializer.get_token(user).access_token
+        self.client.force_authenticate(None)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def call(self, method, name, data=None, expected=200, kwargs=None, **extra):
+        url = reverse(name, kwargs=kwargs)
+        if method == 'get':
+            response = self.client.get(url, data, **extra)
+        else:
+            extra.setdefault('format', 'json')
+            response = getattr(self.client, method)(url, data, **extra)
+        self.assertEqual(response.status_code, expected, getattr(response, 'data', None))
+        return response
+
+    def fresh(self):
+        # Cada escenario con la caché de resúmenes y el estado de usuario fríos
+        for alias in (SUMMARY_CACHE_ALIAS, CATEGORY_CACHE_ALIAS):
+            caches[alias].clear()
+        user_status.clear()
+
+    def test_every_view_declares_a_budget(self):
+        self.assertEqual(endpoints_without_budget(), [])
+
+    def test_categories(self):
+        self.call('get', 'category-list-create')
+        created = self.call('post', 'category-list-create', {'name': 'Viajes'}, expected=201).data
+        self.fresh()
+        self.call('get', 'category-detail', kwargs={'pk': created['id']})
+        self.fresh()
+        self.call('put', 'category-detail', {'name': 'Vacaciones'}, kwargs={'pk': created['id']})
+        self.fresh()
+        self.call('patch', 'category-detail', {'name': 'Viajes'}, kwargs={'pk': created['id']})
+        # Borrar una categoría con movimientos en varios meses junta sus rollups con los sin categoría
+        for day in (date(2024, 1, 5), date(2024, 2, 5), date(2024, 3, 5)):
+            self.create_expense(day=day, category_id=created['id'])
+            self.create_income(day=day, category_id=created['id'])
+        self.fresh()
+        self.call('delete', 'category-detail', kwargs={'pk': created['id']}, expected=204)
+
+    def test_transaction_lists(self):
+        for name in ('income-list-create', 'expense-list-create'):
+            with self.subTest(name=name):
+                first = self.call('get', name, {'page_size': 1})
+                self.fresh()
+                self.assertEqual(self.client.get(first.data['next']).status_code, 200)
+                self.fresh()
+                self.call('get', name, {'category': self.category.id, 'year': 2024, 'month': 1, 'ordering': '-amount'})
+                self.fresh()
+                self.call('get', name, {'search': 'sueldo supermercado', 'fields': 'id,amount,category_name'})
+                self.fresh()
+                self.call('get', name, {'format': 'columns', 'amount_min': '1', 'date_from': '2024-01-01'})
+
+    def test_transaction_creates(self):
+        cases = (
+            ('income-list-create', {'amount': '10.00', 'date': '2024-01-15', 'category': self.category.id, 'source': 'Empresa'}),
+            ('expense-list-create', {'amount': '10.00', 'date': '2024-01-20', 'category_id': self.category.id, 'description': 'Pan'}),
+        )
+        for name, data in cases:
+            with self.subTest(name=name, bucket='existente'):
+                self.fresh()
+                self.call('post', name, data, expected=201)
+            with self.subTest(name=name, bucket='nuevo'):
+                # Mes sin rollup: UPDATE fallido + SAVEPOINT/INSERT/RELEASE
+                self.fresh()
+                self.call('post', name, {**data, 'date': '2023-06-01'}, expected=201)
+
+    def test_transaction_details(self):
+        cases = (('income-detail', self.income, 'category'), ('expense-detail', self.expense, 'category_id'))
+        for name, instance, category_field in cases:
+            kwargs = {'pk': instance.pk}
+            with self.subTest(name=name):
+                self.call('get', name, kwargs=kwargs)
+                self.fresh()
+                self.call('get', name, {'fields': 'id,amount'}, kwargs=kwargs)
+                # Cambiar de mes y de categoría toca dos buckets, y el de destino no existe todavía
+                self.fresh()
+                data = self.client.get(reverse(name, kwargs=kwargs)).data
+                data = {key: value for key, value in data.items() if value is not None}
+                self.call('put', name, {**data, 'date': '2022-11-11', category_field: None, 'amount': '77.00'}, kwargs=kwargs)
+                self.fresh()
+                self.call('patch', name, {'date': '2021-05-05', category_field: self.category.id}, kwargs=kwargs)
+                self.fresh()
+                self.call('patch', name, {'description': 'Solo texto'}, kwargs=kwargs)
+                self.fresh()
+                self.call('delete', name, kwargs=kwargs, expected=204)
+
+    def test_first_write_of_a_new_user(self):
+        writes = (
+            ('category-list-create', {'name': 'Primera'}, 201, {}),
+            ('income-list-create', {'amount': '1.00', 'date': '2024-01-01'}, 201, {}),
+            ('expense-list-create', {'amount': '1.00', 'date': '2024-01-01', 'description': 'X'}, 201, {}),
+            ('transaction-batch', {'operations': [{'op': 'create', 'model': 'income', 'data': {'amount': '1.00', 'date': '2024-01-01'}}]}, 200, {}),
+            ('income-import', {'file': None}, 201, {'format': 'multipart'}),
+        )
+        for index, (name, data, expected, extra) in enumerate(writes):
+            with self.subTest(name=name):
+                self.login(User.objects.create_user(f'nuevo{index}@example.com', password='secreta-123'))
+                if 'file' in data:
+                    data = {'file': SimpleUploadedFile('datos.csv', b'date,amount\n2024-01-01,1.00\n')}
+                self.fresh()
+                self.call('post', name, data, expected=expected, **extra)
+
+    def test_import_and_export(self):
+        for kind in ('income', 'expense'):
+            with self.subTest(kind=kind):
+                for file_format in ('csv', 'ndjson'):
+                    self.fresh()
+                    self.call('get', f'{kind}-export', {'file_format': file_format})
+                content = (
+                    'date,amount,category_name,description\n'
+                    '2024-05-01,10.00,Comida,Uno\n'
+                    '2019-05-02,12.00,,Dos\n'
+                    '2024-01-15,100.00,Comida,Sueldo\n'
+                )
+                self.fresh()
+                upload = SimpleUploadedFile('datos.csv', content.encode('utf-8'))
+                self.call('post', f'{kind}-import', {'file': upload}, expected=201, format='multipart')
+
+    def test_batch(self):
+        other = Category.objects.create(user=self.user, name='Otra')
+        operations = [
+            {'op': 'create', 'model': 'category', 'data': {'name': 'Nueva'}},
+            {'op': 'update', 'model': 'category', 'id': other.id, 'data': {'name': 'Renombrada'}},
+            {'op': 'create', 'model': 'income', 'data': {'amount': '1.00', 'date': '2018-01-01'}},
+            {'op': 'create', 'model': 'expense', 'data': {'description': 'X', 'amount': '2.00', 'date': '2018-02-01', 'category_id': other.id}},
+            {'op': 'update', 'model': 'income', 'id': self.income.id, 'data': {'amount': '3.00', 'date': '2017-03-01'}},
+            {'op': 'update', 'model': 'expense', 'id': self.expense.id, 'data': {'category_id': None}},
+            {'op': 'delete', 'model': 'expense', 'id': self.create_expense(day=date(2016, 1, 1)).id},
+            {'op': 'delete', 'model': 'income', 'id': self.create_income(day=date(2016, 1, 1)).id},
+            {'op': 'delete', 'model': 'category', 'id': self.category.id},
+        ]
+        self.fresh()
+        self.call('post', 'transaction-batch', {'operations': operations})
+
+    def test_summaries(self):
+        for name in ('financial-summary', 'dashboard-summary', 'expense-category-summary', 'income-category-summary'):
+            for params in ({}, {'include_recurring': 'true'}, {'include_recurring': 'true', 'until': '2024-12-31'}):
+                with self.subTest(name=name, params=params):
+                    self.fresh()
+                    self.call('get', name, params)
+        for params in ({}, {'granularity': 'day', 'date_from': '2024-01-01', 'date_to': '2024-03-31'},
+                       {'granularity': 'week', 'include_recurring': 'true'}, {'granularity': 'year'},
+                       # Meses parciales en ambos extremos: filas + rollups + filas, más recurrentes
+                       {'date_from': '2023-11-15', 'date_to': '2024-02-10', 'include_recurring': 'true', 'by_category': 'true'}):
+            with self.subTest(name='timeseries-summary', params=params):
+                self.fresh()
+                self.call('get', 'timeseries-summary', params)
+
+    def test_cache_stats(self):
+        self.login(User.objects.create_superuser('admin@example.com', password='secreta-123'))
+        self.call('get', 'summary-cache-stats')
+
+    def test_async_views(self):
+        for name in ('async-income-list', 'async-expense-list', 'async-financial-summary',
+                     'async-expense-category-summary', 'async-income-category-summary'):
+            for params in ({}, {'include_recurring': 'true'}, {'category': self.category.id, 'page_size': 1}):
+                with self.subTest(name=name, params=params):
+                    self.fresh()
+                    self.call('get', name, params)
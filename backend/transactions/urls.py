@@ -9,8 +9,22 @@ from .views import (
     ExpenseDetailView,
     # ExpenseFilterView, 
     FinancialSummaryView,
+    DashboardSummaryView,
     ExpenseCategorySummaryView,
-    IncomeCategorySummaryView
+    IncomeCategorySummaryView,
+    TimeseriesSummaryView,
+    CacheStatsView,
+    TransactionImportView,
+    IncomeExportView,
+    ExpenseExportView,
+    BatchMutationView,
+)
+from .async_views import ( # Mismas respuestas con handlers async, para servir bajo ASGI
+    AsyncFinancialSummaryView,
+    AsyncExpenseCategorySummaryView,
+    AsyncIncomeCategorySummaryView,
+    AsyncIncomeListView,
+    AsyncExpenseListView,
 )
 
 urlpatterns = [
@@ -18,11 +32,24 @@ urlpatterns = [
     path('categories/<int:pk>/', CategoryDetailView.as_view(), name='category-detail'),
     path('incomes/', IncomeListCreateView.as_view(), name='income-list-create'),
     path('incomes/<int:pk>/', IncomeDetailView.as_view(), name='income-detail'),
+    path('incomes/import/', TransactionImportView.as_view(kind='income'), name='income-import'),
+    path('incomes/export/', IncomeExportView.as_view(), name='income-export'),
     # path('incomes/filtered/', IncomeFilterView.as_view(), name='income-filtered-list'), 
     path('expenses/', ExpenseListCreateView.as_view(), name='expense-list-create'),
     path('expenses/<int:pk>/', ExpenseDetailView.as_view(), name='expense-detail'),
+    path('expenses/import/', TransactionImportView.as_view(kind='expense'), name='expense-import'),
+    path('expenses/export/', ExpenseExportView.as_view(), name='expense-export'),
     # path('expenses/filtered/', ExpenseFilterView.as_view(), name='expense-filtered-list'), 
+    path('batch/', BatchMutationView.as_view(), name='transaction-batch'),
     path('summary/financial/', FinancialSummaryView.as_view(), name='financial-summary'),
+    path('summary/dashboard/', DashboardSummaryView.as_view(), name='dashboard-summary'),
     path('summary/expenses-by-category/', ExpenseCategorySummaryView.as_view(), name='expense-category-summary'),
     path('summary/incomes-by-category/', IncomeCategorySummaryView.as_view(), name='income-category-summary'),
+    path('summary/timeseries/', TimeseriesSummaryView.as_view(), name='timeseries-summary'),
+    path('async/incomes/', AsyncIncomeListView.as_view(), name='async-income-list'),
+    path('async/expenses/', AsyncExpenseListView.as_view(), name='async-expense-list'),
+    path('async/summary/financial/', AsyncFinancialSummaryView.as_view(), name='async-financial-summary'),
+    path('async/summary/expenses-by-category/', AsyncExpenseCategorySummaryView.as_view(), name='async-expense-category-summary'),
+    path('async/summary/incomes-by-category/', AsyncIncomeCategorySummaryView.as_view(), name='async-income-category-summary'),
+    path('summary/cache-stats/', CacheStatsView.as_view(), name='summary-cache-stats'),
 ]
@@ -1,16 +1,103 @@
+import asyncio
+
+from asgiref.sync import sync_to_async
 from django.db.models import Sum
-from .models import Income, Expense
+from .models import MonthlyRollup
+from .recurrence import recurring_totals
 
-def get_financial_summary(user):
+def _totals_by_category(user, recurring_until=None):
     """
-    Calculates the total income, total expenses, and balance for a given user.
+    {(kind, category_name): total} from a single grouped query over the monthly rollups.
+    With `recurring_until`, adds the virtual occurrences of recurring items up to that date.
     """
-    total_income = Income.objects.filter(user=user).aggregate(total=Sum('amount'))['total'] or 0
-    total_expense = Expense.objects.filter(user=user).aggregate(total=Sum('amount'))['total'] or 0
+    rows = (
+        MonthlyRollup.objects.filter(user=user, count__gt=0)
+        .values('kind', 'category__name')
+        .annotate(total_amount=Sum('total'))
+    )
+    totals = {(row['kind'], row['category__name']): row['total_amount'] for row in rows}
+    if recurring_until is not None:
+        for key, amount in recurring_totals(user, recurring_until).items():
+            totals[key] = totals.get(key, 0) + amount
+    return totals
+
+def _by_category(totals, kind):
+    summary = [
+        {'category_name': name, 'total_amount': amount}
+        for (row_kind, name), amount in totals.items()
+        if row_kind == kind and name is not None
+    ]
+    summary.sort(key=lambda item: item['total_amount'], reverse=True)
+    return summary
+
+def _financial_totals(totals):
+    total_income = sum((amount for (kind, _), amount in totals.items() if kind == 'income'), 0)
+    total_expense = sum((amount for (kind, _), amount in totals.items() if kind == 'expense'), 0)
     balance = total_income - total_expense
-    
+
     return {
         'incomes': total_income,
         'expenses': total_expense,
         'balance': balance
     }
+
+def get_financial_summary(user, recurring_until=None):
+    """
+    Calculates the total income, total expenses, and balance for a given user.
+    Reads from the monthly rollups, so the cost depends on months, not rows.
+    """
+    return _financial_totals(_totals_by_category(user, recurring_until))
+
+def get_category_summary(user, kind, recurring_until=None):
+    """
+    Returns [{'category_name', 'total_amount'}] for the user's incomes or expenses
+    ('income' / 'expense'), grouped by category name and sorted by total descending.
+    """
+    return _by_category(_totals_by_category(user, recurring_until), kind)
+
+def get_dashboard_summary(user, recurring_until=None):
+    """
+    Totals, balance and both category breakdowns for the dashboard,
+    computed with a single grouped query over the monthly rollups.
+    """
+    totals = _totals_by_category(user, recurring_until)
+    summary = _financial_totals(totals)
+    summary['incomes_by_category'] = _by_category(totals, 'income')
+    summary['expenses_by_category'] = _by_category(totals, 'expense')
+    return summary
+
+
+# Async counterparts for the ASGI views (transactions/async_views.py). On Django 4.2 the
+# async ORM runs every query through sync_to_async(thread_sensitive=True), so awaiting
+# several reads together does not make them concurrent; what the views gain is not holding
+# a server thread while the database works.
+
+async def _arecurring_totals(user, recurring_until):
+    if recurring_until is None:
+        return {}
+    return await sync_to_async(recurring_totals)(user, recurring_until)
+
+async def aget_financial_summary(user, recurring_until=None):
+    """
+    Same result as get_financial_summary(): the same single grouped query (plus the
+    recurring items), run in one sync_to_async call.
+    """
+    return await sync_to_async(get_financial_summary)(user, recurring_until)
+
+async def _arollup_by_category(user, kind):
+    rows = (
+        MonthlyRollup.objects.filter(user=user, kind=kind, count__gt=0)
+        .values('kind', 'category__name')
+        .annotate(total_amount=Sum('total'))
+    )
+    return {(row['kind'], row['category__name']): row['total_amount'] async for row in rows}
+
+async def aget_category_summary(user, kind, recurring_until=None):
+    """Same result as get_category_summary(), reading the rollups with async iteration."""
+    totals, recurring = await asyncio.gather(
+        _arollup_by_category(user, kind),
+        _arecurring_totals(user, recurring_until),
+    )
+    for key, amount in recurring.items():
+        totals[key] = totals.get(key, 0) + amount
+    return _by_category(totals, kind)
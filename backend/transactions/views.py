@@ -6,49 +6,98 @@ from .serializers import CategorySerializer, IncomeSerializer, ExpenseSerializer
 from django.db.models import Q # Para consultas OR
 from django_filters.rest_framework import DjangoFilterBackend 
 from rest_framework import filters 
-from .filters import IncomeFilter 
-from django.db.models import Sum # Importar Sum para la suma de montos
-from .utils import get_financial_summary # Importar función para el resumen financiero
+from .filters import IncomeFilter, ExpenseFilter
+from .utils import get_financial_summary, get_category_summary, get_dashboard_summary # Resúmenes desde los rollups mensuales
+from .timeseries import GRANULARITIES, MAX_BUCKETS, bucket_count, default_range, get_timeseries # Series temporales
+from .cache import CATEGORY_CACHE_ALIAS, cache_info, get_or_compute # Caché de resúmenes por usuario y versión de datos
+from .conditional import conditional_get # ETag / If-None-Match a partir de la versión de datos del usuario
+from .pagination import KeysetPagination # Paginación por cursor sobre (date, created_at, id)
+from .fieldsets import SparseFieldsetViewMixin # ?fields=: solo las columnas pedidas
+from .renderers import ColumnarJSONRenderer # ?format=columns
+from .fastlist import FastListMixin # Listados desde .values() sin la maquinaria de campos de DRF
+from rest_framework.settings import api_settings
+from .importers import detect_format, import_transactions, iter_rows # Importación masiva CSV/JSON
+from .batch import BatchMutation, BatchRequestSerializer # Lotes de altas/modificaciones/borrados en una transacción
+from rest_framework.parsers import MultiPartParser
+from .exporters import CONTENT_TYPES, EXPORT_FORMATS, stream_export # Exportación en streaming
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from datetime import date
+from rest_framework.exceptions import ValidationError
+from config.query_budget import query_budget # Máximo de consultas SQL por vista y método
+from accounts.authentication import ClaimsJWTAuthentication # Usuario desde los claims del JWT en las lecturas
 
 # Create your views here.
 
+# Presupuestos medidos con cachés frías y transacciones reales en transactions/tests.py
+# (QueryBudgetTests, un TransactionTestCase). Las escrituras cuentan el usuario, la versión de datos (ETag/caché), el resolver de categorías,
+# el incremento de versión y los SAVEPOINT del atomic.
+@query_budget(GET=3, POST=5)
 class CategoryListCreateView(generics.ListCreateAPIView):
     serializer_class = CategorySerializer
     permission_classes = [permissions.IsAuthenticated]
+    authentication_classes = [ClaimsJWTAuthentication] # Lecturas sin consultar auth_user
 
     def get_queryset(self):
         # El usuario solo puede ver sus categorías o las categorías globales (user=None)
         return Category.objects.filter(Q(user=self.request.user) | Q(user__isnull=True))
 
+    @conditional_get('categories')
+    def list(self, request, *args, **kwargs):
+        # La lista de categorías cambia poco: se sirve desde la caché mientras no haya escrituras
+        def serialize():
+            serializer = self.get_serializer(self.get_queryset(), many=True)
+            return [dict(item) for item in serializer.data]
+        return Response(get_or_compute(request, 'categories', serialize))
+
     def perform_create(self, serializer):
         # Asigna el usuario actual a la categoría si se crea una nueva
         # Permite que 'user' sea None si se quiere crear una categoría global (admin feature)
         # Por ahora, forzamos que las categorías creadas por usuarios sean suyas.
         serializer.save(user=self.request.user)
 
+# Borrar una categoría junta sus rollups con los sin categoría en un número fijo de consultas.
+# Los DELETE cuentan además el BEGIN/COMMIT de la transacción propia de Collector.delete
+@query_budget(GET=3, PUT=6, PATCH=6, DELETE=12)
 class CategoryDetailView(generics.RetrieveUpdateDestroyAPIView):
     serializer_class = CategorySerializer
     permission_classes = [permissions.IsAuthenticated]
+    authentication_classes = [ClaimsJWTAuthentication] # Lecturas sin consultar auth_user
 
     def get_queryset(self):
         # El usuario solo puede ver/modificar/eliminar sus categorías
         # Las globales no deberían ser modificables/eliminables por usuarios normales aquí
         return Category.objects.filter(user=self.request.user)
 
+    @conditional_get('category')
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+
     # Podríamos añadir lógica extra para no permitir eliminar si hay transacciones asociadas
 
 
-class IncomeListCreateView(generics.ListCreateAPIView):
+# GET: estado del usuario, versión de datos, categorías del filtro y la página.
+# POST: si el bucket del rollup no existe, el UPDATE no toca filas y se añade SAVEPOINT/INSERT/RELEASE
+@query_budget(GET=4, POST=11)
+class IncomeListCreateView(SparseFieldsetViewMixin, FastListMixin, generics.ListCreateAPIView):
     serializer_class = IncomeSerializer
+    renderer_classes = api_settings.DEFAULT_RENDERER_CLASSES + [ColumnarJSONRenderer]
     permission_classes = [permissions.IsAuthenticated]
+    authentication_classes = [ClaimsJWTAuthentication] # Lecturas sin consultar auth_user
     filter_backends = [DjangoFilterBackend, filters.OrderingFilter] 
     filterset_class = IncomeFilter 
     ordering_fields = ['date', 'amount'] 
+    pagination_class = KeysetPagination
     # ordering = ['-date'] # Opcional: orden por defecto
 
     def get_queryset(self):
         # El usuario solo ve sus propios ingresos
-        return Income.objects.filter(user=self.request.user)
+        # select_related: el serializer lee category.name de cada fila (el username sale de request.user)
+        return Income.objects.filter(user=self.request.user).select_related('category')
+
+    @conditional_get('incomes')
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
 
     def perform_create(self, serializer):
         # El usuario se asigna explícitamente al guardar el serializador
@@ -73,28 +122,44 @@ class IncomeListCreateView(generics.ListCreateAPIView):
     #     return super().create(request, *args, **kwargs)
 
 
-class IncomeDetailView(generics.RetrieveUpdateDestroyAPIView):
+# Mover un movimiento de mes o categoría actualiza el bucket de origen y crea el de destino
+@query_budget(GET=3, PUT=14, PATCH=14, DELETE=7)
+class IncomeDetailView(SparseFieldsetViewMixin, generics.RetrieveUpdateDestroyAPIView):
     serializer_class = IncomeSerializer
     permission_classes = [permissions.IsAuthenticated]
+    authentication_classes = [ClaimsJWTAuthentication] # Lecturas sin consultar auth_user
 
     def get_queryset(self):
         # El usuario solo ve/modifica/elimina sus propios ingresos
-        return Income.objects.filter(user=self.request.user)
+        return Income.objects.filter(user=self.request.user).select_related('category')
+
+    @conditional_get('income')
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
 
 
 # VISTAS PARA GASTOS (EXPENSES)
 
-class ExpenseListCreateView(generics.ListCreateAPIView):
+@query_budget(GET=4, POST=11)
+class ExpenseListCreateView(SparseFieldsetViewMixin, FastListMixin, generics.ListCreateAPIView):
     serializer_class = ExpenseSerializer
+    renderer_classes = api_settings.DEFAULT_RENDERER_CLASSES + [ColumnarJSONRenderer]
     permission_classes = [permissions.IsAuthenticated]
+    authentication_classes = [ClaimsJWTAuthentication] # Lecturas sin consultar auth_user
     filter_backends = [DjangoFilterBackend, filters.OrderingFilter] 
-    # filterset_class = ExpenseFilter # Descomentar si tienes ExpenseFilter
+    filterset_class = ExpenseFilter
     ordering_fields = ['date', 'amount'] 
+    pagination_class = KeysetPagination
     # ordering = ['-date']
 
     def get_queryset(self):
         # El usuario solo ve sus propios gastos
-        return Expense.objects.filter(user=self.request.user)
+        # select_related: el serializer lee category.name de cada fila (el username sale de request.user)
+        return Expense.objects.filter(user=self.request.user).select_related('category')
+
+    @conditional_get('expenses')
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
 
     def perform_create(self, serializer):
         # El usuario se asigna en el serializer a través del contexto de la petición
@@ -104,66 +169,245 @@ class ExpenseListCreateView(generics.ListCreateAPIView):
         # Si no, necesitas pasar el usuario: serializer.save(user=self.request.user)
         serializer.save(user=self.request.user) 
 
-class ExpenseDetailView(generics.RetrieveUpdateDestroyAPIView):
+@query_budget(GET=3, PUT=14, PATCH=14, DELETE=7)
+class ExpenseDetailView(SparseFieldsetViewMixin, generics.RetrieveUpdateDestroyAPIView):
     serializer_class = ExpenseSerializer
     permission_classes = [permissions.IsAuthenticated]
+    authentication_classes = [ClaimsJWTAuthentication] # Lecturas sin consultar auth_user
 
     def get_queryset(self):
         # El usuario solo ve/modifica/elimina sus propios gastos
-        return Expense.objects.filter(user=self.request.user)
+        return Expense.objects.filter(user=self.request.user).select_related('category')
+
+    @conditional_get('expense')
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+
+
+# IMPORTACIÓN MASIVA (CSV / NDJSON / JSON)
+
+# El presupuesto es por lote de importación (hasta 500 filas); cada lote añade las mismas consultas
+@query_budget(POST=13)
+class TransactionImportView(views.APIView):
+    """
+    POST multipart con 'file' (y opcionalmente 'file_format': csv, ndjson o json).
+    Devuelve cuántas filas se crearon, cuántas ya existían y los errores por fila.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    parser_classes = [MultiPartParser]
+    kind = None # 'income' o 'expense'
+
+    def post(self, request, *args, **kwargs):
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response({"file": ["Debe adjuntar un fichero."]}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            file_format = detect_format(upload.name, request.data.get('file_format'))
+            result = import_transactions(request.user, self.kind, iter_rows(upload.file, file_format), request=request)
+        except (ValueError, UnicodeDecodeError) as exc:
+            return Response({"file": [str(exc)]}, status=status.HTTP_400_BAD_REQUEST)
+        response_status = status.HTTP_201_CREATED if result['created'] else status.HTTP_200_OK
+        return Response(result, status=response_status)
+
+
+# LOTES DE OPERACIONES (INGRESOS, GASTOS Y CATEGORÍAS)
+
+# El presupuesto cubre un lote completo (hasta 500 operaciones) que toque los tres modelos;
+# bulk_create parte los INSERT según el límite de parámetros de SQLite
+@query_budget(POST=42)
+class BatchMutationView(views.APIView):
+    """
+    POST {"operations": [{"op", "model", "id", "data"}, ...]}: se aplican todas o ninguna.
+    Devuelve el resultado de cada operación en el mismo orden (ver transactions/batch.py).
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request, *args, **kwargs):
+        serializer = BatchRequestSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        applied, results = BatchMutation(request, serializer.validated_data['operations']).run()
+        if not applied:
+            return Response({"results": results}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({"results": results}, status=status.HTTP_200_OK)
+
+
+# EXPORTACIÓN EN STREAMING (CSV / NDJSON)
+
+# Las consultas del cuerpo en streaming se hacen después de dispatch() y no se miden aquí
+@query_budget(GET=1)
+class TransactionExportView(generics.GenericAPIView):
+    """
+    GET con ?file_format=csv|ndjson y los mismos filtros y ordenación que el listado.
+    El cuerpo se genera mientras se envía, así que la memoria no crece con el historial.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    authentication_classes = [ClaimsJWTAuthentication] # Lecturas sin consultar auth_user
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
+    ordering_fields = ['date', 'amount']
+    model = None
+    kind = None
+
+    def get_queryset(self):
+        return self.model.objects.filter(user=self.request.user)
+
+    def get(self, request, *args, **kwargs):
+        file_format = request.query_params.get('file_format', 'csv')
+        if file_format not in EXPORT_FORMATS:
+            return Response(
+                {"file_format": [f"Formato no soportado. Use uno de: {', '.join(EXPORT_FORMATS)}."]},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        queryset = self.filter_queryset(self.get_queryset())
+        response = StreamingHttpResponse(
+            stream_export(queryset, self.kind, file_format), content_type=CONTENT_TYPES[file_format]
+        )
+        response['Content-Disposition'] = f'attachment; filename="{self.kind}s.{file_format}"'
+        return response
+
 
+class IncomeExportView(TransactionExportView):
+    filterset_class = IncomeFilter
+    model = Income
+    kind = 'income'
 
-# Vista para el resumen financiero del dashboard
+
+class ExpenseExportView(TransactionExportView):
+    filterset_class = ExpenseFilter
+    model = Expense
+    kind = 'expense'
+
+
+# Parámetros comunes de los resúmenes:
+#   ?include_recurring=true  suma las ocurrencias virtuales de los movimientos recurrentes
+#   ?until=YYYY-MM-DD         fecha hasta la que se expanden (por defecto, hoy)
+def include_recurring(request):
+    return request.query_params.get('include_recurring', '').lower() in ('1', 'true', 'yes')
+
+
+def get_recurring_until(request):
+    if not include_recurring(request):
+        return None
+    until = request.query_params.get('until')
+    if not until:
+        return timezone.localdate()
+    try:
+        return date.fromisoformat(until)
+    except ValueError:
+        raise ValidationError({"until": ["Fecha inválida, use el formato YYYY-MM-DD."]})
+
+
+def recurring_vary(request):
+    # Sin ?until= el resultado cambia cada día aunque no haya escrituras
+    return str(get_recurring_until(request) or '')
+
+
+# Vista para el resumen financiero del dashboard. Los resúmenes cuentan el estado del usuario
+# (una vez por TTL), la versión de datos, los rollups y, con ?include_recurring=true, una
+# lectura de recurrentes por tipo
+@query_budget(GET=5)
 class FinancialSummaryView(views.APIView):
     permission_classes = [permissions.IsAuthenticated]
+    authentication_classes = [ClaimsJWTAuthentication] # Lecturas sin consultar auth_user
 
+    @conditional_get('financial', vary=recurring_vary)
     def get(self, request, *args, **kwargs):
-        summary = get_financial_summary(request.user)
+        until = get_recurring_until(request)
+        summary = get_or_compute(request, 'financial', lambda: get_financial_summary(request.user, until), until)
         return Response(summary)
 
 
-class ExpenseCategorySummaryView(views.APIView):
+# Totales, balance y ambos desgloses por categoría en una sola respuesta (y una sola consulta)
+@query_budget(GET=5)
+class DashboardSummaryView(views.APIView):
     permission_classes = [permissions.IsAuthenticated]
+    authentication_classes = [ClaimsJWTAuthentication] # Lecturas sin consultar auth_user
 
+    @conditional_get('dashboard', vary=recurring_vary)
     def get(self, request, *args, **kwargs):
-        user = request.user
-        # Agrupar gastos por nombre de categoría y sumar los montos
-        # Usamos values() para agrupar por el nombre de la categoría y annotate() para sumar los montos
-        # Es importante filtrar por el usuario actual
-        summary_data = (
-            Expense.objects.filter(user=user)
-            .values('category__name') # Agrupa por el nombre de la categoría
-            .annotate(total_amount=Sum('amount')) # Suma los montos para cada categoría
-            .order_by('-total_amount') # Opcional: ordenar por monto total descendente
-        )
+        until = get_recurring_until(request)
+        return Response(get_or_compute(request, 'dashboard', lambda: get_dashboard_summary(request.user, until), until))
 
-        # El resultado de 'summary_data' será algo como:
-        # [{'category__name': 'Alimentación', 'total_amount': 500.00},
-        #  {'category__name': 'Transporte', 'total_amount': 150.00}]
-        # Renombramos 'category__name' a 'category_name' para que sea más limpio en el frontend
-        formatted_summary = [
-            {'category_name': item['category__name'], 'total_amount': item['total_amount']}
-            for item in summary_data if item['category__name'] is not None
-        ]
-        
-        return Response(formatted_summary)
+
+@query_budget(GET=5)
+class ExpenseCategorySummaryView(views.APIView):
+    permission_classes = [permissions.IsAuthenticated]
+    authentication_classes = [ClaimsJWTAuthentication] # Lecturas sin consultar auth_user
+
+    @conditional_get('expenses-by-category', vary=recurring_vary)
+    def get(self, request, *args, **kwargs):
+        # Gastos agrupados por nombre de categoría, leídos de los rollups mensuales:
+        # [{'category_name': 'Alimentación', 'total_amount': 500.00}, ...]
+        until = get_recurring_until(request)
+        return Response(get_or_compute(request, 'expenses-by-category', lambda: get_category_summary(request.user, 'expense', until), until))
 
 
+@query_budget(GET=5)
 class IncomeCategorySummaryView(views.APIView):
     permission_classes = [permissions.IsAuthenticated]
+    authentication_classes = [ClaimsJWTAuthentication] # Lecturas sin consultar auth_user
 
+    @conditional_get('incomes-by-category', vary=recurring_vary)
     def get(self, request, *args, **kwargs):
-        user = request.user
-        summary_data = (
-            Income.objects.filter(user=user)
-            .values('category__name')
-            .annotate(total_amount=Sum('amount'))
-            .order_by('-total_amount')
+        until = get_recurring_until(request)
+        return Response(get_or_compute(request, 'incomes-by-category', lambda: get_category_summary(request.user, 'income', until), until))
+
+
+def parse_date_param(request, name):
+    value = request.query_params.get(name)
+    if not value:
+        return None
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise ValidationError({name: ["Fecha inválida, use el formato YYYY-MM-DD."]})
+
+
+# Parámetros de la serie temporal ya resueltos: (granularity, date_from, date_to, by_category, include_recurring)
+def get_timeseries_params(request):
+    granularity = request.query_params.get('granularity', 'month')
+    if granularity not in GRANULARITIES:
+        raise ValidationError({"granularity": [f"Use uno de: {', '.join(GRANULARITIES)}."]})
+    default_from, default_to = default_range(granularity, timezone.localdate())
+    date_from = parse_date_param(request, 'date_from') or default_from
+    date_to = parse_date_param(request, 'date_to') or default_to
+    if date_from > date_to:
+        raise ValidationError({"date_from": ["Debe ser anterior o igual a date_to."]})
+    if bucket_count(date_from, date_to, granularity) > MAX_BUCKETS:
+        raise ValidationError({"granularity": [f"El rango produce más de {MAX_BUCKETS} periodos; use una granularidad mayor."]})
+    by_category = request.query_params.get('by_category', '').lower() in ('1', 'true', 'yes')
+    return granularity, date_from, date_to, by_category, include_recurring(request)
+
+
+# Ingresos, gastos y neto por día/semana/mes/año, con los periodos vacíos a cero:
+#   ?granularity=day|week|month|year&date_from=YYYY-MM-DD&date_to=YYYY-MM-DD&by_category=true
+# Peor caso: meses parciales en ambos extremos (filas + rollups + filas) y recurrentes
+@query_budget(GET=9)
+class TimeseriesSummaryView(views.APIView):
+    permission_classes = [permissions.IsAuthenticated]
+    authentication_classes = [ClaimsJWTAuthentication] # Lecturas sin consultar auth_user
+
+    @conditional_get('timeseries', vary=lambda request: str(get_timeseries_params(request)))
+    def get(self, request, *args, **kwargs):
+        params = get_timeseries_params(request)
+        granularity, date_from, date_to, by_category, recurring = params
+        series = get_or_compute(
+            request, 'timeseries',
+            lambda: get_timeseries(request.user, date_from, date_to, granularity, by_category, recurring),
+            *params,
         )
+        return Response({
+            'granularity': granularity,
+            'date_from': date_from,
+            'date_to': date_to,
+            'results': series,
+        })
+
 
-        formatted_summary = [
-            {'category_name': item['category__name'], 'total_amount': item['total_amount']}
-            for item in summary_data if item['category__name'] is not None
-        ]
-        
-        return Response(formatted_summary)
+# Contadores de la caché de resúmenes (aciertos, fallos, expulsiones) para dimensionarla
+@query_budget(GET=1)
+class CacheStatsView(views.APIView):
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request, *args, **kwargs):
+        # Los contadores de arriba son los de resúmenes; los de categorías van aparte
+        return Response({**cache_info(), 'categories': cache_info(CATEGORY_CACHE_ALIAS)})
@@ -1,10 +1,5 @@
 import React, { useState, useEffect } from 'react';
-import {
-    getIncomes,
-    getExpenses,
-    getExpenseCategorySummary,
-    getIncomeCategorySummary
-} from '../services/apiService';
+import { getDashboardSummary } from '../services/apiService';
 import {
     Typography,
     Box,
@@ -55,146 +50,119 @@ function DashboardPage() {
         setLoadingSummary(true);
         setErrorSummary(null);
         try {
-            const [incomesData, expensesData] = await Promise.all([
-                getIncomes(),
-                getExpenses()
-            ]);
-
-            let totalIncomes = 0;
-            if (incomesData && incomesData.length > 0) {
-                totalIncomes = incomesData.reduce((sum, income) => {
-                    const amount = parseFloat(income.amount);
-                    return sum + (isNaN(amount) ? 0 : amount);
-                }, 0);
-            }
+            // Totales y desgloses por categoría calculados en el backend en una sola llamada
+            const data = await getDashboardSummary();
+            const totalIncomes = parseFloat(data.incomes) || 0;
+            const totalExpenses = parseFloat(data.expenses) || 0;
 
-            let totalExpenses = 0;
-            if (expensesData && expensesData.length > 0) {
-                totalExpenses = expensesData.reduce((sum, expense) => {
-                    const amount = parseFloat(expense.amount);
-                    return sum + (isNaN(amount) ? 0 : amount);
-                }, 0);
-            }
-            
             setSummaryData({
                 ingresos: totalIncomes,
                 gastos: totalExpenses,
                 balance: totalIncomes - totalExpenses
             });
+            updateExpenseChartData(data.expenses_by_category);
+            updateIncomeChartData(data.incomes_by_category);
 
         } catch (error) {
             console.error("Error fetching summary data:", error);
             setErrorSummary("No se pudo cargar el resumen financiero.");
             setSummaryData({ ingresos: 0, gastos: 0, balance: 0 });
+            setError(prevError => prevError + '\nError al cargar datos de los gráficos: ' + (error.response?.data?.detail || error.message));
         } finally {
             setLoadingSummary(false);
         }
     };
 
-    const fetchExpenseChartData = async () => {
-        try {
-            const rawData = await getExpenseCategorySummary();
-            if (rawData && rawData.length > 0) {
-                const labels = rawData.map(item => item.category_name);
-                const dataValues = rawData.map(item => item.total_amount);
-                
-                setExpenseChartData({
-                    labels: labels,
-                    datasets: [
-                        {
-                            label: 'Gastos por Categoría',
-                            data: dataValues,
-                            backgroundColor: [
-                                'rgba(255, 99, 132, 0.7)',
-                                'rgba(54, 162, 235, 0.7)',
-                                'rgba(255, 206, 86, 0.7)',
-                                'rgba(75, 192, 192, 0.7)',
-                                'rgba(153, 102, 255, 0.7)',
-                                'rgba(255, 159, 64, 0.7)',
-                                'rgba(199, 199, 199, 0.7)',
-                                'rgba(83, 102, 255, 0.7)',
-                                'rgba(40, 159, 64, 0.7)',
-                                'rgba(210, 99, 132, 0.7)',
-                            ],
-                            borderColor: [
-                                'rgba(255, 99, 132, 1)',
-                                'rgba(54, 162, 235, 1)',
-                                'rgba(255, 206, 86, 1)',
-                                'rgba(75, 192, 192, 1)',
-                                'rgba(153, 102, 255, 1)',
-                                'rgba(255, 159, 64, 1)',
-                                'rgba(199, 199, 199, 1)',
-                                'rgba(83, 102, 255, 1)',
-                                'rgba(40, 159, 64, 1)',
-                                'rgba(210, 99, 132, 1)',
-                            ],
-                            borderWidth: 1,
-                        },
-                    ],
-                });
-            } else {
-                setExpenseChartData(null);
-            }
-        } catch (err) {
-            setError(prevError => prevError + '\nError al cargar datos del gráfico de gastos: ' + (err.response?.data?.detail || err.message));
-            console.error("Error fetching expense chart data:", err);
+    const updateExpenseChartData = (rawData) => {
+        if (rawData && rawData.length > 0) {
+            const labels = rawData.map(item => item.category_name);
+            const dataValues = rawData.map(item => item.total_amount);
+            
+            setExpenseChartData({
+                labels: labels,
+                datasets: [
+                    {
+                        label: 'Gastos por Categoría',
+                        data: dataValues,
+                        backgroundColor: [
+                            'rgba(255, 99, 132, 0.7)',
+                            'rgba(54, 162, 235, 0.7)',
+                            'rgba(255, 206, 86, 0.7)',
+                            'rgba(75, 192, 192, 0.7)',
+                            'rgba(153, 102, 255, 0.7)',
+                            'rgba(255, 159, 64, 0.7)',
+                            'rgba(199, 199, 199, 0.7)',
+                            'rgba(83, 102, 255, 0.7)',
+                            'rgba(40, 159, 64, 0.7)',
+                            'rgba(210, 99, 132, 0.7)',
+                        ],
+                        borderColor: [
+                            'rgba(255, 99, 132, 1)',
+                            'rgba(54, 162, 235, 1)',
+                            'rgba(255, 206, 86, 1)',
+                            'rgba(75, 192, 192, 1)',
+                            'rgba(153, 102, 255, 1)',
+                            'rgba(255, 159, 64, 1)',
+                            'rgba(199, 199, 199, 1)',
+                            'rgba(83, 102, 255, 1)',
+                            'rgba(40, 159, 64, 1)',
+                            'rgba(210, 99, 132, 1)',
+                        ],
+                        borderWidth: 1,
+                    },
+                ],
+            });
+        } else {
+            setExpenseChartData(null);
         }
     };
 
-    const fetchIncomeChartData = async () => {
-        try {
-            const rawData = await getIncomeCategorySummary();
-            if (rawData && rawData.length > 0) {
-                const labels = rawData.map(item => item.category_name);
-                const dataValues = rawData.map(item => item.total_amount);
-                
-                setIncomeChartData({
-                    labels: labels,
-                    datasets: [
-                        {
-                            label: 'Ingresos por Categoría',
-                            data: dataValues,
-                            backgroundColor: [
-                                'rgba(75, 192, 192, 0.7)',
-                                'rgba(153, 102, 255, 0.7)',
-                                'rgba(255, 159, 64, 0.7)',
-                                'rgba(255, 99, 132, 0.7)',
-                                'rgba(54, 162, 235, 0.7)',
-                                'rgba(255, 206, 86, 0.7)',
-                                'rgba(199, 199, 199, 0.7)',
-                                'rgba(83, 102, 255, 0.7)',
-                                'rgba(40, 159, 64, 0.7)',
-                                'rgba(210, 99, 132, 0.7)',
-                            ],
-                            borderColor: [
-                                'rgba(75, 192, 192, 1)',
-                                'rgba(153, 102, 255, 1)',
-                                'rgba(255, 159, 64, 1)',
-                                'rgba(255, 99, 132, 1)',
-                                'rgba(54, 162, 235, 1)',
-                                'rgba(255, 206, 86, 1)',
-                                'rgba(199, 199, 199, 1)',
-                                'rgba(83, 102, 255, 1)',
-                                'rgba(40, 159, 64, 1)',
-                                'rgba(210, 99, 132, 1)',
-                            ],
-                            borderWidth: 1,
-                        },
-                    ],
-                });
-            } else {
-                setIncomeChartData(null);
-            }
-        } catch (err) {
-            setError(prevError => prevError + '\nError al cargar datos del gráfico de ingresos: ' + (err.response?.data?.detail || err.message));
-            console.error("Error fetching income chart data:", err);
+    const updateIncomeChartData = (rawData) => {
+        if (rawData && rawData.length > 0) {
+            const labels = rawData.map(item => item.category_name);
+            const dataValues = rawData.map(item => item.total_amount);
+            
+            setIncomeChartData({
+                labels: labels,
+                datasets: [
+                    {
+                        label: 'Ingresos por Categoría',
+                        data: dataValues,
+                        backgroundColor: [
+                            'rgba(75, 192, 192, 0.7)',
+                            'rgba(153, 102, 255, 0.7)',
+                            'rgba(255, 159, 64, 0.7)',
+                            'rgba(255, 99, 132, 0.7)',
+                            'rgba(54, 162, 235, 0.7)',
+                            'rgba(255, 206, 86, 0.7)',
+                            'rgba(199, 199, 199, 0.7)',
+                            'rgba(83, 102, 255, 0.7)',
+                            'rgba(40, 159, 64, 0.7)',
+                            'rgba(210, 99, 132, 0.7)',
+                        ],
+                        borderColor: [
+                            'rgba(75, 192, 192, 1)',
+                            'rgba(153, 102, 255, 1)',
+                            'rgba(255, 159, 64, 1)',
+                            'rgba(255, 99, 132, 1)',
+                            'rgba(54, 162, 235, 1)',
+                            'rgba(255, 206, 86, 1)',
+                            'rgba(199, 199, 199, 1)',
+                            'rgba(83, 102, 255, 1)',
+                            'rgba(40, 159, 64, 1)',
+                            'rgba(210, 99, 132, 1)',
+                        ],
+                        borderWidth: 1,
+                    },
+                ],
+            });
+        } else {
+            setIncomeChartData(null);
         }
     };
 
     useEffect(() => {
         fetchSummaryData();
-        fetchExpenseChartData();
-        fetchIncomeChartData();
     }, []);
 
     const commonChartOptions = (titleText) => ({
@@ -1,4 +1,4 @@
-import React, { useState, useEffect, useCallback } from 'react';
+import React, { useState, useEffect, useCallback, useMemo } from 'react';
 import {
     Box,
     Typography,
@@ -35,7 +35,7 @@ import AddExpenseModal from '../components/AddExpenseModal';
 import {
     getExpenses,
     addExpense,
-    getIncomes,
+    getFinancialSummary,
     deleteExpense as apiDeleteExpense,
     updateExpense as apiUpdateExpense,
     getCategories 
@@ -44,7 +44,8 @@ import { formatCurrency, formatDate } from '../utils/formattingUtils';
 
 function ExpensesPage() {
     const [expenses, setExpenses] = useState([]);
-    const [displayedExpenses, setDisplayedExpenses] = useState([]); 
+    const [nextPage, setNextPage] = useState(null); // URL 'next' del cursor, null si no hay más
+    const [loadingMore, setLoadingMore] = useState(false);
     const [loading, setLoading] = useState(true);
     const [error, setError] = useState(null);
     const [isAddModalOpen, setIsAddModalOpen] = useState(false); 
@@ -84,31 +85,27 @@ function ExpensesPage() {
         fetchUserCategories();
     }, [fetchUserCategories]);
 
+    // El orden y el filtro de categoría se aplican en el backend: cada cambio vuelve a pedir la primera página
+    const listParams = useMemo(() => {
+        const params = { ordering: `${sortConfig.order === 'desc' ? '-' : ''}${sortConfig.field}` };
+        if (filterCategory) params.category = filterCategory.id;
+        return params;
+    }, [sortConfig, filterCategory]);
+
     const fetchFinancialData = useCallback(async () => {
         setLoading(true);
         try {
-            const [expensesData, incomesData] = await Promise.all([
-                getExpenses(),
-                getIncomes()
+            // Los totales se calculan en el backend; de la lista solo se pide la primera página
+            const [expensesPage, summary] = await Promise.all([
+                getExpenses(listParams),
+                getFinancialSummary()
             ]);
 
-            setExpenses(expensesData || []);
-            
-            let currentTotalIncomes = 0;
-            if (incomesData && incomesData.length > 0) {
-                currentTotalIncomes = incomesData.reduce((sum, income) => {
-                    const amount = parseFloat(income.amount);
-                    return sum + (isNaN(amount) ? 0 : amount);
-                }, 0);
-            }
+            setExpenses(expensesPage.results || []);
+            setNextPage(expensesPage.next);
 
-            let currentTotalExpenses = 0;
-            if (expensesData && expensesData.length > 0) {
-                currentTotalExpenses = expensesData.reduce((sum, expense) => {
-                    const amount = parseFloat(expense.amount);
-                    return sum + (isNaN(amount) ? 0 : amount);
-                }, 0);
-            }
+            const currentTotalIncomes = parseFloat(summary.incomes) || 0;
+            const currentTotalExpenses = parseFloat(summary.expenses) || 0;
 
             setFinancialSummary({
                 totalIncomes: currentTotalIncomes,
@@ -121,46 +118,31 @@ function ExpensesPage() {
             console.error("Error fetching financial data:", err);
             setError(err.message || 'No se pudieron cargar los datos financieros.');
             setExpenses([]);
+            setNextPage(null);
             setFinancialSummary({ totalIncomes: 0, totalExpenses: 0, balance: 0 });
         } finally {
             setLoading(false);
         }
-    }, []);
+    }, [listParams]);
 
     useEffect(() => {
         fetchFinancialData();
     }, [fetchFinancialData]);
 
-    // Efecto para actualizar displayedExpenses
-    useEffect(() => {
-        let processedExpenses = [...expenses];
-
-        // Filtrar por categoría
-        if (filterCategory) {
-            processedExpenses = processedExpenses.filter(expense => expense.category === filterCategory.id);
-        }
-
-        // Ordenar
-        if (sortConfig.field) {
-            processedExpenses.sort((a, b) => {
-                let valA = a[sortConfig.field];
-                let valB = b[sortConfig.field];
-
-                if (sortConfig.field === 'amount') {
-                    valA = parseFloat(valA);
-                    valB = parseFloat(valB);
-                } else if (sortConfig.field === 'date') {
-                    valA = new Date(valA);
-                    valB = new Date(valB);
-                }
-
-                if (valA < valB) return sortConfig.order === 'asc' ? -1 : 1;
-                if (valA > valB) return sortConfig.order === 'asc' ? 1 : -1;
-                return 0;
-            });
+    const handleLoadMore = async () => {
+        if (!nextPage) return;
+        setLoadingMore(true);
+        try {
+            const page = await getExpenses(listParams, nextPage);
+            setExpenses(prev => [...prev, ...page.results]);
+            setNextPage(page.next);
+        } catch (err) {
+            console.error("Error al cargar más gastos:", err);
+            setSnackbar({ open: true, message: 'No se pudieron cargar más gastos.', severity: 'error' });
+        } finally {
+            setLoadingMore(false);
         }
-        setDisplayedExpenses(processedExpenses);
-    }, [expenses, sortConfig, filterCategory]);
+    };
 
     const handleOpenAddModal = () => { 
         setExpenseToEdit(null); 
@@ -295,7 +277,6 @@ function ExpensesPage() {
                             >
                                 <MenuItem value="date">Fecha</MenuItem>
                                 <MenuItem value="amount">Monto</MenuItem>
-                                <MenuItem value="description">Descripción</MenuItem>
                             </Select>
                         </FormControl>
                     </Grid>
@@ -350,15 +331,15 @@ function ExpensesPage() {
                     {error}
                 </Alert>
             )}
-            {!loading && !error && displayedExpenses.length === 0 && (
+            {!loading && !error && expenses.length === 0 && (
                 <Typography sx={{ textAlign: 'center', my: 3 }}>
                     {filterCategory || sortConfig.field !== 'date' ? 'No hay gastos que coincidan con los filtros/orden actual.' : 'Aún no has registrado ningún gasto.'}
                 </Typography>
             )}
-            {!loading && !error && displayedExpenses.length > 0 && (
+            {!loading && !error && expenses.length > 0 && (
                 <Paper elevation={3}>
                     <List>
-                        {displayedExpenses.map((expense, index) => (
+                        {expenses.map((expense, index) => (
                             <React.Fragment key={expense.id}>
                                 <ListItem>
                                     <ListItemText
@@ -374,12 +355,19 @@ function ExpensesPage() {
                                         </IconButton>
                                     </Box>
                                 </ListItem>
-                                {index < displayedExpenses.length - 1 && <hr />}
+                                {index < expenses.length - 1 && <hr />}
                             </React.Fragment>
                         ))}
                     </List>
                 </Paper>
             )}
+            {!loading && !error && nextPage && (
+                <Box sx={{ display: 'flex', justifyContent: 'center', my: 2 }}>
+                    <Button variant="outlined" onClick={handleLoadMore} disabled={loadingMore}>
+                        {loadingMore ? 'Cargando...' : 'Cargar más'}
+                    </Button>
+                </Box>
+            )}
 
             {/* Modal para Añadir/Editar Gastos */}
             <AddExpenseModal 
@@ -1,5 +1,5 @@
 // frontend/src/pages/IncomesPage.jsx
-import React, { useState, useEffect, useCallback } from 'react';
+import React, { useState, useEffect, useCallback, useMemo } from 'react';
 import {
     Box,
     Typography,
@@ -35,7 +35,8 @@ import { formatCurrency, formatDate } from '../utils/formattingUtils';
 
 function IncomesPage() {
     const [incomes, setIncomes] = useState([]); 
-    const [displayedIncomes, setDisplayedIncomes] = useState([]); 
+    const [nextPage, setNextPage] = useState(null); // URL 'next' del cursor, null si no hay más
+    const [loadingMore, setLoadingMore] = useState(false);
     const [loading, setLoading] = useState(true); 
     const [error, setError] = useState(null);     
     const [isAddIncomeModalOpen, setIsAddIncomeModalOpen] = useState(false);
@@ -70,57 +71,48 @@ function IncomesPage() {
         fetchUserCategories();
     }, [fetchUserCategories]);
 
+    // El orden y el filtro de categoría se aplican en el backend: cada cambio vuelve a pedir la primera página
+    const listParams = useMemo(() => {
+        const params = { ordering: `${sortConfig.order === 'desc' ? '-' : ''}${sortConfig.field}` };
+        if (filterCategory) params.category = filterCategory.id;
+        return params;
+    }, [sortConfig, filterCategory]);
+
     const fetchIncomes = useCallback(async () => {
         setLoading(true);
         try {
-            const data = await getIncomes();
-            setIncomes(data || []);
+            const page = await getIncomes(listParams);
+            setIncomes(page.results || []);
+            setNextPage(page.next);
             setError(null);
         } catch (err) {
             console.error("Error al obtener ingresos:", err);
             setError("No se pudieron cargar los ingresos. Inténtalo de nuevo más tarde.");
             setIncomes([]);
+            setNextPage(null);
         } finally {
             setLoading(false);
         }
-    }, []);
+    }, [listParams]);
 
     useEffect(() => {
         fetchIncomes();
     }, [fetchIncomes]);
 
-    // Efecto para actualizar displayedIncomes cuando cambian los ingresos, el orden o el filtro
-    useEffect(() => {
-        let processedIncomes = [...incomes];
-
-        // Filtrar por categoría
-        if (filterCategory) {
-            processedIncomes = processedIncomes.filter(income => income.category === filterCategory.id);
-        }
-
-        // Ordenar
-        if (sortConfig.field) {
-            processedIncomes.sort((a, b) => {
-                let valA = a[sortConfig.field];
-                let valB = b[sortConfig.field];
-
-                if (sortConfig.field === 'amount') {
-                    valA = parseFloat(valA);
-                    valB = parseFloat(valB);
-                } else if (sortConfig.field === 'date') {
-                    // Asumimos que la fecha ya está en un formato comparable o es un objeto Date
-                    // Si es string, puede necesitar new Date(valA) vs new Date(valB)
-                    valA = new Date(valA);
-                    valB = new Date(valB);
-                }
-
-                if (valA < valB) return sortConfig.order === 'asc' ? -1 : 1;
-                if (valA > valB) return sortConfig.order === 'asc' ? 1 : -1;
-                return 0;
-            });
+    const handleLoadMore = async () => {
+        if (!nextPage) return;
+        setLoadingMore(true);
+        try {
+            const page = await getIncomes(listParams, nextPage);
+            setIncomes(prev => [...prev, ...page.results]);
+            setNextPage(page.next);
+        } catch (err) {
+            console.error("Error al cargar más ingresos:", err);
+            setSnackbar({ open: true, message: 'No se pudieron cargar más ingresos.', severity: 'error' });
+        } finally {
+            setLoadingMore(false);
         }
-        setDisplayedIncomes(processedIncomes);
-    }, [incomes, sortConfig, filterCategory]);
+    };
 
     const handleOpenAddIncomeModal = () => {
         setIncomeToEdit(null); 
@@ -236,8 +228,7 @@ function IncomesPage() {
                                 label="Ordenar por"
                             >
                                 <MenuItem value="date">Fecha</MenuItem>
-                                <MenuItem value="amount">Monto</MenuItem>
-                                <MenuItem value="description">Descripción</MenuItem> 
+                                <MenuItem value="amount">Monto</MenuItem> 
                             </Select>
                         </FormControl>
                     </Grid>
@@ -292,15 +283,15 @@ function IncomesPage() {
                     {error}
                 </Typography>
             )}
-            {!loading && !error && displayedIncomes.length === 0 && (
+            {!loading && !error && incomes.length === 0 && (
                 <Typography sx={{ my: 2 }}>
                     {filterCategory || sortConfig.field !== 'date' ? 'No hay ingresos que coincidan con los filtros/orden actual.' : 'No tienes ingresos registrados. ¡Añade uno para empezar!'}
                 </Typography>
             )}
-            {!loading && !error && displayedIncomes.length > 0 && (
+            {!loading && !error && incomes.length > 0 && (
                 <Paper elevation={2}>
                     <List>
-                        {displayedIncomes.map((income, index) => (
+                        {incomes.map((income, index) => (
                             <React.Fragment key={income.id}>
                                 <ListItem>
                                     <ListItemText 
@@ -316,12 +307,19 @@ function IncomesPage() {
                                         </IconButton>
                                     </Box>
                                 </ListItem>
-                                {index < displayedIncomes.length - 1 && <Divider />}
+                                {index < incomes.length - 1 && <Divider />}
                             </React.Fragment>
                         ))}
                     </List>
                 </Paper>
             )}
+            {!loading && !error && nextPage && (
+                <Box sx={{ display: 'flex', justifyContent: 'center', my: 2 }}>
+                    <Button variant="outlined" onClick={handleLoadMore} disabled={loadingMore}>
+                        {loadingMore ? 'Cargando...' : 'Cargar más'}
+                    </Button>
+                </Box>
+            )}
 
             <AddIncomeModal
                 open={isAddIncomeModalOpen}
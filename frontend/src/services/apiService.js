@@ -23,6 +23,17 @@ apiClient.interceptors.request.use(
     }
 );
 
+// Los listados de ingresos y gastos vienen paginados por cursor ({ next, previous, results }).
+// Se pide una página cada vez: la primera con los filtros y el orden, las siguientes con la
+// URL 'next' que devuelve el backend (ya incluye filtros, orden y cursor).
+// Devuelve { results, next }; next es null cuando no hay más páginas.
+const fetchPage = async (url, params = {}, pageUrl = null) => {
+    const response = pageUrl
+        ? await apiClient.get(pageUrl)
+        : await apiClient.get(url, { params });
+    return { results: response.data.results, next: response.data.next };
+};
+
 export const loginUser = async (credentials) => {
     try {
         const payload = {
@@ -146,11 +157,10 @@ export const addExpense = async (expenseData) => {
     }
 };
 
-// Función para obtener todos los gastos del usuario
-export const getExpenses = async () => {
+// Función para obtener una página de gastos del usuario (filtros: category, ordering, ...)
+export const getExpenses = async (filters = {}, pageUrl = null) => {
     try {
-        const response = await apiClient.get('/transactions/expenses/');
-        return response.data;
+        return await fetchPage('/transactions/expenses/', filters, pageUrl);
     } catch (error) {
         console.error("Error fetching expenses:", error.response ? error.response.data : error.message);
         throw error.response ? error.response.data : new Error('Error al obtener los gastos');
@@ -209,6 +219,25 @@ export const changePassword = async (passwordData) => {
     return response.data;
 };
 
+// Resumen del dashboard: totales, balance y desgloses por categoría en una sola llamada
+export const getDashboardSummary = async () => {
+    const response = await apiClient.get('transactions/summary/dashboard/');
+    return response.data;
+};
+
+// Totales de ingresos, gastos y balance
+export const getFinancialSummary = async () => {
+    const response = await apiClient.get('transactions/summary/financial/');
+    return response.data;
+};
+
+// Serie temporal de ingresos, gastos y neto.
+// params: { granularity: 'day'|'week'|'month'|'year', date_from, date_to, by_category }
+export const getTimeseriesSummary = async (params = {}) => {
+    const response = await apiClient.get('transactions/summary/timeseries/', { params });
+    return response.data;
+};
+
 // Nueva función para obtener el resumen de gastos por categoría
 export const getExpenseCategorySummary = async () => {
     const response = await apiClient.get('transactions/summary/expenses-by-category/');
@@ -253,10 +282,10 @@ export const deleteCategory = async (id) => {
 };
 
 // INGRESOS
-export const getIncomes = async (filters = {}) => {
+// Una página de ingresos; para la siguiente se pasa el 'next' de la anterior
+export const getIncomes = async (filters = {}, pageUrl = null) => {
     try {
-        const response = await apiClient.get('/transactions/incomes/', { params: filters });
-        return response.data;
+        return await fetchPage('/transactions/incomes/', filters, pageUrl);
     } catch (error) {
         console.error("Error fetching incomes:", error.response ? error.response.data : error.message);
         throw error.response ? error.response.data : new Error('Error al obtener los ingresos');